@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, FreelancerProfile, CustomerProfile
+from .models import User, FreelancerProfile, CustomerProfile, ScheduledJob
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -33,3 +33,11 @@ class FreelancerProfileAdmin(admin.ModelAdmin):
 class CustomerProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'total_bookings']
     search_fields = ['user__username', 'user__email']
+
+
+@admin.register(ScheduledJob)
+class ScheduledJobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'next_run_at', 'lease_owner', 'last_duration', 'max_duration',
+                    'run_count', 'failure_count', 'last_failed_at']
+    readonly_fields = ['lease_owner', 'lease_expires_at', 'last_started_at', 'last_succeeded_at', 'last_duration',
+                       'max_duration', 'total_duration', 'run_count', 'failure_count', 'last_failed_at', 'last_error']
@@ -1,12 +1,23 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Q, Count, Avg
 from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from .models import User, FreelancerProfile
 from services.models import Service, Category, SubCategory
+from services import result_cache
+from . import analytics, leaderboard, platform_stats
 from bookings.models import Booking
 
+ADMIN_DASHBOARD_CACHE_KEY = 'admin_dashboard:stats'
+
+# Most buckets one analytics request may return per series
+MAX_ANALYTICS_PERIODS = 400
+
 
 def admin_required(view_func):
     """Decorator to check if user is admin"""
@@ -21,52 +32,39 @@ def admin_required(view_func):
     return wrapper
 
 
+def _dashboard_stats():
+    """Dashboard counts from the platform counters, plus the recent lists"""
+    counters = platform_stats.totals()
+    stats = {
+        'total_users': sum(counters[f'{user_type}_users'] for user_type in platform_stats.USER_TYPES),
+        'total_freelancers': counters['freelancer_users'],
+        'pending_freelancers': counters['freelancer_users'] - counters['verified_freelancers'],
+        'active_freelancers': counters['verified_freelancers'],
+        'total_customers': counters['customer_users'],
+        'total_services': counters['approved_services'] + counters['pending_services'],
+        'pending_services': counters['pending_services'],
+        'approved_services': counters['approved_services'],
+        'total_bookings': sum(counters[f'{status}_bookings'] for status in platform_stats.BOOKING_STATUSES),
+        'pending_bookings': counters['pending_bookings'],
+    }
+    
+    stats['recent_customers'] = list(User.objects.filter(user_type='customer').order_by('-created_at')[:5])
+    stats['recent_freelancers'] = list(User.objects.filter(user_type='freelancer').order_by('-created_at')[:5])
+    
+    # Top rated freelancers by Bayesian score
+    stats['top_freelancers'] = leaderboard.top(5)
+    return stats
+
+
 @admin_required
 def admin_dashboard(request):
     """Main admin dashboard"""
-    # Get statistics
-    total_users = User.objects.count()
-    total_freelancers = User.objects.filter(user_type='freelancer').count()
-    pending_freelancers = User.objects.filter(user_type='freelancer', is_verified=False).count()
-    active_freelancers = User.objects.filter(user_type='freelancer', is_verified=True).count()
-    total_customers = User.objects.filter(user_type='customer').count()
-    total_services = Service.objects.count()
-    pending_services = Service.objects.filter(is_approved=False).count()
-    approved_services = Service.objects.filter(is_approved=True).count()
-    total_bookings = Booking.objects.count()
-    pending_bookings = Booking.objects.filter(status='pending').count()
-    
-    # Recent customers only
-    recent_users = User.objects.filter(user_type='customer').order_by('-created_at')[:5]
-    
-    # Recent freelancers
-    recent_freelancers = User.objects.filter(user_type='freelancer').order_by('-created_at')[:5]
-    
-    # Top rated freelancers
-    top_freelancers = User.objects.filter(
-        user_type='freelancer',
-        is_verified=True
-    ).select_related('freelancer_profile').order_by('-freelancer_profile__rating')[:5]
-    
-    # Recent customers
-    recent_customers = User.objects.filter(user_type='customer').order_by('-created_at')[:5]
-    
-    context = {
-        'total_users': total_users,
-        'total_freelancers': total_freelancers,
-        'pending_freelancers': pending_freelancers,
-        'active_freelancers': active_freelancers,
-        'total_customers': total_customers,
-        'total_services': total_services,
-        'pending_services': pending_services,
-        'approved_services': approved_services,
-        'total_bookings': total_bookings,
-        'pending_bookings': pending_bookings,
-        'recent_users': recent_users,
-        'recent_freelancers': recent_freelancers,
-        'top_freelancers': top_freelancers,
-        'recent_customers': recent_customers,
-    }
+    # Statistics are shared by all admins and cached briefly
+    context = cache.get(ADMIN_DASHBOARD_CACHE_KEY)
+    if context is None:
+        context = _dashboard_stats()
+        cache.set(ADMIN_DASHBOARD_CACHE_KEY, context,
+                  getattr(settings, 'ADMIN_DASHBOARD_CACHE_SECONDS', 60))
     
     return render(request, 'admin/dashboard.html', context)
 
@@ -424,3 +422,70 @@ def toggle_category_status(request, category_id):
         messages.success(request, f'Category "{category.name}" has been {status}!')
         return redirect('accounts:admin_category_list')
     return redirect('accounts:admin_category_list')
+
+
+@admin_required
+def search_cache_stats(request):
+    """Service search cache hit/miss counters (JSON), POST reset=1 clears them"""
+    stats = result_cache.stats()
+    if request.method == 'POST' and request.POST.get('reset'):
+        result_cache.reset_stats()
+    return JsonResponse(stats)
+
+
+@admin_required
+def analytics_series(request):
+    """
+    Bookings, GMV and new user time series (JSON) from the pre-aggregated
+    buckets. Query parameters: metric (repeatable), granularity, start, end
+    (YYYY-MM-DD), group_by (category or city), category and city filters.
+    """
+    today = timezone.localdate()
+    metrics = request.GET.getlist('metric') or list(analytics.METRICS)
+    granularity = request.GET.get('granularity', 'day')
+    group_by = request.GET.get('group_by') or None
+    try:
+        end = parse_date(request.GET.get('end', '')) if request.GET.get('end') else today
+        start = parse_date(request.GET.get('start', '')) if request.GET.get('start') else end - timezone.timedelta(days=29)
+    except (TypeError, ValueError):
+        # Impossible dates (2026-02-30) raise, malformed ones parse to None
+        start = end = None
+    category_id = request.GET.get('category')
+    
+    if not set(metrics) <= set(analytics.METRICS):
+        return JsonResponse({'error': f"metric must be one of {', '.join(analytics.METRICS)}"}, status=400)
+    if granularity not in analytics.GRANULARITIES:
+        return JsonResponse({'error': f"granularity must be one of {', '.join(analytics.GRANULARITIES)}"}, status=400)
+    if group_by and group_by not in analytics.GROUP_BY:
+        return JsonResponse({'error': f"group_by must be one of {', '.join(analytics.GROUP_BY)}"}, status=400)
+    if not start or not end or start > end:
+        return JsonResponse({'error': 'start and end must be dates (YYYY-MM-DD) with start <= end'}, status=400)
+    if category_id and not category_id.isdigit():
+        return JsonResponse({'error': 'category must be a category id'}, status=400)
+    if len(analytics.periods(start, end, granularity)) > MAX_ANALYTICS_PERIODS:
+        return JsonResponse({'error': 'Range too long for this granularity, use a coarser one'}, status=400)
+    
+    names = {}
+    if group_by == 'category':
+        names = dict(Category.objects.values_list('pk', 'name'))
+    
+    series = {}
+    for metric in metrics:
+        groups = analytics.series(metric, granularity, start, end, group_by=group_by,
+                                  category_id=category_id, city=request.GET.get('city'))
+        series[metric] = [
+            {
+                'key': key,
+                'label': names.get(key, key) if group_by == 'category' else (key if group_by else 'All'),
+                'points': [{'period': period.isoformat(), 'value': float(value)} for period, value in points],
+            }
+            for key, points in groups.items()
+        ]
+    
+    return JsonResponse({
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'group_by': group_by,
+        'series': series,
+    })
@@ -0,0 +1,192 @@
+"""
+Time-series analytics for the admin dashboard.
+
+Bookings (by creation date), GMV (completed payment amounts by payment date,
+or creation date for payments completed before payment dates were recorded)
+and new users (by join date) are counted into AnalyticsBucket rows keyed by
+day, category and city as they happen. Week and month buckets are rolled up
+from the day buckets by rollup(), which the accounts.rollup_analytics job
+runs over every day since its last successful run and the rollup_analytics
+command runs on demand; the still open week or month is summed from its day
+rows when read, so charts are current without waiting for a rollup. A year
+of months reads at most twelve periods of rows per category and city.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+METRICS = ('bookings', 'gmv', 'new_users')
+GRANULARITIES = ('day', 'week', 'month')
+GROUP_BY = ('category', 'city')
+
+
+def normalize_city(city):
+    return (city or '').strip().title()
+
+
+def period_start(date, granularity):
+    """First day of the bucket containing date (weeks start on Monday)"""
+    if granularity == 'week':
+        return date - timedelta(days=date.weekday())
+    if granularity == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def next_period(date, granularity):
+    """First day of the bucket after the one starting on date"""
+    if granularity == 'week':
+        return date + timedelta(days=7)
+    if granularity == 'month':
+        return (date.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return date + timedelta(days=1)
+
+
+def periods(start, end, granularity):
+    """Start dates of every bucket overlapping start..end"""
+    current = period_start(start, granularity)
+    result = []
+    while current <= end:
+        result.append(current)
+        current = next_period(current, granularity)
+    return result
+
+
+def record(metric, when, amount=1, category_id=None, city=''):
+    """Add amount to the day bucket of when"""
+    from .models import AnalyticsBucket
+
+    key = {
+        'granularity': 'day',
+        'period_start': timezone.localdate(when),
+        'metric': metric,
+        'category_id': category_id,
+        'city': normalize_city(city),
+    }
+    if not AnalyticsBucket.objects.filter(**key).update(value=F('value') + amount):
+        AnalyticsBucket.objects.create(value=amount, **key)
+
+
+def record_booking(booking):
+    record('bookings', booking.created_at, 1, booking.service.category_id, booking.freelancer.city)
+
+
+def record_payment(payment):
+    booking = payment.booking
+    when = payment.payment_date or payment.created_at
+    record('gmv', when, payment.amount, booking.service.category_id, booking.freelancer.city)
+
+
+def record_user(user):
+    record('new_users', user.date_joined, 1, None, user.city)
+
+
+def rollup(granularity, start, end):
+    """Rebuild the week or month buckets overlapping start..end from day buckets"""
+    from .models import AnalyticsBucket
+
+    starts = periods(start, end, granularity)
+    if not starts:
+        return 0
+    last_day = next_period(starts[-1], granularity) - timedelta(days=1)
+
+    totals = defaultdict(Decimal)
+    days = AnalyticsBucket.objects.filter(
+        granularity='day', period_start__range=(starts[0], last_day),
+    ).values_list('period_start', 'metric', 'category_id', 'city', 'value')
+    for day, metric, category_id, city, value in days.iterator():
+        totals[(period_start(day, granularity), metric, category_id, city)] += value
+
+    with transaction.atomic():
+        AnalyticsBucket.objects.filter(granularity=granularity, period_start__in=starts).delete()
+        AnalyticsBucket.objects.bulk_create([
+            AnalyticsBucket(granularity=granularity, period_start=period, metric=metric,
+                            category_id=category_id, city=city, value=value)
+            for (period, metric, category_id, city), value in totals.items()
+        ], batch_size=1000)
+    return len(totals)
+
+
+def rebuild():
+    """Recreate every bucket from the bookings, payments and users tables"""
+    from bookings.models import Booking
+    from payments.models import Payment
+    from .models import AnalyticsBucket, User
+
+    totals = defaultdict(Decimal)
+    sources = (
+        ('bookings', Booking.objects.annotate(day=TruncDate('created_at')).values(
+            'day', category=F('service__category_id'), place=F('freelancer__city'),
+        ).annotate(total=Count('pk'))),
+        ('gmv', Payment.objects.filter(status='completed').annotate(
+            day=TruncDate(Coalesce('payment_date', 'created_at')),
+        ).values(
+            'day', category=F('booking__service__category_id'), place=F('booking__freelancer__city'),
+        ).annotate(total=Sum('amount'))),
+        ('new_users', User.objects.annotate(day=TruncDate('date_joined')).values(
+            'day', place=F('city'),
+        ).annotate(total=Count('pk'))),
+    )
+    for metric, rows in sources:
+        for row in rows.order_by():
+            key = (row['day'], metric, row.get('category'), normalize_city(row['place']))
+            totals[key] += row['total']
+
+    with transaction.atomic():
+        AnalyticsBucket.objects.all().delete()
+        AnalyticsBucket.objects.bulk_create([
+            AnalyticsBucket(granularity='day', period_start=day, metric=metric,
+                            category_id=category_id, city=city, value=value)
+            for (day, metric, category_id, city), value in totals.items()
+        ], batch_size=1000)
+        if totals:
+            first = min(key[0] for key in totals)
+            last = max(key[0] for key in totals)
+            for granularity in ('week', 'month'):
+                rollup(granularity, first, last)
+    return len(totals)
+
+
+def series(metric, granularity, start, end, group_by=None, category_id=None, city=None):
+    """
+    {group key: [(period start, value), ...]} for every bucket overlapping
+    start..end. The key is None without group_by, else the category id or
+    city.
+    """
+    from .models import AnalyticsBucket
+
+    rows = AnalyticsBucket.objects.filter(metric=metric)
+    if category_id:
+        rows = rows.filter(category_id=category_id)
+    if city:
+        rows = rows.filter(city=normalize_city(city))
+    key_field = {'category': 'category_id', 'city': 'city'}.get(group_by)
+    keys = [key_field] if key_field else []
+
+    starts = periods(start, end, granularity)
+    if not starts:
+        return {}
+    values = defaultdict(lambda: dict.fromkeys(starts, Decimal(0)))
+    if not key_field:
+        values[None] = dict.fromkeys(starts, Decimal(0))
+
+    open_start = period_start(timezone.localdate(), granularity)
+    closed = [day for day in starts if granularity == 'day' or day < open_start]
+    if closed:
+        rows_closed = rows.filter(granularity=granularity, period_start__range=(closed[0], closed[-1]))
+        for row in rows_closed.values('period_start', *keys).annotate(total=Sum('value')).order_by():
+            values[row[key_field] if key_field else None][row['period_start']] += row['total']
+
+    if granularity != 'day' and open_start in starts:
+        # The current week or month is summed from its day buckets
+        current = rows.filter(granularity='day', period_start__gte=open_start,
+                              period_start__lt=next_period(open_start, granularity))
+        for row in current.values(*keys).annotate(total=Sum('value')).order_by():
+            values[row[key_field] if key_field else None][open_start] += row['total']
+
+    return {key: sorted(points.items()) for key, points in values.items()}
@@ -7,3 +7,11 @@ class AccountsConfig(AppConfig):
     
     def ready(self):
         import accounts.signals
+        
+        from datetime import timedelta
+        from freelancer_platform import scheduler
+        from . import jobs
+        scheduler.register('accounts.expire_otps', jobs.expire_otps, every=timedelta(hours=1))
+        scheduler.register('accounts.reconcile_platform_stats', jobs.reconcile_platform_stats, every=timedelta(hours=6))
+        scheduler.register('accounts.refresh_leaderboards', jobs.refresh_leaderboards, every=timedelta(hours=1))
+        scheduler.register(jobs.ROLLUP_ANALYTICS_JOB, jobs.rollup_analytics, every=timedelta(minutes=30))
@@ -0,0 +1,94 @@
+"""
+Pincode based proximity search.
+
+Coordinates come from the bundled offline table in accounts/data/pincodes.csv.
+Six digit rows are post office centroids; three digit rows are the centroid
+of a postal sorting district and are used as a fallback for pincodes that
+are not listed individually (every Kerala prefix is covered).
+
+User.latitude/longitude are filled from the table when a user is saved and
+indexed together, so a radius query first narrows rows with an indexed
+bounding box and only computes great-circle distance for those.
+"""
+import csv
+import math
+from functools import lru_cache
+from pathlib import Path
+
+from django.db.models import F, FloatField
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+PINCODE_FILE = Path(__file__).resolve().parent / 'data' / 'pincodes.csv'
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+
+@lru_cache(maxsize=1)
+def _load_table():
+    table = {}
+    with open(PINCODE_FILE, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            table[row['pincode']] = (float(row['latitude']), float(row['longitude']))
+    return table
+
+
+def lookup(pincode):
+    """Return (latitude, longitude) for a pincode, or None if unknown"""
+    pincode = (pincode or '').strip().replace(' ', '')
+    if not pincode.isdigit():
+        return None
+    table = _load_table()
+    return table.get(pincode) or table.get(pincode[:3])
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in km"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing the radius"""
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    lng_delta = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - lat_delta, latitude + lat_delta, longitude - lng_delta, longitude + lng_delta
+
+
+def distance_expression(latitude, longitude, prefix=''):
+    """Haversine distance in km from a point to the row's coordinates"""
+    row_lat = Radians(F(f'{prefix}latitude'))
+    row_lng = Radians(F(f'{prefix}longitude'))
+    lat = math.radians(latitude)
+    lng = math.radians(longitude)
+    a = (
+        Power(Sin((row_lat - lat) / 2), 2) +
+        Cos(row_lat) * math.cos(lat) * Power(Sin((row_lng - lng) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a), output_field=FloatField())
+
+
+def within_radius(queryset, latitude, longitude, radius_km, prefix=''):
+    """
+    Restrict queryset to rows within radius_km of a point.
+
+    prefix is the lookup path to the User holding the coordinates, e.g.
+    'freelancer__' for services. Rows get a distance_km annotation; order by
+    it to get nearest first.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    return queryset.filter(**{
+        f'{prefix}latitude__range': (min_lat, max_lat),
+        f'{prefix}longitude__range': (min_lng, max_lng),
+    }).annotate(
+        distance_km=distance_expression(latitude, longitude, prefix),
+    ).filter(distance_km__lte=radius_km)
+
+
+def near_pincode(queryset, pincode, radius_km, prefix=''):
+    """within_radius around a pincode centroid; returns None for unknown pincodes"""
+    point = lookup(pincode)
+    if point is None:
+        return None
+    return within_radius(queryset, point[0], point[1], radius_km, prefix)
@@ -0,0 +1,47 @@
+"""Periodic maintenance jobs of the accounts app, registered in apps.py"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import analytics, leaderboard, platform_stats
+
+
+def expire_otps():
+    """Delete OTPs that can no longer be verified"""
+    from .models import EmailOTP
+
+    cutoff = timezone.now() - timedelta(minutes=getattr(settings, 'OTP_EXPIRY_MINUTES', 10))
+    EmailOTP.objects.filter(created_at__lt=cutoff).delete()
+
+
+def reconcile_platform_stats():
+    """Repair counter drift left by queryset updates and bulk operations"""
+    platform_stats.reconcile(fix=True)
+
+
+def refresh_leaderboards():
+    """Pick up review changes that did not go through update_rating"""
+    leaderboard.rebuild()
+
+
+ROLLUP_ANALYTICS_JOB = 'accounts.rollup_analytics'
+
+
+def rollup_analytics():
+    """
+    Roll the day buckets since the last successful run (at least yesterday's)
+    into their weeks and months, so days missed while no scheduler was
+    running are caught up. The first run rebuilds every bucket from the
+    bookings, payments and users tables.
+    """
+    from .models import ScheduledJob
+
+    last = ScheduledJob.objects.filter(name=ROLLUP_ANALYTICS_JOB).values_list('last_succeeded_at', flat=True).first()
+    if last is None:
+        analytics.rebuild()
+        return
+    today = timezone.localdate()
+    start = min(timezone.localdate(last), today - timedelta(days=1))
+    for granularity in ('week', 'month'):
+        analytics.rollup(granularity, start, today)
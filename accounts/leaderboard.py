@@ -0,0 +1,116 @@
+"""
+Top-freelancer leaderboards.
+
+A freelancer's score is the Bayesian average of their active review ratings:
+(prior_reviews * prior_rating + rating_sum) / (prior_reviews + review_count),
+with the prior taken from LEADERBOARD_PRIOR_REVIEWS / LEADERBOARD_PRIOR_RATING.
+A single 5-star review stays close to the prior while hundreds of 4.8s score
+close to 4.8, and since the prior is fixed a freelancer's score depends on
+their own reviews only, so a refresh touches only their rows.
+
+LeaderboardEntry keeps one row per freelancer on the overall board, on the
+board of each category they have reviews in and on the board of their city.
+refresh() rewrites one freelancer's rows and is called from
+FreelancerProfile.update_rating; top() reads a board as an index-ordered
+slice. rebuild() recreates every row from the reviews table.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .analytics import normalize_city
+
+SCORE_PLACES = Decimal('0.0001')
+
+
+def bayesian_score(rating_sum, review_count):
+    """Review average pulled towards the configured prior"""
+    prior_reviews = getattr(settings, 'LEADERBOARD_PRIOR_REVIEWS', 10)
+    prior_rating = Decimal(str(getattr(settings, 'LEADERBOARD_PRIOR_RATING', 3.5)))
+    score = (prior_reviews * prior_rating + rating_sum) / (prior_reviews + review_count)
+    return score.quantize(SCORE_PLACES)
+
+
+def _entries(LeaderboardEntry, reviews, cities):
+    """
+    Unsaved entries for review totals grouped by freelancer and category.
+    cities maps freelancer ids to their city.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    rows = reviews.order_by().values(
+        'freelancer_id', category=F('booking__service__category_id'),
+    ).annotate(count=Count('pk'), total=Sum('rating'))
+    for row in rows:
+        freelancer_id = row['freelancer_id']
+        city = normalize_city(cities.get(freelancer_id))
+        boards = [('overall', None, ''), ('category', row['category'], '')]
+        if city:
+            boards.append(('city', None, city))
+        for board in boards:
+            values = totals[(freelancer_id,) + board]
+            values[0] += row['count']
+            values[1] += row['total']
+
+    return [
+        LeaderboardEntry(
+            board=board, category_id=category_id, city=city, freelancer_id=freelancer_id,
+            review_count=count, rating_sum=rating_sum, score=bayesian_score(rating_sum, count),
+        )
+        for (freelancer_id, board, category_id, city), (count, rating_sum) in totals.items()
+    ]
+
+
+def refresh(freelancer_id):
+    """Rewrite the leaderboard rows of one freelancer from their active reviews"""
+    from reviews.models import Review
+    from .models import LeaderboardEntry, User
+
+    city = User.objects.filter(pk=freelancer_id).values_list('city', flat=True).first()
+    entries = _entries(
+        LeaderboardEntry,
+        Review.objects.filter(freelancer_id=freelancer_id, is_active=True),
+        {freelancer_id: city},
+    )
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(freelancer_id=freelancer_id).delete()
+        LeaderboardEntry.objects.bulk_create(entries)
+
+
+def rebuild():
+    """Recreate every leaderboard row, returns the number of rows"""
+    from reviews.models import Review
+    from .models import LeaderboardEntry, User
+
+    cities = dict(User.objects.filter(user_type='freelancer').values_list('pk', 'city'))
+    entries = _entries(LeaderboardEntry, Review.objects.filter(is_active=True), cities)
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
+
+
+def top(limit=5, category_id=None, city=None):
+    """
+    Highest scoring verified freelancers on the overall, category or city
+    board, as User objects with their profile and a leaderboard_score.
+    """
+    from .models import LeaderboardEntry
+
+    if category_id:
+        entries = LeaderboardEntry.objects.filter(board='category', category_id=category_id, city='')
+    elif city:
+        entries = LeaderboardEntry.objects.filter(board='city', category=None, city=normalize_city(city))
+    else:
+        entries = LeaderboardEntry.objects.filter(board='overall', category=None, city='')
+
+    entries = entries.filter(freelancer__is_verified=True).select_related(
+        'freelancer__freelancer_profile',
+    ).order_by('-score', '-review_count')[:limit]
+    freelancers = []
+    for entry in entries:
+        entry.freelancer.leaderboard_score = entry.score
+        freelancers.append(entry.freelancer)
+    return freelancers
@@ -0,0 +1,397 @@
+import json
+import random
+import re
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from accounts import geo
+from accounts.models import CustomerProfile, EmailOTP, FreelancerProfile, User
+from bookings.models import Booking, BookingHistory
+from payments.models import Payment
+from reviews.models import Review
+from services import documents, result_cache, search
+from services.models import Category, Service
+
+APP_NAMESPACES = ('accounts', 'services', 'bookings', 'payments', 'reviews')
+
+# Tables whose full scans are reported
+WATCHED_TABLES = (
+    'services_service', 'bookings_booking', 'payments_payment', 'reviews_review', 'accounts_emailotp',
+)
+
+ROLES = ('anonymous', 'customer', 'freelancer', 'admin')
+
+# Routes that would end the session the remaining requests rely on
+SKIP_ROUTES = {'accounts:logout'}
+
+# Extra query strings so filtered variants of a view are planned too
+ROUTE_QUERIES = {
+    'services:service_list': ['query=plumbing', 'sort=price_asc', 'pincode=682024&radius=25'],
+    'accounts:freelancer_list': ['city=kochi', 'pincode=682024&radius=25'],
+    'bookings:my_bookings': ['status=pending'],
+    'accounts:admin_user_list': ['user_type=customer'],
+    'accounts:admin_service_list': ['status=pending'],
+}
+
+# Sample object used for each URL parameter, pk depends on the app
+PARAM_TARGETS = {
+    'user_id': 'freelancer',
+    'freelancer_id': 'freelancer',
+    'service_id': 'service',
+    'category_id': 'category',
+    'booking_id': 'booking',
+    'payment_id': 'payment',
+    'review_id': 'review',
+}
+PK_TARGETS = {'accounts': 'freelancer', 'services': 'service', 'bookings': 'booking'}
+ROUTE_TARGETS = {
+    'services:category_services': {'pk': 'category'},
+    'payments:payment_page': {'booking_id': 'payable_booking'},
+    'reviews:create_review': {'booking_id': 'reviewable_booking'},
+}
+
+PINCODES = ['682024', '682030', '680001', '695001', '673001', '686001']
+STATUSES = ['pending', 'accepted', 'rejected', 'completed', 'cancelled']
+
+COLUMN_RE = re.compile(
+    r'(?:"(?P<table>\w+)"|(?P<alias>\w+))\."(?P<column>\w+)"\s*'
+    # A bare column is a boolean test, e.g. WHERE "services_service"."is_approved"
+    r'(?P<op>=|IN\b|IS\b|<=|>=|<|>|BETWEEN\b|(?=\)|AND\b|OR\b|$))',
+    re.IGNORECASE,
+)
+ORDER_RE = re.compile(r'(?:"(?P<table>\w+)"|(?P<alias>\w+))\."(?P<column>\w+)"')
+ALIAS_RE = re.compile(r'"(?P<table>\w+)" (?:AS )?(?P<alias>T\d+)\b')
+CLAUSE_END_RE = re.compile(r' (?:GROUP BY|ORDER BY|LIMIT|HAVING) ')
+# SQLite plan rows reading a whole table; a SCAN ... USING (COVERING) INDEX
+# walks an index in order (usually under a LIMIT) and is not reported
+FULL_SCAN_RE = re.compile(r'SCAN (?:TABLE )?(\w+)(?!.* USING (?:COVERING )?INDEX\b)')
+
+
+def fingerprint(sql):
+    """SQL with literals replaced, so reports diff cleanly between runs"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    return re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every app view against synthetic data (rolled back), EXPLAIN the queries they run '
+        'and report full table scans with suggested composite indexes as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1,
+                            help='Dataset multiplier (1 = 2000 bookings, 200 services)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Query plans are not supported on {connection.vendor}.')
+
+        # Cached search pages would hide the listing queries
+        result_cache.bump_generation()
+        with transaction.atomic():
+            sample, dataset = self._seed(max(options['scale'], 1))
+            report = self._run(sample)
+            report['dataset'] = dataset
+            transaction.set_rollback(True)
+        # Drop pages cached for the rolled back rows
+        result_cache.bump_generation()
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+            self.stdout.write(
+                f"{len(report['views'])} view requests, {len(report['proposals'])} proposed indexes "
+                f"written to {options['output']}"
+            )
+        else:
+            self.stdout.write(output)
+
+    def _seed(self, scale):
+        """Bulk create a dataset (no signals) and return the sample objects used in URLs"""
+        rng = random.Random(42)
+        now = timezone.now()
+
+        def located(pincode):
+            point = geo.lookup(pincode) or (None, None)
+            return {'pincode': pincode, 'latitude': point[0], 'longitude': point[1]}
+
+        admin = User.objects.create(username='advisor_admin', user_type='admin', is_staff=True,
+                                    is_superuser=True, is_verified=True)
+        freelancers = User.objects.bulk_create([
+            User(username=f'advisor_freelancer_{i}', user_type='freelancer', is_verified=i % 5 != 0,
+                 first_name='Advisor', last_name=str(i), city=rng.choice(['Kochi', 'Thrissur']),
+                 **located(rng.choice(PINCODES)))
+            for i in range(20 * scale)
+        ])
+        customers = User.objects.bulk_create([
+            User(username=f'advisor_customer_{i}', user_type='customer', is_verified=True,
+                 **located(rng.choice(PINCODES)))
+            for i in range(100 * scale)
+        ])
+        FreelancerProfile.objects.bulk_create([
+            FreelancerProfile(user=user, skills='pipes, wiring', rating=Decimal(rng.randint(30, 50)) / 10)
+            for user in freelancers
+        ])
+        CustomerProfile.objects.bulk_create([CustomerProfile(user=user) for user in customers])
+
+        categories = [Category.objects.create(name=f'Advisor {i}') for i in range(8)]
+        services = Service.objects.bulk_create([
+            Service(freelancer=freelancers[i % len(freelancers)], category=rng.choice(categories),
+                    title=f'Plumbing repair {i}', description='Leak and pipe repair',
+                    price=Decimal(rng.randint(200, 5000)), duration=60,
+                    is_approved=i % 7 != 0, is_active=i % 11 != 0)
+            for i in range(200 * scale)
+        ])
+
+        bookings = []
+        for i in range(2000 * scale):
+            service = services[(i + 1) % len(services)]
+            status = 'completed' if i < 40 and i % 4 == 0 else rng.choice(STATUSES)
+            bookings.append(Booking(
+                # The first bookings belong to the sample customer and freelancer
+                customer=customers[0] if i < 40 else rng.choice(customers),
+                freelancer=service.freelancer,
+                service=service,
+                booking_date=(now + timedelta(days=rng.randint(-90, 30))).date(),
+                booking_time=time(rng.randint(8, 19)),
+                status=status,
+                total_amount=service.price,
+                completed_at=now if status == 'completed' else None,
+            ))
+        bookings = Booking.objects.bulk_create(bookings)
+        BookingHistory.objects.bulk_create([
+            BookingHistory(booking=booking, status=booking.status) for booking in bookings
+        ])
+
+        payments = Payment.objects.bulk_create([
+            Payment(booking=booking, customer=booking.customer, amount=booking.total_amount,
+                    payment_method=rng.choice(['cash', 'gpay']),
+                    status='completed' if booking.status == 'completed' else 'pending')
+            for index, booking in enumerate(bookings) if index % 10 < 7
+        ])
+        # Leave the first completed booking unreviewed so create_review renders its form
+        reviews = Review.objects.bulk_create([
+            Review(booking=booking, customer=booking.customer, freelancer=booking.freelancer,
+                   rating=rng.randint(1, 5), comment='Good work')
+            for booking in bookings[1:] if booking.status == 'completed'
+        ])
+        EmailOTP.objects.bulk_create([
+            EmailOTP(email=f'advisor_{i}@example.com', otp='123456', is_verified=i % 3 == 0)
+            for i in range(500 * scale)
+        ])
+
+        documents.rebuild_documents()
+        if search.is_supported():
+            search.rebuild_index()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        customer = customers[0]
+        own_bookings = [booking for booking in bookings if booking.customer_id == customer.pk]
+        payable = next(
+            (payment.booking for payment in payments
+             if payment.customer_id == customer.pk and payment.status != 'completed'),
+            own_bookings[0],
+        )
+        sample = {
+            'admin': admin,
+            'customer': customer,
+            'freelancer': bookings[0].freelancer,
+            'service': bookings[0].service,
+            'category': categories[0],
+            'booking': bookings[0],
+            'payable_booking': payable,
+            'reviewable_booking': bookings[0],
+            'payment': next(payment for payment in payments if payment.booking_id == payable.pk),
+            'review': next(
+                (review for review in reviews
+                 if review.customer_id == customer.pk and review.freelancer_id == bookings[0].freelancer_id),
+                reviews[0] if reviews else None,
+            ),
+        }
+        dataset = {
+            'bookings': len(bookings),
+            'customers': len(customers),
+            'email_otps': 500 * scale,
+            'freelancers': len(freelancers),
+            'payments': len(payments),
+            'reviews': len(reviews),
+            'services': len(services),
+        }
+        return sample, dataset
+
+    def _routes(self):
+        """(route name, URL parameter names) for every named view of the apps"""
+        routes = []
+        for resolver in get_resolver().url_patterns:
+            if not isinstance(resolver, URLResolver) or resolver.namespace not in APP_NAMESPACES:
+                continue
+            for pattern in resolver.url_patterns:
+                if isinstance(pattern, URLPattern) and pattern.name:
+                    name = f'{resolver.namespace}:{pattern.name}'
+                    if name not in SKIP_ROUTES:
+                        routes.append((name, list(getattr(pattern.pattern, 'converters', {}))))
+        return routes
+
+    def _url(self, name, params, sample):
+        namespace = name.split(':')[0]
+        kwargs = {}
+        for param in params:
+            target = ROUTE_TARGETS.get(name, {}).get(param) or (
+                PK_TARGETS.get(namespace) if param == 'pk' else PARAM_TARGETS.get(param)
+            )
+            obj = sample.get(target)
+            if obj is None:
+                return None
+            kwargs[param] = obj.pk
+        return reverse(name, kwargs=kwargs)
+
+    def _run(self, sample):
+        clients = {}
+        for role in ROLES:
+            clients[role] = Client(HTTP_HOST='localhost', raise_request_exception=False)
+            if role != 'anonymous':
+                clients[role].force_login(sample[role])
+
+        views = []
+        proposals = {}
+        for name, params in self._routes():
+            url = self._url(name, params, sample)
+            if url is None:
+                continue
+            for query in [''] + ROUTE_QUERIES.get(name, []):
+                for role in ROLES:
+                    with CaptureQueriesContext(connection) as captured:
+                        response = clients[role].get(f'{url}?{query}' if query else url)
+                    view = name + (f'?{query}' if query else '')
+                    scans = []
+                    for sql in {entry['sql'] for entry in captured.captured_queries}:
+                        for table, detail in self._full_scans(sql):
+                            scans.append({'table': table, 'plan': detail, 'sql': fingerprint(sql)})
+                            self._propose(proposals, table, sql, view)
+                    views.append({
+                        'view': view,
+                        'role': role,
+                        'status': response.status_code,
+                        'queries': len(captured.captured_queries),
+                        'full_scans': sorted(scans, key=lambda scan: (scan['table'], scan['sql'])),
+                    })
+
+        return {
+            'database': connection.vendor,
+            'views': sorted(views, key=lambda view: (view['view'], view['role'])),
+            'proposals': self._finish_proposals(proposals),
+        }
+
+    def _full_scans(self, sql):
+        """(table, plan detail) for each scan of a watched table in the query's plan"""
+        if not sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            return []
+        aliases = {match['alias']: match['table'] for match in ALIAS_RE.finditer(sql)}
+        scans = []
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    match = FULL_SCAN_RE.match(detail)
+                    if match:
+                        table = aliases.get(match.group(1), match.group(1))
+                        if table in WATCHED_TABLES:
+                            scans.append((table, detail))
+            else:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                nodes = [plan[0]['Plan']]
+                while nodes:
+                    node = nodes.pop()
+                    nodes.extend(node.get('Plans', []))
+                    if node['Node Type'] == 'Seq Scan' and node['Relation Name'] in WATCHED_TABLES:
+                        detail = f"Seq Scan on {node['Relation Name']}"
+                        if node.get('Filter'):
+                            detail += f" Filter: {node['Filter']}"
+                        scans.append((node['Relation Name'], detail))
+        return scans
+
+    def _propose(self, proposals, table, sql, view):
+        """
+        Suggest an index for a scanned table: equality columns first, then
+        the sort columns, then one range column. Scans without any filter or
+        sort on the table get no proposal (they need a LIMIT, not an index).
+        """
+        aliases = {match['alias']: match['table'] for match in ALIAS_RE.finditer(sql)}
+
+        def on_table(match):
+            return (match['table'] or aliases.get(match['alias'])) == table
+
+        where, order = '', ''
+        if ' WHERE ' in sql:
+            where = sql.split(' WHERE ', 1)[1]
+            end = CLAUSE_END_RE.search(where)
+            where = where[:end.start()] if end else where
+        if ' ORDER BY ' in sql:
+            order = sql.rsplit(' ORDER BY ', 1)[1]
+
+        equality, ranges, sort = [], [], []
+        for match in COLUMN_RE.finditer(where):
+            if on_table(match):
+                bucket = equality if match['op'].upper() in ('', '=', 'IN', 'IS') else ranges
+                bucket.append(match['column'])
+        for match in ORDER_RE.finditer(order):
+            if on_table(match):
+                sort.append(match['column'])
+
+        columns = []
+        for column in equality + sort + ranges[:1]:
+            if column not in columns:
+                columns.append(column)
+        if not columns:
+            return
+
+        entry = proposals.setdefault((table, tuple(columns)), {'queries': set(), 'views': set()})
+        entry['queries'].add(fingerprint(sql))
+        entry['views'].add(view)
+
+    def _finish_proposals(self, proposals):
+        models = {model._meta.db_table: model for model in apps.get_models()}
+        with connection.cursor() as cursor:
+            existing = {
+                table: [
+                    (name, info['columns']) for name, info in
+                    connection.introspection.get_constraints(cursor, table).items() if info['index']
+                ]
+                for table in {table for table, _ in proposals}
+            }
+
+        results = []
+        for (table, columns), entry in proposals.items():
+            model = models[table]
+            fields = {field.column: field.name for field in model._meta.concrete_fields}
+            field_names = [fields.get(column, column) for column in columns]
+            index_name = f"{table}_{'_'.join(columns)}"[:26] + '_idx'
+            # An index leading with the same columns serves the query in either direction
+            if any([column.lstrip('-') for column in indexed[:len(columns)]] == list(columns)
+                   for _, indexed in existing[table]):
+                continue
+            results.append({
+                'table': table,
+                'model': model._meta.label,
+                'columns': list(columns),
+                'index': f"models.Index(fields={field_names!r}, name={index_name!r})",
+                'queries': sorted(entry['queries']),
+                'views': sorted(entry['views']),
+            })
+        return sorted(results, key=lambda result: (-len(result['views']), result['table'], result['columns']))
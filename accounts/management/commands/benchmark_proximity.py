@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts import geo
+from accounts.models import User
+
+# Rough bounding box of Kerala
+LAT_RANGE = (8.2, 12.8)
+LNG_RANGE = (74.8, 77.4)
+
+
+class Command(BaseCommand):
+    help = 'Time indexed pincode radius lookups against a full-scan distance filter (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Freelancer counts to benchmark')
+        parser.add_argument('--pincode', default='682030', help='Search centre')
+        parser.add_argument('--radius', type=int, default=10, help='Search radius in km')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per lookup, the median is reported')
+
+    def handle(self, *args, **options):
+        point = geo.lookup(options['pincode'])
+        if point is None:
+            self.stdout.write(self.style.ERROR(f"Unknown pincode {options['pincode']}"))
+            return
+
+        with transaction.atomic():
+            self._run(point, sorted(options['sizes']), options['radius'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def _run(self, point, sizes, radius, repeat):
+        rng = random.Random(42)
+        latitude, longitude = point
+        base = User.objects.filter(user_type='freelancer')
+
+        self.stdout.write(f"{'freelancers':>12} {'matches':>8} {'indexed ms':>11} {'scan ms':>9}")
+        created = 0
+        for size in sizes:
+            batch = []
+            while created < size:
+                batch.append(User(
+                    username=f'benchmark_{created}',
+                    user_type='freelancer',
+                    latitude=rng.uniform(*LAT_RANGE),
+                    longitude=rng.uniform(*LNG_RANGE),
+                ))
+                created += 1
+                if len(batch) == 5000:
+                    User.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                User.objects.bulk_create(batch)
+
+            indexed = lambda: list(geo.within_radius(base, latitude, longitude, radius).values_list('pk', flat=True))
+            scan = lambda: list(base.annotate(
+                distance_km=geo.distance_expression(latitude, longitude),
+            ).filter(distance_km__lte=radius).values_list('pk', flat=True))
+
+            matches = len(indexed())
+            self.stdout.write(
+                f'{size:>12} {matches:>8} {self._time(repeat, indexed):>11.2f} {self._time(repeat, scan):>9.2f}'
+            )
+
+        plan = geo.within_radius(base, latitude, longitude, radius).explain()
+        self.stdout.write(f'\nIndexed query plan:\n{plan}')
+
+    def _time(self, repeat, func):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
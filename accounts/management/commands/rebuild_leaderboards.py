@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from accounts import leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Recreate the freelancer leaderboards from the reviews table'
+
+    def handle(self, *args, **options):
+        rows = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} leaderboard row(s).'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from accounts import platform_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount the platform totals from the source tables and report drift in the PlatformStats counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Replace the counters with the recount when they drifted')
+
+    def handle(self, *args, **options):
+        drift = platform_stats.reconcile(fix=options['fix'])
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Platform stats match the source tables.'))
+            return
+
+        self.stdout.write(f"{'counter':<22} {'drift':>12}")
+        for name, amount in drift.items():
+            self.stdout.write(f'{name:<22} {amount:>+12}')
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Corrected {len(drift)} counter(s).'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} counter(s) drifted, run with --fix to correct them.'))
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts import analytics
+
+
+class Command(BaseCommand):
+    help = 'Roll the analytics day buckets up into week and month buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2,
+                            help='Roll up the weeks and months overlapping this many recent days')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recreate every bucket from the bookings, payments and users tables')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rows = analytics.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt analytics from {rows} day bucket(s).'))
+            return
+
+        end = timezone.localdate()
+        start = end - timedelta(days=max(options['days'], 1) - 1)
+        for granularity in ('week', 'month'):
+            rows = analytics.rollup(granularity, start, end)
+            self.stdout.write(f'{granularity}: {rows} bucket(s) from {start} to {end}')
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from freelancer_platform import scheduler
+
+
+class Command(BaseCommand):
+    help = 'Run the periodic jobs registered by the apps; safe to start on every replica'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Run the due jobs once and exit')
+        parser.add_argument('--poll', type=float, default=None,
+                            help='Seconds between looking for due jobs (default SCHEDULER_POLL_SECONDS)')
+
+    def handle(self, *args, **options):
+        poll = options['poll'] or getattr(settings, 'SCHEDULER_POLL_SECONDS', 30)
+        owner = scheduler.owner_id()
+        self.stdout.write(f"Scheduler {owner} running {len(scheduler.JOBS)} job(s): {', '.join(scheduler.JOBS)}")
+
+        while True:
+            # Drop connections that timed out while sleeping
+            close_old_connections()
+            for name, succeeded, duration in scheduler.run_pending(owner):
+                if succeeded:
+                    self.stdout.write(f'{name} finished in {duration:.2f}s')
+                else:
+                    self.stderr.write(self.style.ERROR(f'{name} failed after {duration:.2f}s'))
+            if options['once']:
+                return
+            try:
+                time.sleep(poll)
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:29
+
+import csv
+from pathlib import Path
+
+from django.db import migrations, models
+
+# Copy of accounts.geo.lookup as of this migration
+PINCODE_FILE = Path(__file__).resolve().parent.parent / 'data' / 'pincodes.csv'
+
+
+def load_pincodes():
+    with open(PINCODE_FILE, newline='', encoding='utf-8') as handle:
+        return {
+            row['pincode']: (float(row['latitude']), float(row['longitude']))
+            for row in csv.DictReader(handle)
+        }
+
+
+def lookup(table, pincode):
+    pincode = (pincode or '').strip().replace(' ', '')
+    if not pincode.isdigit():
+        return None
+    return table.get(pincode) or table.get(pincode[:3])
+
+
+def set_coordinates(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    table = load_pincodes()
+    for user in User.objects.exclude(pincode='').only('pk', 'pincode').iterator():
+        point = lookup(table, user.pincode)
+        if point:
+            User.objects.filter(pk=user.pk).update(latitude=point[0], longitude=point[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_emailotp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, help_text='Derived from pincode', null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['latitude', 'longitude'], name='accounts_user_location_idx'),
+        ),
+        migrations.RunPython(set_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:39
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+# Copy of accounts.platform_stats.compute as of this migration
+USER_TYPES = ('admin', 'customer', 'freelancer')
+BOOKING_STATUSES = ('pending', 'accepted', 'rejected', 'completed', 'cancelled')
+
+
+def backfill_stats(apps, schema_editor):
+    PlatformStats = apps.get_model('accounts', 'PlatformStats')
+    User = apps.get_model('accounts', 'User')
+    Service = apps.get_model('services', 'Service')
+    Booking = apps.get_model('bookings', 'Booking')
+    Payment = apps.get_model('payments', 'Payment')
+
+    values = User.objects.aggregate(
+        verified_freelancers=Count('pk', filter=Q(user_type='freelancer', is_verified=True)),
+        **{f'{user_type}_users': Count('pk', filter=Q(user_type=user_type)) for user_type in USER_TYPES}
+    )
+    values.update(Service.objects.aggregate(
+        approved_services=Count('pk', filter=Q(is_approved=True)),
+        pending_services=Count('pk', filter=Q(is_approved=False)),
+    ))
+    values.update(Booking.objects.aggregate(
+        **{f'{status}_bookings': Count('pk', filter=Q(status=status)) for status in BOOKING_STATUSES}
+    ))
+    values.update(Payment.objects.filter(status='completed').aggregate(
+        completed_payments=Count('pk'), revenue=Sum('amount'),
+    ))
+    values['revenue'] = values['revenue'] or Decimal('0.00')
+    PlatformStats.objects.create(shard=0, **values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_location'),
+        ('bookings', '0001_initial'),
+        ('payments', '0002_payment_payment_details_alter_payment_payment_method_and_more'),
+        ('services', '0006_category_price_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(unique=True)),
+                ('admin_users', models.IntegerField(default=0)),
+                ('customer_users', models.IntegerField(default=0)),
+                ('freelancer_users', models.IntegerField(default=0)),
+                ('verified_freelancers', models.IntegerField(default=0)),
+                ('approved_services', models.IntegerField(default=0)),
+                ('pending_services', models.IntegerField(default=0)),
+                ('pending_bookings', models.IntegerField(default=0)),
+                ('accepted_bookings', models.IntegerField(default=0)),
+                ('rejected_bookings', models.IntegerField(default=0)),
+                ('completed_bookings', models.IntegerField(default=0)),
+                ('cancelled_bookings', models.IntegerField(default=0)),
+                ('completed_payments', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Sum of completed payment amounts', max_digits=14)),
+            ],
+            options={
+                'verbose_name_plural': 'Platform stats',
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
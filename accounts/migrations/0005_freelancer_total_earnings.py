@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:40
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_earnings(apps, schema_editor):
+    FreelancerProfile = apps.get_model('accounts', 'FreelancerProfile')
+    Payment = apps.get_model('payments', 'Payment')
+    earnings = Payment.objects.filter(status='completed').values('booking__freelancer_id').annotate(
+        total=Sum('amount')
+    )
+    for row in earnings:
+        FreelancerProfile.objects.filter(user_id=row['booking__freelancer_id']).update(total_earnings=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_platform_stats'),
+        ('payments', '0002_payment_payment_details_alter_payment_payment_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='freelancerprofile',
+            name='total_earnings',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Completed payments received, kept by Payment and Refund', max_digits=12),
+        ),
+        migrations.RunPython(backfill_earnings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0006_category_price_histogram'),
+        ('accounts', '0005_freelancer_total_earnings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('metric', models.CharField(choices=[('bookings', 'Bookings'), ('gmv', 'Gross merchandise value'), ('new_users', 'New users')], max_length=20)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'metric', 'period_start'], name='accounts_analytics_period_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:45
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+import django.db.models.deletion
+
+# Copy of accounts.leaderboard.rebuild as of this migration
+SCORE_PLACES = Decimal('0.0001')
+
+
+def bayesian_score(rating_sum, review_count):
+    prior_reviews = getattr(settings, 'LEADERBOARD_PRIOR_REVIEWS', 10)
+    prior_rating = Decimal(str(getattr(settings, 'LEADERBOARD_PRIOR_RATING', 3.5)))
+    score = (prior_reviews * prior_rating + rating_sum) / (prior_reviews + review_count)
+    return score.quantize(SCORE_PLACES)
+
+
+def build_leaderboards(apps, schema_editor):
+    LeaderboardEntry = apps.get_model('accounts', 'LeaderboardEntry')
+    Review = apps.get_model('reviews', 'Review')
+    User = apps.get_model('accounts', 'User')
+
+    cities = dict(User.objects.filter(user_type='freelancer').values_list('pk', 'city'))
+    totals = defaultdict(lambda: [0, 0])
+    rows = Review.objects.filter(is_active=True).order_by().values(
+        'freelancer_id', category=F('booking__service__category_id'),
+    ).annotate(count=Count('pk'), total=Sum('rating'))
+    for row in rows:
+        freelancer_id = row['freelancer_id']
+        city = (cities.get(freelancer_id) or '').strip().title()
+        boards = [('overall', None, ''), ('category', row['category'], '')]
+        if city:
+            boards.append(('city', None, city))
+        for board in boards:
+            values = totals[(freelancer_id,) + board]
+            values[0] += row['count']
+            values[1] += row['total']
+
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(
+            board=board, category_id=category_id, city=city, freelancer_id=freelancer_id,
+            review_count=count, rating_sum=rating_sum, score=bayesian_score(rating_sum, count),
+        )
+        for (freelancer_id, board, category_id, city), (count, rating_sum) in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0006_category_price_histogram'),
+        ('reviews', '0001_initial'),
+        ('accounts', '0006_analytics_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('overall', 'Overall'), ('category', 'Category'), ('city', 'City')], max_length=10)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('score', models.DecimalField(decimal_places=4, default=0, max_digits=6)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.category')),
+                ('freelancer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'category', 'city', '-score', '-review_count'], name='accounts_leaderboard_top_idx')],
+            },
+        ),
+        migrations.RunPython(build_leaderboards, migrations.RunPython.noop),
+    ]
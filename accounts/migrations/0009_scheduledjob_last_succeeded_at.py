@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_scheduled_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledjob',
+            name='last_succeeded_at',
+            field=models.DateTimeField(blank=True, help_text='Start of the latest successful run', null=True),
+        ),
+    ]
@@ -19,6 +19,8 @@ class User(AbstractUser):
     city = models.CharField(max_length=100, blank=True)
     area = models.CharField(max_length=100, blank=True)
     pincode = models.CharField(max_length=10, blank=True)
+    latitude = models.FloatField(null=True, blank=True, editable=False, help_text="Derived from pincode")
+    longitude = models.FloatField(null=True, blank=True, editable=False)
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
     is_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -29,6 +31,9 @@ class User(AbstractUser):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='accounts_user_location_idx'),
+        ]
 
 
 class FreelancerProfile(models.Model):
@@ -51,6 +56,8 @@ class FreelancerProfile(models.Model):
     total_reviews = models.IntegerField(default=0)
     total_bookings = models.IntegerField(default=0)
     completed_bookings = models.IntegerField(default=0)
+    total_earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                         help_text="Completed payments received, kept by Payment and Refund")
     
     def __str__(self):
         return f"{self.user.get_full_name()} - Freelancer"
@@ -63,6 +70,9 @@ class FreelancerProfile(models.Model):
             self.rating = reviews.aggregate(models.Avg('rating'))['rating__avg']
             self.total_reviews = reviews.count()
             self.save()
+        
+        from . import leaderboard
+        leaderboard.refresh(self.user_id)
 
 
 class CustomerProfile(models.Model):
@@ -117,3 +127,129 @@ class EmailOTP(models.Model):
         self.is_verified = True
         self.save()
         return True, "OTP verified successfully"
+
+
+class PlatformStats(models.Model):
+    """
+    Platform-wide totals kept up to date by accounts/platform_stats.py.
+    Increments go to one of several shard rows to spread write contention;
+    the totals are the sum over all shards.
+    """
+    shard = models.PositiveSmallIntegerField(unique=True)
+    admin_users = models.IntegerField(default=0)
+    customer_users = models.IntegerField(default=0)
+    freelancer_users = models.IntegerField(default=0)
+    verified_freelancers = models.IntegerField(default=0)
+    approved_services = models.IntegerField(default=0)
+    pending_services = models.IntegerField(default=0)
+    pending_bookings = models.IntegerField(default=0)
+    accepted_bookings = models.IntegerField(default=0)
+    rejected_bookings = models.IntegerField(default=0)
+    completed_bookings = models.IntegerField(default=0)
+    cancelled_bookings = models.IntegerField(default=0)
+    completed_payments = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0,
+                                  help_text="Sum of completed payment amounts")
+    
+    class Meta:
+        verbose_name_plural = 'Platform stats'
+    
+    def __str__(self):
+        return f"Platform stats shard {self.shard}"
+
+
+class AnalyticsBucket(models.Model):
+    """
+    Pre-aggregated metric value for one time bucket, category and city.
+    Day buckets are incremented as events happen; week and month buckets are
+    rolled up from day buckets by accounts/analytics.py. Readers always sum
+    matching rows, so duplicate rows for the same key are harmless.
+    """
+    GRANULARITY_CHOICES = (
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    )
+    METRIC_CHOICES = (
+        ('bookings', 'Bookings'),
+        ('gmv', 'Gross merchandise value'),
+        ('new_users', 'New users'),
+    )
+    
+    granularity = models.CharField(max_length=5, choices=GRANULARITY_CHOICES)
+    period_start = models.DateField()
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    category = models.ForeignKey('services.Category', on_delete=models.CASCADE, null=True, blank=True,
+                                 related_name='+')
+    city = models.CharField(max_length=100, blank=True)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    def __str__(self):
+        return f"{self.metric} {self.granularity} {self.period_start}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['granularity', 'metric', 'period_start'], name='accounts_analytics_period_idx'),
+        ]
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Bayesian-average rating of a freelancer on one leaderboard: overall, per
+    category of the reviewed services, or in the freelancer's city. Kept by
+    accounts/leaderboard.py whenever FreelancerProfile.update_rating runs.
+    """
+    BOARD_CHOICES = (
+        ('overall', 'Overall'),
+        ('category', 'Category'),
+        ('city', 'City'),
+    )
+    
+    board = models.CharField(max_length=10, choices=BOARD_CHOICES)
+    category = models.ForeignKey('services.Category', on_delete=models.CASCADE, null=True, blank=True,
+                                 related_name='+')
+    city = models.CharField(max_length=100, blank=True)
+    freelancer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    score = models.DecimalField(max_digits=6, decimal_places=4, default=0)
+    
+    def __str__(self):
+        return f"{self.freelancer.username} on {self.board} leaderboard - {self.score}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'category', 'city', '-score', '-review_count'],
+                         name='accounts_leaderboard_top_idx'),
+        ]
+
+
+class ScheduledJob(models.Model):
+    """
+    Lease and run statistics of one periodic job of freelancer_platform/scheduler.py.
+    A scheduler process runs a due job only after taking its lease with a
+    conditional update, so each run happens on one replica.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    next_run_at = models.DateTimeField(default=timezone.now)
+    lease_owner = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    last_started_at = models.DateTimeField(null=True, blank=True)
+    last_succeeded_at = models.DateTimeField(null=True, blank=True, help_text="Start of the latest successful run")
+    last_duration = models.FloatField(null=True, blank=True, help_text="Seconds")
+    max_duration = models.FloatField(default=0, help_text="Seconds")
+    total_duration = models.FloatField(default=0, help_text="Seconds over all runs")
+    run_count = models.IntegerField(default=0)
+    failure_count = models.IntegerField(default=0)
+    last_failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    def __str__(self):
+        return self.name
+    
+    @property
+    def average_duration(self):
+        return self.total_duration / self.run_count if self.run_count else None
+    
+    class Meta:
+        ordering = ['name']
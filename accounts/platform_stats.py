@@ -0,0 +1,149 @@
+"""
+Incrementally maintained platform totals.
+
+Every User, Service, Booking and Payment contributes to a few PlatformStats
+counters depending on its state (user type and verification, approval,
+booking status, completed payment amount). The handlers in accounts/signals.py
+remember each instance's state when it is loaded and, when it is saved or
+deleted, add the difference between its old and new contributions to one
+randomly chosen shard row with F() expressions.
+
+Queryset update() and bulk operations bypass the signals, so reconcile()
+recomputes the totals from the source tables and reports (and optionally
+repairs) any drift.
+"""
+import random
+from decimal import Decimal
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+SHARDS = 8
+
+USER_TYPES = ('admin', 'customer', 'freelancer')
+BOOKING_STATUSES = ('pending', 'accepted', 'rejected', 'completed', 'cancelled')
+
+COUNTERS = (
+    [f'{user_type}_users' for user_type in USER_TYPES] +
+    ['verified_freelancers', 'approved_services', 'pending_services'] +
+    [f'{status}_bookings' for status in BOOKING_STATUSES] +
+    ['completed_payments', 'revenue']
+)
+
+# Model fields whose values decide an instance's contributions
+TRACKED_FIELDS = {
+    'accounts.User': ('user_type', 'is_verified'),
+    'services.Service': ('is_approved',),
+    'bookings.Booking': ('status',),
+    'payments.Payment': ('status', 'amount'),
+}
+
+
+def _contributions(label, state):
+    """Counter increments an instance with the given tracked field values adds"""
+    if state is None:
+        return {}
+    if label == 'accounts.User':
+        user_type, is_verified = state
+        counters = {f'{user_type}_users': 1}
+        if user_type == 'freelancer' and is_verified:
+            counters['verified_freelancers'] = 1
+        return counters
+    if label == 'services.Service':
+        return {'approved_services' if state[0] else 'pending_services': 1}
+    if label == 'bookings.Booking':
+        return {f'{state[0]}_bookings': 1}
+    status, amount = state
+    if status == 'completed':
+        return {'completed_payments': 1, 'revenue': Decimal(amount or 0)}
+    return {}
+
+
+def snapshot(instance, fallback=None):
+    """
+    Tracked field values of an instance. Deferred fields are taken from
+    fallback, without it the result is None.
+    """
+    values = instance.__dict__
+    fields = TRACKED_FIELDS[instance._meta.label]
+    if any(name not in values for name in fields):
+        if fallback is None:
+            return None
+        return tuple(values.get(name, old) for name, old in zip(fields, fallback))
+    return tuple(values[name] for name in fields)
+
+
+def difference(label, old_state, new_state):
+    """Counter changes for an instance moving from old_state to new_state"""
+    changes = _contributions(label, new_state)
+    for name, amount in _contributions(label, old_state).items():
+        changes[name] = changes.get(name, 0) - amount
+    return {name: amount for name, amount in changes.items() if amount and name in COUNTERS}
+
+
+def apply(changes):
+    """Add changes ({counter: amount}) to a random shard"""
+    from .models import PlatformStats
+
+    if not changes:
+        return
+    shard = random.randrange(SHARDS)
+    expressions = {name: F(name) + amount for name, amount in changes.items()}
+    if not PlatformStats.objects.filter(shard=shard).update(**expressions):
+        PlatformStats.objects.get_or_create(shard=shard)
+        PlatformStats.objects.filter(shard=shard).update(**expressions)
+
+
+def totals():
+    """Current counter values summed over the shards"""
+    from .models import PlatformStats
+
+    sums = PlatformStats.objects.aggregate(**{name: Sum(name) for name in COUNTERS})
+    return {name: sums[name] or (Decimal('0.00') if name == 'revenue' else 0) for name in COUNTERS}
+
+
+def compute():
+    """Counter values recomputed from the source tables"""
+    User = django_apps.get_model('accounts', 'User')
+    Service = django_apps.get_model('services', 'Service')
+    Booking = django_apps.get_model('bookings', 'Booking')
+    Payment = django_apps.get_model('payments', 'Payment')
+
+    values = User.objects.aggregate(
+        verified_freelancers=Count('pk', filter=Q(user_type='freelancer', is_verified=True)),
+        **{f'{user_type}_users': Count('pk', filter=Q(user_type=user_type)) for user_type in USER_TYPES}
+    )
+    values.update(Service.objects.aggregate(
+        approved_services=Count('pk', filter=Q(is_approved=True)),
+        pending_services=Count('pk', filter=Q(is_approved=False)),
+    ))
+    values.update(Booking.objects.aggregate(
+        **{f'{status}_bookings': Count('pk', filter=Q(status=status)) for status in BOOKING_STATUSES}
+    ))
+    values.update(Payment.objects.filter(status='completed').aggregate(
+        completed_payments=Count('pk'), revenue=Sum('amount'),
+    ))
+    values['revenue'] = values['revenue'] or Decimal('0.00')
+    return values
+
+
+def reconcile(fix=False):
+    """
+    Compare the counters with a full recount and return the drift
+    ({counter: recorded - actual}). With fix=True the shards are replaced by
+    the recount.
+    """
+    from .models import PlatformStats
+
+    with transaction.atomic():
+        if fix:
+            # Hold concurrent increments back while the shards are rewritten
+            list(PlatformStats.objects.select_for_update())
+        actual = compute()
+        recorded = totals()
+        drift = {name: recorded[name] - actual[name] for name in COUNTERS if recorded[name] != actual[name]}
+        if fix and drift:
+            PlatformStats.objects.all().delete()
+            PlatformStats.objects.create(shard=0, **actual)
+    return drift
@@ -1,6 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
+from bookings.models import Booking
+from payments.models import Payment
+from services.models import Service
 from .models import User, FreelancerProfile, CustomerProfile
+from . import analytics, geo, platform_stats
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -10,3 +14,63 @@ def create_user_profile(sender, instance, created, **kwargs):
             FreelancerProfile.objects.create(user=instance)
         elif instance.user_type == 'customer':
             CustomerProfile.objects.create(user=instance)
+
+
+@receiver(pre_save, sender=User)
+def set_user_coordinates(sender, instance, update_fields=None, **kwargs):
+    """Resolve the pincode to centroid coordinates for proximity search"""
+    if update_fields is not None and 'pincode' not in update_fields:
+        return
+    point = geo.lookup(instance.pincode)
+    instance.latitude, instance.longitude = point if point else (None, None)
+
+
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=Service)
+@receiver(post_init, sender=Booking)
+@receiver(post_init, sender=Payment)
+def remember_counted_state(sender, instance, **kwargs):
+    """Note the state an instance was loaded with, platform counters move from it"""
+    instance._platform_stats_state = platform_stats.snapshot(instance)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Service)
+@receiver(pre_save, sender=Booking)
+@receiver(pre_save, sender=Payment)
+def load_counted_state(sender, instance, **kwargs):
+    """Instances loaded with deferred fields read their stored state before saving"""
+    if not instance._state.adding and instance._platform_stats_state is None:
+        fields = platform_stats.TRACKED_FIELDS[sender._meta.label]
+        instance._platform_stats_state = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Payment)
+def count_saved(sender, instance, created, **kwargs):
+    """Move the platform counters from the stored state to the saved one"""
+    old_state = None if created else instance._platform_stats_state
+    new_state = platform_stats.snapshot(instance, old_state)
+    platform_stats.apply(platform_stats.difference(sender._meta.label, old_state, new_state))
+    instance._platform_stats_state = new_state
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=Payment)
+def count_deleted(sender, instance, **kwargs):
+    platform_stats.apply(platform_stats.difference(sender._meta.label, instance._platform_stats_state, None))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=User)
+def count_analytics_event(sender, instance, created, **kwargs):
+    """New bookings and sign-ups feed the admin analytics day buckets"""
+    if created:
+        if sender is Booking:
+            analytics.record_booking(instance)
+        else:
+            analytics.record_user(instance)
@@ -0,0 +1,212 @@
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import Booking
+from freelancer_platform import scheduler
+from freelancer_platform.testing import test_settings
+from services.models import Category, Service
+
+from . import analytics, jobs
+from .admin_views import ADMIN_DASHBOARD_CACHE_KEY
+from .models import AnalyticsBucket, ScheduledJob, User
+
+
+@test_settings
+class AdminDashboardQueryTests(TestCase):
+    """The admin dashboard reads the platform counters, not the tables"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', user_type='admin')
+        cls.category = Category.objects.create(name='Plumbing')
+        cls.add_users(5)
+
+    @classmethod
+    def add_users(cls, count):
+        offset = User.objects.count()
+        for index in range(offset, offset + count):
+            freelancer = User.objects.create_user(f'freelancer{index}', password='x',
+                                                  user_type='freelancer', is_verified=True)
+            User.objects.create_user(f'customer{index}', password='x', user_type='customer')
+            Service.objects.create(freelancer=freelancer, category=cls.category, title=f'Repair {index}',
+                                   description='Pipes', price=Decimal('500'), duration=60, is_approved=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_cold_dashboard_query_budget(self):
+        # Session, user, counters, recent customers, recent freelancers, leaderboard
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('accounts:admin_dash'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_freelancers'], 5)
+
+    def test_cold_budget_does_not_grow_with_data(self):
+        self.add_users(20)
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('accounts:admin_dash'))
+        self.assertEqual(response.context['total_freelancers'], 25)
+        self.assertEqual(response.context['total_services'], 25)
+
+    def test_cached_dashboard_query_budget(self):
+        self.client.get(reverse('accounts:admin_dash'))
+        self.assertIsNotNone(cache.get(ADMIN_DASHBOARD_CACHE_KEY))
+        # Session and user only
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('accounts:admin_dash'))
+        self.assertEqual(response.status_code, 200)
+
+
+@test_settings
+class FreelancerDashboardQueryTests(TestCase):
+    """The freelancer dashboard fetches open bookings once, with their relations"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.customer = User.objects.create_user('customer', password='x', user_type='customer')
+        cls.service = Service.objects.create(
+            freelancer=cls.freelancer, category=Category.objects.create(name='Plumbing'),
+            title='Leak repair', description='Pipes', price=Decimal('500'), duration=60, is_approved=True,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.freelancer)
+
+    def add_bookings(self, count, status):
+        start = timezone.localdate() + timedelta(days=1 + Booking.objects.count())
+        for day in range(count):
+            Booking.objects.create(
+                customer=self.customer, freelancer=self.freelancer, service=self.service,
+                booking_date=start + timedelta(days=day), booking_time=time(10),
+                status=status, total_amount=self.service.price,
+            )
+
+    def assertDashboardQueries(self, num):
+        with self.assertNumQueries(num):
+            response = self.client.get(reverse('accounts:freelancer_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_constant_as_open_bookings_grow(self):
+        # Session, user, profile, status counts, open bookings, month earnings, services
+        self.add_bookings(1, 'pending')
+        self.assertDashboardQueries(7)
+
+        self.add_bookings(10, 'pending')
+        self.add_bookings(10, 'accepted')
+        response = self.assertDashboardQueries(7)
+        self.assertEqual(len(response.context['pending_bookings']), 11)
+        self.assertEqual(len(response.context['accepted_bookings']), 10)
+        self.assertEqual(response.context['total_bookings'], 21)
+
+
+@test_settings
+class AnalyticsSeriesTests(TestCase):
+    """The analytics endpoint answers bad parameters with a 400 JSON error"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', user_type='admin')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_invalid_dates_are_rejected(self):
+        for params in ({'start': '2026-02-30'}, {'end': '2026-02-30'}, {'end': 'today'},
+                       {'start': '2026-03-02', 'end': '2026-03-01'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('accounts:admin_analytics'), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('start and end', response.json()['error'])
+
+    def test_valid_range(self):
+        response = self.client.get(reverse('accounts:admin_analytics'), {'start': '2026-02-01', 'end': '2026-02-28'})
+        self.assertEqual(response.status_code, 200)
+
+
+@test_settings
+class SchedulerTests(TestCase):
+    """A due job runs once across processes, and its lease and outcome are recorded"""
+
+    def setUp(self):
+        self.calls = []
+        self.job = scheduler.Job('tests.job', lambda: self.calls.append(1), timedelta(minutes=5),
+                                 timedelta(minutes=1))
+
+    def test_only_one_process_takes_the_lease(self):
+        self.assertTrue(scheduler.acquire(self.job, 'host-a'))
+        self.assertFalse(scheduler.acquire(self.job, 'host-b'))
+        self.assertEqual(ScheduledJob.objects.get(name='tests.job').lease_owner, 'host-a')
+
+    def test_expired_lease_is_taken_over(self):
+        now = timezone.now()
+        self.assertTrue(scheduler.acquire(self.job, 'host-a', now))
+        self.assertFalse(scheduler.acquire(self.job, 'host-b', now + timedelta(seconds=59)))
+        self.assertTrue(scheduler.acquire(self.job, 'host-b', now + timedelta(minutes=1)))
+        # The run that outlived its lease no longer records anything
+        scheduler.run(self.job, 'host-a')
+        job = ScheduledJob.objects.get(name='tests.job')
+        self.assertEqual((job.lease_owner, job.run_count), ('host-b', 0))
+
+    def test_successful_run_releases_and_reschedules(self):
+        scheduler.acquire(self.job, 'host-a')
+        started = ScheduledJob.objects.get(name='tests.job').last_started_at
+        succeeded, duration = scheduler.run(self.job, 'host-a')
+        self.assertTrue(succeeded)
+        self.assertEqual(self.calls, [1])
+        job = ScheduledJob.objects.get(name='tests.job')
+        self.assertEqual((job.lease_owner, job.lease_expires_at, job.run_count), ('', None, 1))
+        self.assertEqual(job.last_succeeded_at, started)
+        self.assertGreater(job.next_run_at, timezone.now() + timedelta(minutes=4))
+        self.assertFalse(scheduler.acquire(self.job, 'host-b'))
+
+    def test_failed_run_records_the_error(self):
+        job = self.job._replace(func=lambda: 1 / 0)
+        scheduler.acquire(job, 'host-a')
+        succeeded, duration = scheduler.run(job, 'host-a')
+        self.assertFalse(succeeded)
+        row = ScheduledJob.objects.get(name='tests.job')
+        self.assertEqual((row.failure_count, row.run_count), (1, 1))
+        self.assertIn('ZeroDivisionError', row.last_error)
+        self.assertIsNone(row.last_succeeded_at)
+
+
+@test_settings
+class RollupAnalyticsJobTests(TestCase):
+    """The rollup job catches up on every day since its last successful run"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.days = [self.today - timedelta(days=offset) for offset in (40, 20, 10, 0)]
+        for day in self.days:
+            analytics.record('bookings', timezone.make_aware(timezone.datetime.combine(day, time(12))))
+
+    def weeks(self):
+        return set(AnalyticsBucket.objects.filter(granularity='week', metric='bookings').values_list(
+            'period_start', flat=True))
+
+    def test_rolls_up_the_days_since_the_last_success(self):
+        ScheduledJob.objects.create(name=jobs.ROLLUP_ANALYTICS_JOB, last_succeeded_at=timezone.now() - timedelta(days=25))
+        jobs.rollup_analytics()
+        self.assertEqual(self.weeks(), {analytics.period_start(day, 'week') for day in self.days[1:]})
+
+    def test_recent_success_rolls_up_only_recent_days(self):
+        ScheduledJob.objects.create(name=jobs.ROLLUP_ANALYTICS_JOB, last_succeeded_at=timezone.now())
+        jobs.rollup_analytics()
+        self.assertEqual(self.weeks(), {analytics.period_start(self.today, 'week')})
+
+    def test_first_run_rebuilds_from_the_tables(self):
+        joined = timezone.now() - timedelta(days=60)
+        User.objects.create_user('customer', password='x', user_type='customer', date_joined=joined)
+        jobs.rollup_analytics()
+        self.assertTrue(AnalyticsBucket.objects.filter(
+            granularity='month', metric='new_users', period_start=timezone.localdate(joined).replace(day=1),
+        ).exists())
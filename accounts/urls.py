@@ -45,4 +45,10 @@ urlpatterns = [
     path('admin/categories/<int:category_id>/edit/', admin_views.edit_category, name='admin_edit_category'),
     path('admin/categories/<int:category_id>/delete/', admin_views.delete_category, name='admin_delete_category'),
     path('admin/categories/<int:category_id>/toggle-status/', admin_views.toggle_category_status, name='admin_toggle_category_status'),
+    
+    # Cache Monitoring URLs
+    path('admin/search-cache/', admin_views.search_cache_stats, name='admin_search_cache_stats'),
+    
+    # Analytics URLs
+    path('admin/analytics/', admin_views.analytics_series, name='admin_analytics'),
 ]
@@ -2,14 +2,33 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Sum, Avg, Q
+from django.conf import settings
+from django.db.models import Count, Avg, Q
 from django.http import JsonResponse
+from django.utils import timezone
 from .forms import UserRegistrationForm, UserLoginForm, UserProfileForm, FreelancerProfileForm, OTPVerificationForm
 from .models import User, FreelancerProfile, EmailOTP
 from .utils import send_otp_email, verify_otp
+from . import geo
 from bookings.models import Booking
-from payments.models import Payment, Refund
+from payments.models import Refund, FreelancerEarningsDaily
 from services.models import Service
+from freelancer_platform.pagination import KeysetPage, KeysetPaginator
+
+# Largest "within N km" radius accepted by location searches
+MAX_SEARCH_RADIUS_KM = 500
+
+BOOKING_PAGE_ORDERING = ('-created_at', '-id')
+
+CUSTOMER_DASHBOARD_TABS = (
+    ('all', 'Recent'),
+    ('pending', 'Pending'),
+    ('accepted', 'Accepted'),
+    ('completed', 'Completed'),
+)
+
+# Pages worth of newest bookings fetched at once to fill every tab
+CUSTOMER_DASHBOARD_FETCH_PAGES = 3
 
 def register(request):
     """User registration view with OTP verification"""
@@ -176,26 +195,33 @@ def freelancer_dashboard(request):
     profile = request.user.freelancer_profile
     my_services = Service.objects.filter(freelancer=request.user)
     
-    # Booking statistics
-    total_bookings = Booking.objects.filter(freelancer=request.user).count()
-    pending_bookings = Booking.objects.filter(freelancer=request.user, status='pending')
-    accepted_bookings = Booking.objects.filter(freelancer=request.user, status='accepted')
-    completed_bookings = Booking.objects.filter(freelancer=request.user, status='completed').count()
+    # Booking statistics, one grouped query
+    status_counts = dict(
+        Booking.objects.filter(freelancer=request.user).order_by()
+        .values_list('status').annotate(count=Count('pk'))
+    )
     
-    # Revenue
-    total_earnings = Payment.objects.filter(
-        booking__freelancer=request.user,
-        status='completed'
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
+    # Open bookings fetched once and split by status
+    pending_bookings = []
+    accepted_bookings = []
+    open_bookings = Booking.objects.filter(
+        freelancer=request.user, status__in=['pending', 'accepted']
+    ).select_related('service', 'customer')
+    for booking in open_bookings:
+        (pending_bookings if booking.status == 'pending' else accepted_bookings).append(booking)
     
     context = {
         'profile': profile,
         'my_services': my_services,
-        'total_bookings': total_bookings,
+        'total_bookings': sum(status_counts.values()),
         'pending_bookings': pending_bookings,
         'accepted_bookings': accepted_bookings,
-        'completed_bookings': completed_bookings,
-        'total_earnings': total_earnings,
+        'completed_bookings': status_counts.get('completed', 0),
+        # Rollups kept by Payment.mark_completed and Refund.process_refund
+        'total_earnings': profile.total_earnings,
+        'month_earnings': FreelancerEarningsDaily.summary(
+            request.user, start=timezone.localdate().replace(day=1)
+        )['net'],
     }
     
     return render(request, 'accounts/freelancer_dashboard.html', context)
@@ -208,17 +234,41 @@ def customer_dashboard(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    # Booking statistics
-    my_bookings = Booking.objects.filter(customer=request.user).select_related('service', 'freelancer')
-    pending_bookings = my_bookings.filter(status='pending')
-    accepted_bookings = my_bookings.filter(status='accepted')
-    completed_bookings = my_bookings.filter(status='completed')
+    per_page = getattr(settings, 'DASHBOARD_BOOKINGS_PER_PAGE', 10)
+    bookings = Booking.objects.filter(customer=request.user).select_related('service', 'freelancer', 'review')
+    
+    # Badge counts, one grouped query
+    status_counts = dict(
+        Booking.objects.filter(customer=request.user).order_by()
+        .values_list('status').annotate(count=Count('pk'))
+    )
+    status_counts['all'] = sum(status_counts.values())
+    
+    # The newest bookings fill the first page of every tab in one fetch
+    recent = list(bookings.order_by(*BOOKING_PAGE_ORDERING)[:per_page * CUSTOMER_DASHBOARD_FETCH_PAGES])
+    selected = request.GET.get('status')
+    
+    booking_tabs = []
+    for status, label in CUSTOMER_DASHBOARD_TABS:
+        rows = bookings if status == 'all' else bookings.filter(status=status)
+        paginator = KeysetPaginator(rows, ordering=BOOKING_PAGE_ORDERING, per_page=per_page)
+        count = status_counts.get(status, 0)
+        partition = [booking for booking in recent if status in ('all', booking.status)][:per_page]
+        
+        if status == selected and request.GET.get('cursor'):
+            page = paginator.page(request.GET['cursor'])
+        elif len(partition) < min(per_page, count):
+            # Older bookings of this status fell outside the shared fetch
+            page = paginator.page()
+        else:
+            next_cursor = paginator.cursor_for(partition[-1]) if count > len(partition) else None
+            page = KeysetPage(partition, next_cursor)
+        booking_tabs.append({'status': status, 'label': label, 'count': count, 'page': page})
     
     context = {
-        'my_bookings': my_bookings[:10],
-        'pending_bookings': pending_bookings,
-        'accepted_bookings': accepted_bookings,
-        'completed_bookings': completed_bookings,
+        'status_counts': status_counts,
+        'booking_tabs': booking_tabs,
+        'selected_status': selected if selected in dict(CUSTOMER_DASHBOARD_TABS) else 'all',
     }
     
     return render(request, 'accounts/customer_dashboard.html', context)
@@ -263,12 +313,21 @@ def freelancer_list(request):
     area = request.GET.get('area')
     pincode = request.GET.get('pincode')
     
+    radius = request.GET.get('radius')
+    
     if city:
         freelancers = freelancers.filter(city__icontains=city)
     if area:
         freelancers = freelancers.filter(area__icontains=area)
     if pincode:
-        freelancers = freelancers.filter(pincode=pincode)
+        nearby = None
+        if radius and radius.isdigit() and 0 < int(radius) <= MAX_SEARCH_RADIUS_KM:
+            nearby = geo.near_pincode(freelancers, pincode, int(radius))
+        if nearby is not None:
+            # Nearest first, bounding box narrowed through the location index
+            freelancers = nearby.order_by('distance_km', 'id')
+        else:
+            freelancers = freelancers.filter(pincode=pincode)
     
     context = {
         'freelancers': freelancers,
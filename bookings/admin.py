@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking, BookingHistory
+from .models import Booking, BookingHistory, WorkingHours, BlackoutDate
 
 class BookingHistoryInline(admin.TabularInline):
     model = BookingHistory
@@ -15,6 +15,11 @@ class BookingAdmin(admin.ModelAdmin):
     search_fields = ['customer__username', 'freelancer__username', 'service__title']
     readonly_fields = ['created_at', 'updated_at', 'accepted_at', 'completed_at', 'cancelled_at']
     inlines = [BookingHistoryInline]
+    
+    def save_model(self, request, obj, form, change):
+        # Status changes made here are recorded as made by this admin
+        obj._changed_by = request.user
+        super().save_model(request, obj, form, change)
 
 
 @admin.register(BookingHistory)
@@ -22,3 +27,17 @@ class BookingHistoryAdmin(admin.ModelAdmin):
     list_display = ['booking', 'status', 'changed_by', 'changed_at']
     list_filter = ['status', 'changed_at']
     search_fields = ['booking__id', 'notes']
+
+
+@admin.register(WorkingHours)
+class WorkingHoursAdmin(admin.ModelAdmin):
+    list_display = ['freelancer', 'weekday', 'start_time', 'end_time']
+    list_filter = ['weekday']
+    search_fields = ['freelancer__username']
+
+
+@admin.register(BlackoutDate)
+class BlackoutDateAdmin(admin.ModelAdmin):
+    list_display = ['freelancer', 'date', 'reason']
+    list_filter = ['date']
+    search_fields = ['freelancer__username']
@@ -7,3 +7,9 @@ class BookingsConfig(AppConfig):
     
     def ready(self):
         import bookings.signals
+        
+        from datetime import timedelta
+        from freelancer_platform import scheduler
+        from . import jobs
+        scheduler.register('bookings.expire_pending_bookings', jobs.expire_pending_bookings,
+                           every=timedelta(minutes=15))
@@ -0,0 +1,143 @@
+"""
+Freelancer availability and open booking slots.
+
+A freelancer works in their WorkingHours windows (BOOKING_DEFAULT_WORKING_HOURS
+on every day until they define their own) except on their BlackoutDates.
+Pending and accepted bookings occupy start_at..end_at.
+
+free_slots() loads the busy intervals of a whole date range with one indexed
+range query on (freelancer, status, start_at), merges them into a sorted list
+of disjoint intervals and walks the candidate slots of each window against it
+with a single forward pointer, so a week of slots costs four queries whatever
+the number of bookings.
+"""
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import DurationField, F, Max
+from django.utils import timezone
+
+from .models import BlackoutDate, Booking, WorkingHours
+
+BUSY_STATUSES = ('pending', 'accepted')
+
+
+def longest_duration(freelancer_id):
+    """
+    Longest stored start_at..end_at of the freelancer's pending and accepted
+    bookings. Bookings keep the length they were made with, so a service
+    shortened later does not shorten this.
+    """
+    longest = Booking.objects.filter(freelancer_id=freelancer_id, status__in=BUSY_STATUSES).aggregate(
+        longest=Max(F('end_at') - F('start_at'), output_field=DurationField()),
+    )['longest']
+    return longest or timedelta(0)
+
+
+def overlapping(freelancer_id, start_at, end_at):
+    """
+    Pending and accepted bookings of a freelancer that overlap start_at..end_at.
+
+    Only bookings starting less than longest_duration() before start_at can
+    still be running at start_at, so the (freelancer, status, start_at) index
+    is read for that range instead of the freelancer's whole history.
+    """
+    return Booking.objects.filter(
+        freelancer_id=freelancer_id, status__in=BUSY_STATUSES,
+        start_at__gt=start_at - longest_duration(freelancer_id), start_at__lt=end_at,
+        end_at__gt=start_at,
+    )
+
+
+def busy_intervals(freelancer_id, start_at, end_at):
+    """Sorted, merged (start, end) intervals in which the freelancer is booked"""
+    intervals = []
+    rows = overlapping(freelancer_id, start_at, end_at).order_by('start_at').values_list('start_at', 'end_at')
+    for start, end in rows:
+        if intervals and start <= intervals[-1][1]:
+            intervals[-1] = (intervals[-1][0], max(intervals[-1][1], end))
+        else:
+            intervals.append((start, end))
+    return intervals
+
+
+def weekly_hours(freelancer_id):
+    """{weekday: [(start time, end time), ...]} of a freelancer"""
+    hours = {}
+    for weekday, start, end in WorkingHours.objects.filter(freelancer_id=freelancer_id).values_list(
+        'weekday', 'start_time', 'end_time',
+    ):
+        hours.setdefault(weekday, []).append((start, end))
+    if not hours:
+        start, end = (time.fromisoformat(value) for value in
+                      getattr(settings, 'BOOKING_DEFAULT_WORKING_HOURS', ('09:00', '18:00')))
+        hours = {weekday: [(start, end)] for weekday in range(7)}
+    return hours
+
+
+def _windows(date, hours):
+    """Aware (start, end) working windows of one day"""
+    return [
+        (timezone.make_aware(datetime.combine(date, start)), timezone.make_aware(datetime.combine(date, end)))
+        for start, end in sorted(hours.get(date.weekday(), []))
+    ]
+
+
+def free_slots(freelancer_id, duration, start_date, end_date, step=None):
+    """
+    {date: [start datetime, ...]} of every slot of duration minutes between
+    start_date and end_date (inclusive) that lies inside working hours, is
+    not on a blackout date, has not started yet and overlaps no booking.
+    """
+    step = timedelta(minutes=step or getattr(settings, 'BOOKING_SLOT_STEP_MINUTES', 30))
+    length = timedelta(minutes=duration)
+    hours = weekly_hours(freelancer_id)
+    blackouts = set(BlackoutDate.objects.filter(
+        freelancer_id=freelancer_id, date__range=(start_date, end_date),
+    ).values_list('date', flat=True))
+
+    range_start = timezone.make_aware(datetime.combine(start_date, time.min))
+    range_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    busy = busy_intervals(freelancer_id, range_start, range_end)
+    busy_starts = [start for start, _ in busy]
+    now = timezone.now()
+
+    slots = {}
+    date = start_date
+    while date <= end_date:
+        day_slots = []
+        if date not in blackouts:
+            for window_start, window_end in _windows(date, hours):
+                slot = window_start
+                # First busy interval that could overlap the first slot
+                position = max(bisect_right(busy_starts, slot) - 1, 0)
+                while slot + length <= window_end:
+                    while position < len(busy) and busy[position][1] <= slot:
+                        position += 1
+                    if position < len(busy) and busy[position][0] < slot + length:
+                        # Skip to the first step after the busy interval ends
+                        slot += step * -(-(busy[position][1] - slot) // step)
+                        continue
+                    if slot >= now:
+                        day_slots.append(slot)
+                    slot += step
+        slots[date] = day_slots
+        date += timedelta(days=1)
+    return slots
+
+
+def unavailable_reason(freelancer_id, start_at, end_at):
+    """
+    Why the freelancer cannot take a booking from start_at to end_at because
+    of their calendar, or None. Overlaps with other bookings are checked
+    separately with overlapping().
+    """
+    local_start = timezone.localtime(start_at)
+    local_end = timezone.localtime(end_at)
+    if BlackoutDate.objects.filter(freelancer_id=freelancer_id, date=local_start.date()).exists():
+        return 'The freelancer is not available on this date.'
+    for window_start, window_end in _windows(local_start.date(), weekly_hours(freelancer_id)):
+        if window_start <= local_start and local_end <= window_end:
+            return None
+    return "This time is outside the freelancer's working hours."
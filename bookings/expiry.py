@@ -0,0 +1,91 @@
+"""
+Batch expiry of pending bookings whose scheduled time has passed.
+
+Stale bookings are handled in batches of consecutive ids, each in its own
+short transaction:
+
+1. the next batch of stale ids after the last one seen is selected, rows
+   locked by a concurrent request are skipped (SKIP LOCKED where supported);
+2. one UPDATE cancels the batch, still conditional on status='pending' so a
+   booking accepted in the meantime is left alone;
+3. the rows that UPDATE changed are read back by the cancelled_at value it
+   wrote, and only they get a BookingHistory row (one bulk_create), their
+   pending payment marked failed and their share of the platform counters.
+
+Live traffic therefore never waits on more than one batch, and a booking
+changed concurrently is neither expired nor counted twice.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts import platform_stats
+
+from .models import Booking, BookingHistory
+
+EXPIRED_NOTE = "Expired: the scheduled time passed before the booking was accepted"
+
+
+def stale_bookings(now=None):
+    """Pending bookings whose start time has passed"""
+    now = now or timezone.now()
+    return Booking.objects.filter(
+        Q(start_at__lt=now) | Q(start_at__isnull=True, booking_date__lt=timezone.localdate(now)),
+        status='pending',
+    )
+
+
+def _expire_batch(after_id, batch_size, now):
+    """Expire the next batch of stale bookings, returns (last id seen, expired, payments marked)"""
+    from payments.models import Payment
+
+    with transaction.atomic():
+        ids = list(
+            stale_bookings(now).filter(pk__gt=after_id).order_by('pk')
+            .select_for_update(skip_locked=True).values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return None, 0, 0
+
+        Booking.objects.filter(pk__in=ids, status='pending').update(
+            status='cancelled', cancelled_at=now, updated_at=now,
+        )
+        expired = list(Booking.objects.filter(
+            pk__in=ids, status='cancelled', cancelled_at=now,
+        ).values_list('pk', flat=True))
+
+        BookingHistory.objects.bulk_create([
+            BookingHistory(booking_id=booking_id, status='cancelled', notes=EXPIRED_NOTE, changed_by=None)
+            for booking_id in expired
+        ])
+        payments = Payment.objects.filter(booking_id__in=expired, status='pending').update(
+            status='failed', notes=EXPIRED_NOTE, updated_at=now,
+        )
+        if expired:
+            platform_stats.apply({'pending_bookings': -len(expired), 'cancelled_bookings': len(expired)})
+    return ids[-1], len(expired), payments
+
+
+def expire_stale_bookings(batch_size=None, now=None):
+    """
+    Cancel every stale pending booking. Returns the number of bookings
+    expired and payments marked failed, the batches used and the seconds taken.
+    """
+    batch_size = batch_size or getattr(settings, 'BOOKING_EXPIRY_BATCH_SIZE', 500)
+    now = now or timezone.now()
+    result = {'expired': 0, 'payments': 0, 'batches': 0}
+
+    started = time.monotonic()
+    last_id = 0
+    while True:
+        last_id, expired, payments = _expire_batch(last_id, batch_size, now)
+        if last_id is None:
+            break
+        result['batches'] += 1
+        result['expired'] += expired
+        result['payments'] += payments
+    result['seconds'] = time.monotonic() - started
+    return result
@@ -1,6 +1,8 @@
 from django import forms
-from .models import Booking
+from .models import Booking, BlackoutDate, WorkingHours
 from django.utils import timezone
+from datetime import timedelta
+from . import availability
 
 class BookingForm(forms.ModelForm):
     class Meta:
@@ -13,6 +15,10 @@ class BookingForm(forms.ModelForm):
                                                     'placeholder': 'Any special instructions...'}),
         }
     
+    def __init__(self, *args, service=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.service = service
+    
     def clean_booking_date(self):
         booking_date = self.cleaned_data.get('booking_date')
         if booking_date and booking_date < timezone.now().date():
@@ -30,6 +36,15 @@ class BookingForm(forms.ModelForm):
             )
             if booking_datetime < timezone.now():
                 raise forms.ValidationError("Booking time cannot be in the past.")
+            
+            # Working hours and blackout dates of the freelancer
+            if self.service is not None:
+                reason = availability.unavailable_reason(
+                    self.service.freelancer_id, booking_datetime,
+                    booking_datetime + timedelta(minutes=self.service.duration),
+                )
+                if reason:
+                    raise forms.ValidationError(reason)
         
         return cleaned_data
 
@@ -41,3 +56,40 @@ class FreelancerNotesForm(forms.ModelForm):
         widgets = {
             'freelancer_notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
+
+
+class WorkingHoursForm(forms.ModelForm):
+    class Meta:
+        model = WorkingHours
+        fields = ['weekday', 'start_time', 'end_time']
+        widgets = {
+            'weekday': forms.Select(attrs={'class': 'form-select'}),
+            'start_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+            'end_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+        }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        
+        if start_time and end_time and start_time >= end_time:
+            raise forms.ValidationError("End time must be after start time.")
+        
+        return cleaned_data
+
+
+class BlackoutDateForm(forms.ModelForm):
+    class Meta:
+        model = BlackoutDate
+        fields = ['date', 'reason']
+        widgets = {
+            'date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+            'reason': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Optional'}),
+        }
+    
+    def clean_date(self):
+        date = self.cleaned_data.get('date')
+        if date and date < timezone.now().date():
+            raise forms.ValidationError("Date cannot be in the past.")
+        return date
@@ -0,0 +1,123 @@
+"""
+iCalendar (RFC 5545) feeds of a user's bookings.
+
+Calendar apps poll a feed every few minutes, so every response carries a
+strong ETag built from the number of bookings in the feed and the latest
+updated_at of those bookings and of the services and users their events
+show. Every booking write, including status transitions, moves its
+updated_at, and saving a service or a user moves theirs, so an unchanged
+tag means an unchanged feed and the view answers 304 after one aggregate
+query.
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Booking
+
+# Statuses of the bookings shown as events
+FEED_STATUSES = ('accepted', 'completed')
+
+
+def user_bookings(user):
+    """Every booking the user takes part in"""
+    if user.user_type == 'freelancer':
+        return Booking.objects.filter(freelancer=user)
+    return Booking.objects.filter(customer=user)
+
+
+def window_start():
+    """Events that ended before this are left out of the feed"""
+    days = getattr(settings, 'CALENDAR_FEED_PAST_DAYS', 30)
+    return timezone.localdate() - timedelta(days=days)
+
+
+def feed_bookings(user):
+    """The user's bookings shown as events"""
+    return user_bookings(user).filter(
+        Q(end_at__isnull=True) | Q(end_at__date__gte=window_start()),
+        status__in=FEED_STATUSES,
+    )
+
+
+def etag(user):
+    """Strong validator of the user's feed"""
+    # Events show the service title, both users' names and the customer's address
+    state = feed_bookings(user).order_by().aggregate(
+        count=Count('pk'), booking=Max('updated_at'), service=Max('service__updated_at'),
+        customer=Max('customer__updated_at'), freelancer=Max('freelancer__updated_at'),
+    )
+    parts = [user.pk, window_start().isoformat(), state.pop('count')]
+    parts += [latest.isoformat() if latest else '' for name, latest in sorted(state.items())]
+    key = ':'.join(str(part) for part in parts)
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def _escape(text):
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Split a content line into 75-octet pieces continued by a leading space"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    pieces = []
+    while data:
+        limit = 75 if not pieces else 74
+        cut = min(limit, len(data))
+        # Do not split a multi-byte character
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        pieces.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    return '\r\n '.join(pieces)
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render(user, host):
+    """The feed document of a user"""
+    bookings = feed_bookings(user).select_related('service', 'customer', 'freelancer').order_by(
+        'booking_date', 'booking_time',
+    )
+
+    is_freelancer = user.user_type == 'freelancer'
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//FreelanceHub//Bookings//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape("FreelanceHub bookings")}',
+    ]
+    for booking in bookings.iterator(chunk_size=500):
+        booking.set_interval()
+        other = booking.customer if is_freelancer else booking.freelancer
+        name = other.get_full_name() or other.username
+        description = [f'Booking #{booking.id} - {booking.get_status_display()}']
+        if booking.customer_notes:
+            description.append(f'Notes: {booking.customer_notes}')
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:booking-{booking.id}@{host}',
+            f'DTSTAMP:{_utc(booking.updated_at)}',
+            f'DTSTART:{_utc(booking.start_at)}',
+            f'DTEND:{_utc(booking.end_at)}',
+            f'SUMMARY:{_escape(f"{booking.service.title} - {name}")}',
+            f'DESCRIPTION:{_escape(chr(10).join(description))}',
+        ]
+        if is_freelancer:
+            location = ', '.join(part for part in (booking.customer.address, booking.customer.area,
+                                                   booking.customer.city) if part)
+            if location:
+                lines.append(f'LOCATION:{_escape(location)}')
+        lines += ['STATUS:CONFIRMED', 'END:VEVENT']
+    lines.append('END:VCALENDAR')
+    return ''.join(_fold(line) + '\r\n' for line in lines)
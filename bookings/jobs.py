@@ -0,0 +1,7 @@
+"""Periodic jobs of the bookings app, registered in apps.py"""
+from . import expiry
+
+
+def expire_pending_bookings():
+    """Cancel pending bookings whose scheduled time has passed unanswered"""
+    expiry.expire_stale_bookings()
@@ -0,0 +1,75 @@
+import time
+from datetime import date, time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.signals import pre_save
+
+from accounts.models import User
+from bookings.models import Booking
+from services.models import Category, Service
+
+
+def refetch_status(sender, instance, **kwargs):
+    """The former track_status_change: read the stored row before every save"""
+    if instance.pk:
+        Booking.objects.get(pk=instance.pk)
+
+
+class Command(BaseCommand):
+    help = 'Time booking status writes with and without the pre-save row fetch (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=2000, help='Bookings written per mode')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._run(options['bookings'])
+            transaction.set_rollback(True)
+
+    def _run(self, count):
+        freelancer = User.objects.create(username='benchmark_freelancer', user_type='freelancer')
+        customer = User.objects.create(username='benchmark_customer', user_type='customer')
+        service = Service.objects.create(
+            freelancer=freelancer, category=Category.objects.create(name='Benchmark writes'),
+            title='Benchmark', description='', price=100, duration=60,
+        )
+        day = date.today() + timedelta(days=30)
+        new_bookings = [
+            Booking(customer=customer, freelancer=freelancer, service=service, total_amount=100,
+                    booking_date=day + timedelta(days=index // 8), booking_time=clock(9 + index % 8))
+            for index in range(count)
+        ]
+        for booking in new_bookings:
+            booking.set_interval()
+        Booking.objects.bulk_create(new_bookings)
+        bookings = Booking.objects.filter(service=service)
+
+        modes = (
+            ('save, row fetch', self._save, True),
+            ('save, tracked', self._save, False),
+            ('transition', self._transition, False),
+        )
+        self.stdout.write(f"{'mode':<18} {'writes/s':>10} {'queries/write':>14}")
+        for label, write, refetch in modes:
+            bookings.update(status='pending')
+            loaded = list(bookings)
+            if refetch:
+                pre_save.connect(refetch_status, sender=Booking, dispatch_uid='benchmark_refetch')
+            try:
+                queries = []
+                with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+                    started = time.perf_counter()
+                    for booking in loaded:
+                        write(booking)
+                    elapsed = time.perf_counter() - started
+            finally:
+                pre_save.disconnect(sender=Booking, dispatch_uid='benchmark_refetch')
+            self.stdout.write(f'{label:<18} {count / elapsed:>10.0f} {len(queries) / count:>14.1f}')
+
+    def _save(self, booking):
+        booking.status = 'accepted'
+        booking.save()
+
+    def _transition(self, booking):
+        booking.accept_booking()
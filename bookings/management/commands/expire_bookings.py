@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from bookings import expiry
+
+
+class Command(BaseCommand):
+    help = 'Cancel pending bookings whose scheduled time has passed, in batches, and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Bookings per transaction (default BOOKING_EXPIRY_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        result = expiry.expire_stale_bookings(batch_size=options['batch_size'])
+        seconds = result['seconds']
+        rate = result['expired'] / seconds if seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Expired {result['expired']} booking(s) and {result['payments']} pending payment(s) "
+            f"in {result['batches']} batch(es), {seconds:.2f}s ({rate:.0f} bookings/s)."
+        ))
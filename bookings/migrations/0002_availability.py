@@ -0,0 +1,84 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from datetime import datetime, timedelta
+from django.utils import timezone
+
+
+def backfill_intervals(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    bookings = Booking.objects.select_related('service').only(
+        'booking_date', 'booking_time', 'service__duration',
+    )
+    updated = []
+    for booking in bookings.iterator(chunk_size=1000):
+        booking.start_at = timezone.make_aware(datetime.combine(booking.booking_date, booking.booking_time))
+        booking.end_at = booking.start_at + timedelta(minutes=booking.service.duration)
+        updated.append(booking)
+    Booking.objects.bulk_update(updated, ['start_at', 'end_at'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlackoutDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('reason', models.CharField(blank=True, max_length=200)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkingHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Working hours',
+                'ordering': ['weekday', 'start_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='end_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='start_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['freelancer', 'start_at'], name='bookings_freelancer_start_idx'),
+        ),
+        migrations.AddField(
+            model_name='workinghours',
+            name='freelancer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_hours', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='blackoutdate',
+            name='freelancer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blackout_dates', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='blackoutdate',
+            unique_together={('freelancer', 'date')},
+        ),
+        migrations.RunPython(backfill_intervals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_calendar_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'start_at'], name='bookings_status_start_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_status_start_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='bookings_freelancer_start_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['freelancer', 'status', 'start_at'], name='bookings_freelancer_busy_idx'),
+        ),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 from datetime import timedelta
+import secrets
 from django.conf import settings
-from accounts.models import User
+from accounts import platform_stats
+from accounts.models import User, FreelancerProfile
+from services import scores
 from services.models import Service
 
 class Booking(models.Model):
@@ -36,9 +40,25 @@ class Booking(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     cancelled_at = models.DateTimeField(null=True, blank=True)
     
+    # Time the freelancer is busy, derived from the date, time and service duration
+    start_at = models.DateTimeField(null=True, blank=True, editable=False)
+    end_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
     def __str__(self):
         return f"Booking #{self.id} - {self.service.title} by {self.customer.username}"
     
+    def save(self, *args, **kwargs):
+        self.set_interval()
+        super().save(*args, **kwargs)
+    
+    def set_interval(self):
+        """Derive start_at/end_at from the date, time and service duration"""
+        if self.booking_date and self.booking_time:
+            start_at = timezone.make_aware(timezone.datetime.combine(self.booking_date, self.booking_time))
+            if start_at != self.start_at or self.end_at is None:
+                self.start_at = start_at
+                self.end_at = start_at + timedelta(minutes=self.service.duration)
+    
     def can_cancel(self):
         """Check if booking can be cancelled by customer"""
         if self.status not in ['pending', 'accepted']:
@@ -52,49 +72,73 @@ class Booking(models.Model):
         
         return time_difference > cancellation_limit
     
-    def cancel_booking(self):
+    def transition(self, from_statuses, to_status, changed_by=None, **fields):
+        """
+        Move the booking to to_status with one UPDATE of the status,
+        updated_at and fields, conditional on the row still having the status
+        this instance was loaded with. Returns False, changing nothing, when
+        that status is not in from_statuses or another request moved the
+        booking first. changed_by is recorded in the history.
+        """
+        if self.status not in from_statuses:
+            return False
+        
+        from_status = self.status
+        values = dict(fields, status=to_status, updated_at=timezone.now())
+        with transaction.atomic():
+            if not Booking.objects.filter(pk=self.pk, status=from_status).update(**values):
+                return False
+            
+            # Queryset updates skip the save signals, keep their effects here
+            BookingHistory.objects.create(
+                booking=self,
+                status=to_status,
+                notes=f"Status changed from {from_status} to {to_status}",
+                changed_by=changed_by
+            )
+            platform_stats.apply(platform_stats.difference('bookings.Booking', (from_status,), (to_status,)))
+            if to_status == 'completed':
+                FreelancerProfile.objects.filter(user_id=self.freelancer_id).update(
+                    completed_bookings=F('completed_bookings') + 1
+                )
+                scores.record_completion(self.service_id)
+        
+        for name, value in values.items():
+            setattr(self, name, value)
+        self._platform_stats_state = (to_status,)
+        self._loaded_status = to_status
+        return True
+    
+    def cancel_booking(self, changed_by=None):
         """Cancel the booking"""
         if self.can_cancel():
-            self.status = 'cancelled'
-            self.cancelled_at = timezone.now()
-            self.save()
-            return True
+            return self.transition(('pending', 'accepted'), 'cancelled', changed_by, cancelled_at=timezone.now())
         return False
     
-    def accept_booking(self):
+    def accept_booking(self, changed_by=None):
         """Freelancer accepts the booking"""
-        if self.status == 'pending':
-            self.status = 'accepted'
-            self.accepted_at = timezone.now()
-            self.save()
-            return True
-        return False
+        return self.transition(('pending',), 'accepted', changed_by, accepted_at=timezone.now())
     
-    def reject_booking(self):
+    def reject_booking(self, changed_by=None):
         """Freelancer rejects the booking"""
-        if self.status == 'pending':
-            self.status = 'rejected'
-            self.save()
-            return True
-        return False
+        return self.transition(('pending',), 'rejected', changed_by)
     
-    def complete_booking(self):
+    def complete_booking(self, changed_by=None, freelancer_notes=None):
         """Mark booking as completed"""
-        if self.status == 'accepted':
-            self.status = 'completed'
-            self.completed_at = timezone.now()
-            self.save()
-            
-            # Update freelancer stats
-            profile = self.freelancer.freelancer_profile
-            profile.completed_bookings += 1
-            profile.save()
-            
-            return True
-        return False
+        fields = {'completed_at': timezone.now()}
+        if freelancer_notes is not None:
+            fields['freelancer_notes'] = freelancer_notes
+        return self.transition(('accepted',), 'completed', changed_by, **fields)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['freelancer', 'status', 'start_at'], name='bookings_freelancer_busy_idx'),
+            models.Index(fields=['customer', '-created_at', '-id'], name='bookings_customer_recent_idx'),
+            models.Index(fields=['freelancer', '-created_at', '-id'], name='bookings_freelancer_recent_idx'),
+            models.Index(fields=['-created_at', '-id'], name='bookings_recent_idx'),
+            models.Index(fields=['status', 'start_at'], name='bookings_status_start_idx'),
+        ]
 
 
 class BookingHistory(models.Model):
@@ -111,3 +155,63 @@ class BookingHistory(models.Model):
     class Meta:
         verbose_name_plural = 'Booking Histories'
         ordering = ['-changed_at']
+
+
+class WorkingHours(models.Model):
+    """Weekly time window in which a freelancer takes bookings"""
+    WEEKDAY_CHOICES = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+    
+    freelancer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='working_hours')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    
+    def __str__(self):
+        return f"{self.freelancer.username} - {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+    
+    class Meta:
+        verbose_name_plural = 'Working hours'
+        ordering = ['weekday', 'start_time']
+
+
+class BlackoutDate(models.Model):
+    """Day on which a freelancer takes no bookings"""
+    freelancer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blackout_dates')
+    date = models.DateField()
+    reason = models.CharField(max_length=200, blank=True)
+    
+    def __str__(self):
+        return f"{self.freelancer.username} unavailable on {self.date}"
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['freelancer', 'date']
+
+
+class CalendarFeed(models.Model):
+    """Secret token of a user's iCalendar booking feed"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_feed')
+    token = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Calendar feed of {self.user.username}"
+    
+    @classmethod
+    def for_user(cls, user):
+        """The user's feed, created on first use"""
+        feed, _ = cls.objects.get_or_create(user=user, defaults={'token': secrets.token_urlsafe(32)})
+        return feed
+    
+    def reset_token(self):
+        """Replace the token, the old feed URL stops working"""
+        self.token = secrets.token_urlsafe(32)
+        self.save(update_fields=['token'])
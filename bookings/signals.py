@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_init, post_save, pre_save
 from django.dispatch import receiver
 from .models import Booking, BookingHistory
+from services import scores
 
 @receiver(post_save, sender=Booking)
 def create_booking_history(sender, instance, created, **kwargs):
@@ -14,27 +15,50 @@ def create_booking_history(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_init, sender=Booking)
+def remember_loaded_status(sender, instance, **kwargs):
+    """Keep the status a booking was loaded with, None when it was deferred"""
+    instance._loaded_status = instance.__dict__.get('status')
+
+
 @receiver(pre_save, sender=Booking)
 def track_status_change(sender, instance, **kwargs):
     """Track status changes in booking"""
-    if instance.pk:
-        try:
-            old_instance = Booking.objects.get(pk=instance.pk)
-            if old_instance.status != instance.status:
-                # Will be saved after the booking is saved
-                instance._status_changed = True
-                instance._old_status = old_instance.status
-        except Booking.DoesNotExist:
-            pass
+    if instance._state.adding:
+        return
+    old_status = instance._loaded_status
+    if old_status is None:
+        # Only bookings loaded without their status need the stored one
+        old_status = Booking.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    if old_status is not None and old_status != instance.status:
+        # Will be saved after the booking is saved
+        instance._status_changed = True
+        instance._old_status = old_status
 
 
 @receiver(post_save, sender=Booking)
 def save_status_change_history(sender, instance, created, **kwargs):
     """Save status change to history"""
-    if not created and hasattr(instance, '_status_changed'):
+    if not created and getattr(instance, '_status_changed', False):
         BookingHistory.objects.create(
             booking=instance,
             status=instance.status,
             notes=f"Status changed from {instance._old_status} to {instance.status}",
-            changed_by=None  # Can be enhanced to track who made the change
+            changed_by=getattr(instance, '_changed_by', None)
         )
+
+
+@receiver(post_save, sender=Booking)
+def update_service_scores(sender, instance, created, **kwargs):
+    """Feed the popularity and most-booked service sorts"""
+    if created:
+        scores.record_booking(instance.service_id, instance.created_at)
+    elif getattr(instance, '_status_changed', False) and instance.status == 'completed':
+        scores.record_completion(instance.service_id)
+
+
+@receiver(post_save, sender=Booking)
+def reset_status_tracking(sender, instance, **kwargs):
+    """Later saves of the same instance compare against the saved status"""
+    instance._loaded_status = instance.status
+    instance._status_changed = False
@@ -0,0 +1,362 @@
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import platform_stats
+from accounts.models import FreelancerProfile, User
+from freelancer_platform.testing import test_settings
+from payments.models import Payment
+from services.models import Category, Service
+
+from . import availability, expiry
+from .models import Booking, BookingHistory, CalendarFeed
+
+
+@test_settings
+class BookingDetailQueryTests(TestCase):
+    """booking_detail loads the booking graph and its history in a fixed number of queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.customer = User.objects.create_user('customer', password='x', user_type='customer')
+        cls.admin = User.objects.create_user('admin', password='x', user_type='admin')
+        service = Service.objects.create(
+            freelancer=cls.freelancer, category=Category.objects.create(name='Plumbing'),
+            title='Leak repair', description='Pipes', price=Decimal('500'), duration=60, is_approved=True,
+        )
+        cls.booking = Booking.objects.create(
+            customer=cls.customer, freelancer=cls.freelancer, service=service,
+            booking_date=timezone.localdate() + timedelta(days=1), booking_time=time(10),
+            total_amount=service.price,
+        )
+        Payment.objects.create(booking=cls.booking, customer=cls.customer, amount=service.price,
+                               payment_method='cash', status='pending')
+
+    def add_history(self, count):
+        users = [self.customer, self.freelancer, self.admin, None]
+        BookingHistory.objects.bulk_create([
+            BookingHistory(booking=self.booking, status='pending', notes=f'Note {index}',
+                           changed_by=users[index % len(users)])
+            for index in range(count)
+        ])
+
+    def assertDetailQueries(self, user, num):
+        self.client.force_login(user)
+        with self.assertNumQueries(num):
+            response = self.client.get(reverse('bookings:booking_detail', args=[self.booking.pk]))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_constant_as_history_grows(self):
+        # Session, user, booking with its relations, history with its users
+        self.add_history(1)
+        self.assertDetailQueries(self.customer, 4)
+
+        self.add_history(30)
+        response = self.assertDetailQueries(self.customer, 4)
+        self.assertEqual(len(response.context['booking'].history.all()), BookingHistory.objects.filter(
+            booking=self.booking).count())
+
+    def test_query_count_same_for_every_role(self):
+        self.add_history(10)
+        for user in (self.customer, self.freelancer, self.admin):
+            with self.subTest(user=user.username):
+                self.assertDetailQueries(user, 4)
+
+
+@test_settings
+class OverlappingTests(TestCase):
+    """overlapping() reads a bounded start_at range and still finds running bookings"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.customer = User.objects.create_user('customer', password='x', user_type='customer')
+        category = Category.objects.create(name='Plumbing')
+        cls.short = Service.objects.create(freelancer=cls.freelancer, category=category, title='Leak check',
+                                           description='Pipes', price=Decimal('300'), duration=60, is_approved=True)
+        cls.long = Service.objects.create(freelancer=cls.freelancer, category=category, title='Full refit',
+                                          description='Pipes', price=Decimal('3000'), duration=240, is_approved=True)
+        cls.day = timezone.localdate() + timedelta(days=1)
+
+    def book(self, service, hour):
+        return Booking.objects.create(
+            customer=self.customer, freelancer=self.freelancer, service=service,
+            booking_date=self.day, booking_time=time(hour), total_amount=service.price,
+        )
+
+    def interval(self, hour, minutes=60):
+        start = timezone.make_aware(datetime.combine(self.day, time(hour)))
+        return start, start + timedelta(minutes=minutes)
+
+    def test_finds_a_long_booking_that_started_earlier(self):
+        refit = self.book(self.long, 9)
+        self.assertEqual(list(availability.overlapping(self.freelancer.pk, *self.interval(12))), [refit])
+        self.assertFalse(availability.overlapping(self.freelancer.pk, *self.interval(13)).exists())
+
+    def test_ignores_bookings_ending_before_or_starting_after(self):
+        self.book(self.short, 9)
+        self.book(self.short, 11)
+        self.assertFalse(availability.overlapping(self.freelancer.pk, *self.interval(10)).exists())
+
+    def test_finds_a_booking_whose_service_was_shortened_later(self):
+        refit = self.book(self.long, 9)
+        Service.objects.filter(pk=self.long.pk).update(duration=60)
+        self.assertEqual(list(availability.overlapping(self.freelancer.pk, *self.interval(12))), [refit])
+
+    def test_lower_bound_is_the_longest_busy_booking(self):
+        self.assertEqual(availability.longest_duration(self.freelancer.pk), timedelta(0))
+        self.book(self.short, 9)
+        refit = self.book(self.long, 12)
+        self.assertEqual(availability.longest_duration(self.freelancer.pk), timedelta(minutes=240))
+        Booking.objects.filter(pk=refit.pk).update(status='cancelled')
+        self.assertEqual(availability.longest_duration(self.freelancer.pk), timedelta(minutes=60))
+        where = str(availability.overlapping(self.freelancer.pk, *self.interval(12)).query)
+        self.assertIn('"start_at" >', where)
+
+
+@test_settings
+class AvailableSlotsTests(TestCase):
+    """The slots endpoint falls back to today for any start it cannot use"""
+
+    @classmethod
+    def setUpTestData(cls):
+        freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer', is_verified=True)
+        cls.service = Service.objects.create(freelancer=freelancer, category=Category.objects.create(name='Plumbing'),
+                                             title='Leak repair', description='Pipes', price=Decimal('500'),
+                                             duration=60, is_approved=True)
+        cls.customer = User.objects.create_user('customer', password='x', user_type='customer')
+
+    def setUp(self):
+        self.client.force_login(self.customer)
+
+    def test_invalid_start_falls_back_to_today(self):
+        today = timezone.localdate().isoformat()
+        for start in ('2026-02-30', 'tomorrow', ''):
+            with self.subTest(start=start):
+                response = self.client.get(reverse('bookings:available_slots', args=[self.service.pk]),
+                                           {'start': start, 'days': 1})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.json()['slots']), [today])
+
+
+@test_settings
+class CalendarFeedTests(TestCase):
+    """The iCalendar feed answers 304 until anything its events show changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.customer = User.objects.create_user('customer', password='x', user_type='customer',
+                                                first_name='Asha', address='12 Beach Road')
+        cls.service = Service.objects.create(
+            freelancer=cls.freelancer, category=Category.objects.create(name='Plumbing'),
+            title='Leak repair', description='Pipes', price=Decimal('500'), duration=60, is_approved=True,
+        )
+        cls.booking = Booking.objects.create(
+            customer=cls.customer, freelancer=cls.freelancer, service=cls.service,
+            booking_date=timezone.localdate() + timedelta(days=1), booking_time=time(10),
+            status='accepted', total_amount=cls.service.price,
+        )
+        cls.url = reverse('bookings:calendar_feed', args=[CalendarFeed.for_user(cls.freelancer).token])
+
+    def get(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(self.url, **headers)
+
+    def assertChanged(self, etag):
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_feed_lists_events(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(f'UID:booking-{self.booking.pk}@', body)
+        self.assertIn('SUMMARY:Leak repair - Asha', body)
+        self.assertIn('LOCATION:12 Beach Road', body)
+
+    def test_unchanged_feed_answers_304_after_one_aggregate(self):
+        etag = self.get()['ETag']
+        # Feed token, then the aggregate behind the ETag
+        with self.assertNumQueries(2):
+            response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_follows_what_events_show(self):
+        etag = self.get()['ETag']
+
+        self.service.title = 'Leak and tap repair'
+        self.service.save()
+        response = self.assertChanged(etag)
+        self.assertIn('SUMMARY:Leak and tap repair', response.content.decode())
+
+        etag = response['ETag']
+        self.customer.address = '14 Beach Road'
+        self.customer.save()
+        etag = self.assertChanged(etag)['ETag']
+
+        self.booking.complete_booking()
+        etag = self.assertChanged(etag)['ETag']
+
+        Booking.objects.filter(pk=self.booking.pk).update(status='cancelled')
+        response = self.assertChanged(etag)
+        self.assertNotIn('BEGIN:VEVENT', response.content.decode())
+
+    def test_unknown_token_is_404(self):
+        self.assertEqual(self.client.get(reverse('bookings:calendar_feed', args=['nope'])).status_code, 404)
+
+
+@test_settings
+class BookingExportTests(TestCase):
+    """My Bookings exports stream every booking and keep cells inert in spreadsheets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('@freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.customer = User.objects.create_user('customer', password='x', user_type='customer')
+        cls.service = Service.objects.create(
+            freelancer=cls.freelancer, category=Category.objects.create(name='Plumbing'),
+            title='=HYPERLINK("http://example.com","Repair")', description='Pipes', price=Decimal('500'),
+            duration=60, is_approved=True,
+        )
+        for day in range(3):
+            Booking.objects.create(customer=cls.customer, freelancer=cls.freelancer, service=cls.service,
+                                   booking_date=timezone.localdate() + timedelta(days=day + 1),
+                                   booking_time=time(10), total_amount=cls.service.price)
+
+    def export(self, export_format):
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse('bookings:my_bookings'), {'format': export_format})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_neutralises_formulas(self):
+        rows = list(csv.reader(io.StringIO(self.export('csv'))))
+        self.assertEqual(len(rows), 4)
+        header = rows[0]
+        for row in rows[1:]:
+            self.assertEqual(row[header.index('service_title')], "'" + self.service.title)
+            self.assertEqual(row[header.index('freelancer_username')], "'@freelancer")
+            self.assertEqual(row[header.index('customer_username')], 'customer')
+            self.assertEqual(row[header.index('total_amount')], '500.00')
+
+    def test_ndjson_keeps_values(self):
+        rows = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['service_title'], self.service.title)
+
+
+@test_settings
+class TransitionTests(TestCase):
+    """Status changes are single conditional UPDATEs that only the first request wins"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.customer = User.objects.create_user('customer', password='x', user_type='customer')
+        cls.service = Service.objects.create(
+            freelancer=cls.freelancer, category=Category.objects.create(name='Plumbing'),
+            title='Leak repair', description='Pipes', price=Decimal('500'), duration=60, is_approved=True,
+        )
+
+    def setUp(self):
+        self.booking = Booking.objects.create(
+            customer=self.customer, freelancer=self.freelancer, service=self.service,
+            booking_date=timezone.localdate() + timedelta(days=3), booking_time=time(10),
+            total_amount=self.service.price,
+        )
+
+    def history(self):
+        return list(BookingHistory.objects.filter(booking=self.booking).exclude(status='pending').order_by('pk').values_list(
+            'status', 'changed_by'))
+
+    def test_transition_updates_row_history_and_counters(self):
+        self.assertTrue(self.booking.accept_booking(changed_by=self.freelancer))
+        self.assertEqual(self.booking.status, 'accepted')
+        self.assertIsNotNone(Booking.objects.get(pk=self.booking.pk).accepted_at)
+        self.assertTrue(self.booking.complete_booking(changed_by=self.freelancer, freelancer_notes='Fixed'))
+        booking = Booking.objects.get(pk=self.booking.pk)
+        self.assertEqual((booking.status, booking.freelancer_notes), ('completed', 'Fixed'))
+        self.assertEqual(self.history(), [('accepted', self.freelancer.pk), ('completed', self.freelancer.pk)])
+        self.assertEqual(FreelancerProfile.objects.get(user=self.freelancer).completed_bookings, 1)
+        self.assertEqual(platform_stats.reconcile(), {})
+
+    def test_only_the_first_of_two_racing_requests_wins(self):
+        stale = Booking.objects.get(pk=self.booking.pk)
+        self.assertTrue(self.booking.accept_booking(changed_by=self.freelancer))
+        # The other request still sees the booking as pending
+        self.assertFalse(stale.reject_booking(changed_by=self.freelancer))
+        self.assertFalse(stale.cancel_booking(changed_by=self.customer))
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).status, 'accepted')
+        self.assertEqual(self.history(), [('accepted', self.freelancer.pk)])
+        self.assertEqual(platform_stats.reconcile(), {})
+
+    def test_disallowed_transition_changes_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(self.booking.complete_booking())
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).status, 'pending')
+
+    def test_view_refuses_a_booking_no_longer_pending(self):
+        self.booking.cancel_booking(changed_by=self.customer)
+        self.client.force_login(self.freelancer)
+        response = self.client.post(reverse('bookings:accept_booking', args=[self.booking.pk]), follow=True)
+        self.assertContains(response, 'Cannot accept this booking.')
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).status, 'cancelled')
+        self.assertEqual(platform_stats.reconcile(), {})
+
+
+@test_settings
+class ExpiryTests(TestCase):
+    """Stale pending bookings are cancelled in batches, each counted once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.customer = User.objects.create_user('customer', password='x', user_type='customer')
+        cls.service = Service.objects.create(
+            freelancer=cls.freelancer, category=Category.objects.create(name='Plumbing'),
+            title='Leak repair', description='Pipes', price=Decimal('500'), duration=60, is_approved=True,
+        )
+
+    def book(self, days, status='pending'):
+        booking = Booking.objects.create(
+            customer=self.customer, freelancer=self.freelancer, service=self.service,
+            booking_date=timezone.localdate() + timedelta(days=days), booking_time=time(10),
+            status=status, total_amount=self.service.price,
+        )
+        Payment.objects.create(booking=booking, customer=self.customer, amount=booking.total_amount,
+                               payment_method='cash', status='pending')
+        return booking
+
+    def test_expires_only_stale_pending_bookings(self):
+        stale = [self.book(-day) for day in range(1, 6)]
+        accepted = self.book(-1, 'accepted')
+        upcoming = self.book(2)
+
+        result = expiry.expire_stale_bookings(batch_size=2)
+        self.assertEqual((result['expired'], result['payments'], result['batches']), (5, 5, 3))
+        self.assertEqual(set(Booking.objects.filter(status='cancelled').values_list('pk', flat=True)),
+                         {booking.pk for booking in stale})
+        self.assertEqual(Booking.objects.get(pk=accepted.pk).status, 'accepted')
+        self.assertEqual(Booking.objects.get(pk=upcoming.pk).status, 'pending')
+        self.assertEqual(Payment.objects.filter(status='failed').count(), 5)
+        self.assertEqual(BookingHistory.objects.filter(notes=expiry.EXPIRED_NOTE).count(), 5)
+        self.assertEqual(platform_stats.reconcile(), {})
+
+        self.assertEqual(expiry.expire_stale_bookings()['expired'], 0)
@@ -11,4 +11,8 @@ urlpatterns = [
     path('<int:pk>/reject/', views.reject_booking, name='reject_booking'),
     path('<int:pk>/complete/', views.complete_booking, name='complete_booking'),
     path('<int:pk>/cancel/', views.cancel_booking, name='cancel_booking'),
+    path('availability/', views.manage_availability, name='manage_availability'),
+    path('slots/<int:service_id>/', views.available_slots, name='available_slots'),
+    path('calendar/<str:token>.ics', views.calendar_feed, name='calendar_feed'),
+    path('calendar/reset/', views.reset_calendar_feed, name='reset_calendar_feed'),
 ]
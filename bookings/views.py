@@ -1,14 +1,40 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
+from django.db.models import Prefetch
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition, require_POST
 from django.conf import settings
-from .models import Booking
-from .forms import BookingForm, FreelancerNotesForm
+from datetime import timedelta
+from .models import Booking, BookingHistory, BlackoutDate, CalendarFeed, WorkingHours
+from .forms import BookingForm, FreelancerNotesForm, WorkingHoursForm, BlackoutDateForm
+from . import availability, ical
+from accounts.models import User
 from services.models import Service
 from payments.models import Payment
+from freelancer_platform.pagination import KeysetPaginator
+import csv
+import itertools
 import json
 
+BOOKING_PAGE_ORDERING = ('-created_at', '-id')
+
+# ?format= values of the my_bookings export and their file extensions
+EXPORT_FORMATS = {'csv': 'csv', 'ndjson': 'ndjson'}
+
+EXPORT_FIELDS = (
+    'id', 'status', 'booking_date', 'booking_time', 'total_amount', 'created_at',
+    'service__title', 'customer__username', 'freelancer__username',
+)
+
+# Leading characters that make spreadsheets evaluate a CSV cell as a formula
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
 @login_required
 def create_booking(request, service_id):
     """Create a new booking"""
@@ -21,7 +47,7 @@ def create_booking(request, service_id):
     profile = freelancer.freelancer_profile
     
     if request.method == 'POST':
-        form = BookingForm(request.POST)
+        form = BookingForm(request.POST, service=service)
         payment_method = request.POST.get('payment_method')
         
         if form.is_valid():
@@ -41,7 +67,18 @@ def create_booking(request, service_id):
             booking.freelancer = freelancer
             booking.service = service
             booking.total_amount = service.price
-            booking.save()
+            booking.set_interval()
+            
+            with transaction.atomic():
+                # Lock the freelancer so concurrent requests check and take slots one at a time
+                User.objects.select_for_update().get(pk=freelancer.pk)
+                slot_taken = availability.overlapping(freelancer.pk, booking.start_at, booking.end_at).exists()
+                if not slot_taken:
+                    booking.save()
+            
+            if slot_taken:
+                messages.error(request, 'The freelancer is already booked at this time. Please choose another slot.')
+                return redirect('bookings:create_booking', service_id=service_id)
             
             # Handle Razorpay payment
             if payment_method == 'razorpay':
@@ -51,20 +88,22 @@ def create_booking(request, service_id):
                 razorpay_signature = request.POST.get('razorpay_signature')
                 
                 if razorpay_payment_id:
-                    # Payment was successful, create payment record
-                    payment = Payment.objects.create(
-                        booking=booking,
-                        customer=request.user,
-                        amount=service.price,
-                        payment_method='razorpay',
-                        status='completed',
-                        transaction_id=razorpay_payment_id,
-                        payment_details=json.dumps({
-                            'razorpay_payment_id': razorpay_payment_id,
-                            'razorpay_order_id': razorpay_order_id,
-                            'razorpay_signature': razorpay_signature
-                        })
-                    )
+                    # Payment was successful, create payment record and complete it
+                    # through mark_completed so it counts towards the earnings rollups
+                    with transaction.atomic():
+                        payment = Payment.objects.create(
+                            booking=booking,
+                            customer=request.user,
+                            amount=service.price,
+                            payment_method='razorpay',
+                            status='pending',
+                            payment_details=json.dumps({
+                                'razorpay_payment_id': razorpay_payment_id,
+                                'razorpay_order_id': razorpay_order_id,
+                                'razorpay_signature': razorpay_signature
+                            })
+                        )
+                        payment.mark_completed(razorpay_payment_id)
                     # Keep booking as 'pending' so freelancer sees it in their pending bookings
                     messages.success(request, 'Booking created! Payment successful. Waiting for freelancer acceptance.')
                 else:
@@ -85,7 +124,7 @@ def create_booking(request, service_id):
             
             return redirect('bookings:booking_detail', pk=booking.id)
     else:
-        form = BookingForm()
+        form = BookingForm(service=service)
     
     context = {
         'form': form,
@@ -100,16 +139,28 @@ def create_booking(request, service_id):
 @login_required
 def booking_detail(request, pk):
     """View booking details"""
-    booking = get_object_or_404(Booking, pk=pk)
+    # The whole booking graph in one query, the history with its users in a second
+    booking = get_object_or_404(
+        Booking.objects.select_related(
+            'customer', 'freelancer', 'service__category', 'payment', 'review',
+        ).prefetch_related(
+            Prefetch('history', queryset=BookingHistory.objects.select_related('changed_by')),
+        ),
+        pk=pk,
+    )
     
     # Check permissions
-    if booking.customer != request.user and booking.freelancer != request.user:
+    is_customer = booking.customer_id == request.user.id
+    is_freelancer = booking.freelancer_id == request.user.id
+    if not (is_customer or is_freelancer):
         if not (request.user.is_superuser or request.user.user_type == 'admin'):
             messages.error(request, 'Access denied.')
             return redirect('home')
     
     context = {
         'booking': booking,
+        'is_customer': is_customer,
+        'is_freelancer': is_freelancer,
     }
     
     return render(request, 'bookings/booking_detail.html', context)
@@ -127,23 +178,75 @@ def my_bookings(request):
     
     # Filter by status
     status = request.GET.get('status')
-    if status:
+    if status in dict(Booking.STATUS_CHOICES):
         bookings = bookings.filter(status=status)
+    else:
+        status = ''
+    
+    export_format = request.GET.get('format')
+    if export_format in EXPORT_FORMATS:
+        return _export_bookings(bookings, export_format)
+    
+    paginator = KeysetPaginator(bookings, ordering=BOOKING_PAGE_ORDERING,
+                                per_page=getattr(settings, 'BOOKINGS_PER_PAGE', 20))
+    page = paginator.page(request.GET.get('cursor'))
     
     context = {
-        'bookings': bookings,
+        'bookings': page,
+        'page': page,
+        'status': status,
     }
+    if request.user.user_type in ('customer', 'freelancer'):
+        feed = CalendarFeed.for_user(request.user)
+        context['calendar_url'] = request.build_absolute_uri(
+            reverse('bookings:calendar_feed', kwargs={'token': feed.token})
+        )
     
     return render(request, 'bookings/my_bookings.html', context)
 
 
+def _export_bookings(bookings, export_format):
+    """Stream bookings as CSV or NDJSON, reading them in fixed-size chunks"""
+    rows = bookings.order_by(*BOOKING_PAGE_ORDERING).values_list(*EXPORT_FIELDS).iterator(
+        chunk_size=getattr(settings, 'BOOKING_EXPORT_CHUNK_SIZE', 2000)
+    )
+    columns = [name.replace('__', '_') for name in EXPORT_FIELDS]
+    
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        lines = itertools.chain([writer.writerow(columns)],
+                                (writer.writerow([_csv_cell(value) for value in row]) for row in rows))
+        content_type = 'text/csv'
+    else:
+        lines = (json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n' for row in rows)
+        content_type = 'application/x-ndjson'
+    
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="bookings.{EXPORT_FORMATS[export_format]}"'
+    return response
+
+
+def _csv_cell(value):
+    """Quote user-entered text that a spreadsheet would run as a formula"""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output"""
+    
+    def write(self, value):
+        return value
+
+
 @login_required
 def accept_booking(request, pk):
     """Freelancer accepts booking"""
     booking = get_object_or_404(Booking, pk=pk, freelancer=request.user)
     
     if request.method == 'POST':
-        if booking.accept_booking():
+        if booking.accept_booking(changed_by=request.user):
             messages.success(request, 'Booking accepted successfully!')
         else:
             messages.error(request, 'Cannot accept this booking.')
@@ -162,7 +265,7 @@ def reject_booking(request, pk):
     booking = get_object_or_404(Booking, pk=pk, freelancer=request.user)
     
     if request.method == 'POST':
-        if booking.reject_booking():
+        if booking.reject_booking(changed_by=request.user):
             messages.success(request, 'Booking rejected.')
         else:
             messages.error(request, 'Cannot reject this booking.')
@@ -183,8 +286,8 @@ def complete_booking(request, pk):
     if request.method == 'POST':
         form = FreelancerNotesForm(request.POST, instance=booking)
         if form.is_valid():
-            form.save()
-            if booking.complete_booking():
+            if booking.complete_booking(changed_by=request.user,
+                                       freelancer_notes=form.cleaned_data['freelancer_notes']):
                 # Mark cash payment as completed
                 if hasattr(booking, 'payment') and booking.payment.payment_method == 'cash':
                     booking.payment.mark_completed()
@@ -214,7 +317,7 @@ def cancel_booking(request, pk):
         return redirect('bookings:booking_detail', pk=pk)
     
     if request.method == 'POST':
-        if booking.cancel_booking():
+        if booking.cancel_booking(changed_by=request.user):
             messages.success(request, 'Booking cancelled successfully!')
             return redirect('bookings:my_bookings')
         else:
@@ -225,3 +328,118 @@ def cancel_booking(request, pk):
     }
     
     return render(request, 'bookings/cancel_booking.html', context)
+
+
+@login_required
+def available_slots(request, service_id):
+    """Open start times of a service for the next days, as JSON"""
+    service = get_object_or_404(Service, pk=service_id, is_active=True)
+    
+    try:
+        # Malformed and impossible dates (2026-02-30) both fall back to today
+        start = parse_date(request.GET.get('start', '')) or timezone.localdate()
+    except ValueError:
+        start = timezone.localdate()
+    try:
+        days = int(request.GET.get('days', 7))
+    except ValueError:
+        days = 7
+    days = min(max(days, 1), getattr(settings, 'BOOKING_SLOT_MAX_DAYS', 31))
+    
+    slots = availability.free_slots(service.freelancer_id, service.duration, start, start + timedelta(days=days - 1))
+    return JsonResponse({
+        'service': service.pk,
+        'duration': service.duration,
+        'slots': {
+            date.isoformat(): [timezone.localtime(slot).strftime('%H:%M') for slot in times]
+            for date, times in slots.items()
+        },
+    })
+
+
+@login_required
+def manage_availability(request):
+    """Freelancer working hours and blackout dates"""
+    if request.user.user_type != 'freelancer':
+        messages.error(request, 'Only freelancers can manage availability.')
+        return redirect('home')
+    
+    hours_form = WorkingHoursForm()
+    blackout_form = BlackoutDateForm()
+    
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        
+        if action == 'add_hours':
+            hours_form = WorkingHoursForm(request.POST)
+            if hours_form.is_valid():
+                hours = hours_form.save(commit=False)
+                clashes = WorkingHours.objects.filter(
+                    freelancer=request.user, weekday=hours.weekday,
+                    start_time__lt=hours.end_time, end_time__gt=hours.start_time,
+                )
+                if clashes.exists():
+                    hours_form.add_error(None, 'These hours overlap hours you already work on that day.')
+                else:
+                    hours.freelancer = request.user
+                    hours.save()
+                    messages.success(request, 'Working hours added.')
+                    return redirect('bookings:manage_availability')
+        
+        elif action == 'add_blackout':
+            blackout_form = BlackoutDateForm(request.POST)
+            if blackout_form.is_valid():
+                BlackoutDate.objects.update_or_create(
+                    freelancer=request.user, date=blackout_form.cleaned_data['date'],
+                    defaults={'reason': blackout_form.cleaned_data['reason']},
+                )
+                messages.success(request, 'Blackout date added.')
+                return redirect('bookings:manage_availability')
+        
+        elif action == 'delete_hours':
+            WorkingHours.objects.filter(pk=request.POST.get('pk'), freelancer=request.user).delete()
+            messages.success(request, 'Working hours removed.')
+            return redirect('bookings:manage_availability')
+        
+        elif action == 'delete_blackout':
+            BlackoutDate.objects.filter(pk=request.POST.get('pk'), freelancer=request.user).delete()
+            messages.success(request, 'Blackout date removed.')
+            return redirect('bookings:manage_availability')
+    
+    context = {
+        'working_hours': WorkingHours.objects.filter(freelancer=request.user),
+        'default_hours': getattr(settings, 'BOOKING_DEFAULT_WORKING_HOURS', ('09:00', '18:00')),
+        'blackout_dates': BlackoutDate.objects.filter(freelancer=request.user, date__gte=timezone.localdate()),
+        'hours_form': hours_form,
+        'blackout_form': blackout_form,
+    }
+    
+    return render(request, 'bookings/manage_availability.html', context)
+
+
+def _calendar_feed_etag(request, token):
+    """ETag of the feed behind token, None for unknown tokens"""
+    feed = CalendarFeed.objects.select_related('user').filter(token=token).first()
+    request.calendar_feed = feed
+    return ical.etag(feed.user) if feed else None
+
+
+@condition(etag_func=_calendar_feed_etag)
+def calendar_feed(request, token):
+    """iCalendar feed of a user's accepted and completed bookings"""
+    feed = request.calendar_feed
+    if feed is None:
+        raise Http404
+    
+    response = HttpResponse(ical.render(feed.user, request.get_host()), content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="bookings.ics"'
+    return response
+
+
+@login_required
+@require_POST
+def reset_calendar_feed(request):
+    """Give the user a new feed URL, the old one stops working"""
+    CalendarFeed.for_user(request.user).reset_token()
+    messages.success(request, 'Your calendar link has been reset. Subscribe again with the new link.')
+    return redirect('bookings:my_bookings')
@@ -0,0 +1,98 @@
+"""
+Keyset (cursor) pagination shared by the listing views.
+
+Pages are fetched with a WHERE clause on the ordering columns of the last row
+seen instead of OFFSET, so a deep page costs the same as the first one. The
+cursor handed to clients is a signed, opaque token of those column values.
+"""
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = 'freelancer_platform.pagination'
+
+
+def encode_cursor(values):
+    """Turn a list of ordering values into an opaque token"""
+    return signing.dumps(values, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    """Return ordering values for a token, or None if it is missing/invalid"""
+    if not token:
+        return None
+    try:
+        values = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    return values if isinstance(values, list) else None
+
+
+class KeysetPage:
+    """One page of results plus the cursor for the following page"""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on a unique ordering, e.g. ('-created_at', '-id').
+
+    The last ordering field must be unique (normally the primary key) so that
+    rows sharing the other values are neither skipped nor repeated.
+    """
+
+    def __init__(self, queryset, ordering=('-created_at', '-id'), per_page=12):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def _after(self, values):
+        """Q object selecting rows that sort strictly after values"""
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            field = self.fields[index]
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            branch = Q(**{f'{field}__{lookup}': values[index]})
+            for previous in range(index):
+                branch &= Q(**{self.fields[previous]: values[previous]})
+            condition |= branch
+        return condition
+
+    def cursor_for(self, obj):
+        """Cursor pointing just after obj"""
+        values = []
+        for field in self.fields:
+            value = obj[field] if isinstance(obj, dict) else getattr(obj, field)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif not isinstance(value, (int, float, str)):
+                value = str(value)
+            values.append(value)
+        return encode_cursor(values)
+
+    def page(self, cursor=None):
+        """Return the page following cursor (the first page when cursor is None)"""
+        queryset = self.queryset.order_by(*self.ordering)
+        values = decode_cursor(cursor)
+        if values is not None and len(values) == len(self.fields):
+            queryset = queryset.filter(self._after(values))
+
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.cursor_for(rows[-1])
+        return KeysetPage(rows, next_cursor)
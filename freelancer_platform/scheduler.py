@@ -0,0 +1,98 @@
+"""
+Periodic jobs run by `manage.py run_scheduler`.
+
+Apps register jobs from their AppConfig.ready() with register(). Any number
+of scheduler processes may run (for example one next to every gunicorn
+replica): each ScheduledJob row carries a lease, and a process runs a due job
+only after taking the lease with a single conditional UPDATE, so a run
+happens exactly once. A process that dies mid-run releases the job when its
+lease expires.
+
+Every run records its duration, and failures their traceback, on the job row;
+successful runs also record when they started in last_succeeded_at.
+"""
+import os
+import socket
+import time
+import traceback
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+Job = namedtuple('Job', 'name func every lease')
+
+JOBS = {}
+
+
+def register(name, func, every, lease=None):
+    """
+    Run func every `every` (a timedelta). A run that lasts longer than lease
+    (default SCHEDULER_LEASE_SECONDS) may be started again elsewhere.
+    """
+    if lease is None:
+        lease = timedelta(seconds=getattr(settings, 'SCHEDULER_LEASE_SECONDS', 600))
+    JOBS[name] = Job(name, func, every, lease)
+
+
+def owner_id():
+    """Name of this process in lease_owner"""
+    return f'{socket.gethostname()}:{os.getpid()}'[:100]
+
+
+def acquire(job, owner, now=None):
+    """Take the lease of a due job, True when this process won it"""
+    from accounts.models import ScheduledJob
+
+    now = now or timezone.now()
+    ScheduledJob.objects.get_or_create(name=job.name, defaults={'next_run_at': now})
+    return bool(ScheduledJob.objects.filter(
+        Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now),
+        name=job.name, next_run_at__lte=now,
+    ).update(lease_owner=owner, lease_expires_at=now + job.lease, last_started_at=now))
+
+
+def run(job, owner):
+    """Run a job whose lease this process holds and record the outcome"""
+    from accounts.models import ScheduledJob
+
+    started = time.monotonic()
+    error = ''
+    try:
+        job.func()
+    except Exception:
+        error = traceback.format_exc()
+    duration = time.monotonic() - started
+
+    now = timezone.now()
+    outcome = {
+        'next_run_at': now + job.every,
+        'lease_owner': '',
+        'lease_expires_at': None,
+        'last_duration': duration,
+        'max_duration': Greatest(F('max_duration'), duration),
+        'total_duration': F('total_duration') + duration,
+        'run_count': F('run_count') + 1,
+    }
+    if error:
+        outcome.update(failure_count=F('failure_count') + 1, last_failed_at=now, last_error=error)
+    else:
+        # Jobs that catch up on missed work read where the last good run started
+        outcome['last_succeeded_at'] = F('last_started_at')
+    # A run that outlived its lease may have been taken over, only its owner records
+    ScheduledJob.objects.filter(name=job.name, lease_owner=owner).update(**outcome)
+    return not error, duration
+
+
+def run_pending(owner=None):
+    """Run every due job this process can lease, returns [(name, succeeded, seconds)]"""
+    owner = owner or owner_id()
+    results = []
+    for job in JOBS.values():
+        if acquire(job, owner):
+            succeeded, duration = run(job, owner)
+            results.append((job.name, succeeded, duration))
+    return results
@@ -116,6 +116,24 @@ if DATABASE_URL:
     )
 
 
+# Cache
+# Per-process memory by default, as Django itself defaults to. Search result
+# pages, facet counts, suggestion logs and the dashboard stats are shared
+# state, so production must set CACHE_BACKEND/CACHE_LOCATION to a cache every
+# worker sees, e.g. django.core.cache.backends.redis.RedisCache with
+# redis://host:6379/0. Those keys are numerous, so the backends that cull
+# keep more than Django's default 300 entries.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+if CACHE_BACKEND.rsplit('.', 1)[-1] in ('LocMemCache', 'FileBasedCache', 'DatabaseCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))}
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -179,6 +197,21 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 # Booking cancellation time limit (in hours)
 BOOKING_CANCELLATION_HOURS = 0.5  # 30 minutes
 
+# Working hours of freelancers who have not set their own, every day of the week
+BOOKING_DEFAULT_WORKING_HOURS = ('09:00', '18:00')
+
+# Minutes between the offered booking start times
+BOOKING_SLOT_STEP_MINUTES = 30
+
+# Most days of open slots returned at once
+BOOKING_SLOT_MAX_DAYS = 31
+
+# Stale pending bookings cancelled per transaction by the expiry job
+BOOKING_EXPIRY_BATCH_SIZE = 500
+
+# Days of past bookings kept in the iCalendar feeds
+CALENDAR_FEED_PAST_DAYS = 30
+
 # Razorpay Configuration (Demo Keys)
 RAZORPAY_KEY_ID = 'rzp_test_1DP5mmOlF5G5ag'  # Replace with your test key
 RAZORPAY_KEY_SECRET = 'YOUR_SECRET_KEY_HERE'  # Replace with your secret key
@@ -204,3 +237,38 @@ PAYMENT_METHODS = {
 
 # OTP Configuration
 OTP_EXPIRY_MINUTES = 10
+
+# Services shown per page on keyset-paginated listings
+SERVICE_LIST_PAGE_SIZE = 12
+
+# Seconds the service search sidebar facet counts are cached for
+SERVICE_FACET_CACHE_SECONDS = 300
+
+# Seconds a cached page of service search result ids is kept
+SERVICE_SEARCH_CACHE_SECONDS = 600
+
+# Half-life of a booking's contribution to the "popular" service sort
+SERVICE_POPULARITY_HALF_LIFE_DAYS = 30
+
+# Seconds the admin dashboard statistics are cached for
+ADMIN_DASHBOARD_CACHE_SECONDS = 60
+
+# Bookings per page on the dashboard booking tabs
+DASHBOARD_BOOKINGS_PER_PAGE = 10
+
+# Bookings per page on the keyset-paginated My Bookings list
+BOOKINGS_PER_PAGE = 20
+
+# Rows fetched per database round trip by the streaming booking export
+BOOKING_EXPORT_CHUNK_SIZE = 2000
+
+# Bayesian prior of the freelancer leaderboards: every freelancer starts with
+# this many reviews at this rating, so a few reviews cannot outrank many
+LEADERBOARD_PRIOR_REVIEWS = 10
+LEADERBOARD_PRIOR_RATING = 3.5
+
+# Seconds a scheduler process holds a job before another one may take it over
+SCHEDULER_LEASE_SECONDS = 600
+
+# Seconds run_scheduler sleeps between looking for due jobs
+SCHEDULER_POLL_SECONDS = 30
@@ -0,0 +1,12 @@
+"""
+Settings shared by the test suites: an in-process cache, so tests never see
+each other's cached pages or counters, and a fast password hasher.
+"""
+from django.test import override_settings
+
+TEST_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+}
+
+test_settings = override_settings(**TEST_SETTINGS)
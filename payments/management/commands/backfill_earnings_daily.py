@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+from accounts.models import FreelancerProfile
+from payments.models import FreelancerEarningsDaily, Payment, Refund
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the FreelancerEarningsDaily rollup and freelancer total earnings from payment and refund history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of rows written per batch')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        days = {}
+
+        def day(freelancer_id, date):
+            return days.setdefault((freelancer_id, date), FreelancerEarningsDaily(
+                freelancer_id=freelancer_id, date=date, gross=0, refunded=0, count=0,
+            ))
+
+        # Refunded payments were completed first, their refund is booked separately
+        # created_at stands in for payments completed before payment_date was recorded
+        received = Payment.objects.filter(
+            status__in=['completed', 'refunded'],
+        ).order_by().values(
+            'booking__freelancer_id', date=TruncDate(Coalesce('payment_date', 'created_at')),
+        ).annotate(
+            gross=Sum('amount'), count=Count('pk'),
+        )
+        for row in received:
+            entry = day(row['booking__freelancer_id'], row['date'])
+            entry.gross = row['gross']
+            entry.count = row['count']
+
+        refunds = Refund.objects.filter(status='processed').order_by().values(
+            'booking__freelancer_id', date=TruncDate(Coalesce('processed_at', 'requested_at')),
+        ).annotate(refunded=Sum('amount'))
+        for row in refunds:
+            day(row['booking__freelancer_id'], row['date']).refunded = row['refunded']
+
+        totals = {}
+        for entry in days.values():
+            totals[entry.freelancer_id] = totals.get(entry.freelancer_id, 0) + entry.gross - entry.refunded
+        profiles = list(FreelancerProfile.objects.only('pk', 'user_id', 'total_earnings'))
+        for profile in profiles:
+            profile.total_earnings = totals.get(profile.user_id, 0)
+
+        with transaction.atomic():
+            FreelancerEarningsDaily.objects.all().delete()
+            FreelancerEarningsDaily.objects.bulk_create(days.values(), batch_size=options['batch_size'])
+            FreelancerProfile.objects.bulk_update(profiles, ['total_earnings'], batch_size=options['batch_size'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(days)} daily earnings rows in {elapsed:.2f}s'))
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0002_payment_payment_details_alter_payment_payment_method_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FreelancerEarningsDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('gross', models.DecimalField(decimal_places=2, default=0, help_text='Completed payments received', max_digits=12)),
+                ('refunded', models.DecimalField(decimal_places=2, default=0, help_text='Refunds processed', max_digits=12)),
+                ('count', models.IntegerField(default=0, help_text='Number of completed payments')),
+                ('freelancer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='earnings_daily', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Freelancer daily earnings',
+                'ordering': ['-date'],
+                'unique_together': {('freelancer', 'date')},
+            },
+        ),
+    ]
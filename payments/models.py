@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Sum
 from django.utils import timezone
-from accounts.models import User
+from accounts.models import User, FreelancerProfile
+from accounts import analytics, platform_stats
 from bookings.models import Booking
 
 class Payment(models.Model):
@@ -38,12 +40,37 @@ class Payment(models.Model):
         return f"Payment #{self.id} - Booking #{self.booking.id} - {self.get_payment_method_display()}"
     
     def mark_completed(self, transaction_id=None):
-        """Mark payment as completed"""
-        self.status = 'completed'
-        self.payment_date = timezone.now()
+        """
+        Mark payment as completed. Every completed payment goes through here:
+        the conditional UPDATE lets only the first completion of a payment
+        count towards earnings, GMV and the platform counters. Returns False
+        when the payment was already completed.
+        """
+        now = timezone.now()
+        fields = {'status': 'completed', 'payment_date': now, 'updated_at': now}
         if transaction_id:
-            self.transaction_id = transaction_id
-        self.save()
+            fields['transaction_id'] = transaction_id
+        with transaction.atomic():
+            if not Payment.objects.filter(pk=self.pk).exclude(status='completed').update(**fields):
+                return False
+            for name, value in fields.items():
+                setattr(self, name, value)
+            
+            # Queryset updates skip the save signals, count the payment here
+            state = ('completed', self.amount)
+            platform_stats.apply(platform_stats.difference('payments.Payment', None, state))
+            self._platform_stats_state = state
+            self.record_earnings(gross=self.amount, count=1)
+            analytics.record_payment(self)
+        return True
+    
+    def record_earnings(self, gross=0, refunded=0, count=0):
+        """Add money received or refunded today to the freelancer's earnings rollups"""
+        freelancer_id = self.booking.freelancer_id
+        FreelancerEarningsDaily.add(freelancer_id, timezone.localdate(), gross=gross, refunded=refunded, count=count)
+        FreelancerProfile.objects.filter(user_id=freelancer_id).update(
+            total_earnings=F('total_earnings') + gross - refunded
+        )
     
     def mark_failed(self, reason=""):
         """Mark payment as failed"""
@@ -102,10 +129,15 @@ class Refund(models.Model):
     def process_refund(self):
         """Mark refund as processed"""
         if self.status == 'approved':
+            payment = self.payment
+            was_completed = payment.status == 'completed'
             self.status = 'processed'
-            self.payment.status = 'refunded'
-            self.payment.save()
-            self.save()
+            payment.status = 'refunded'
+            with transaction.atomic():
+                payment.save()
+                self.save()
+                if was_completed:
+                    payment.record_earnings(refunded=self.amount)
             return True
         return False
     
@@ -134,3 +166,64 @@ class Transaction(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+
+
+class FreelancerEarningsDaily(models.Model):
+    """
+    Money a freelancer received and refunded per day, so earnings reports read
+    one row per day instead of every payment. Written by
+    Payment.mark_completed, which every completed payment goes through, and
+    Refund.process_refund; rebuilt from history by the backfill_earnings_daily
+    command.
+    """
+    freelancer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='earnings_daily')
+    date = models.DateField()
+    gross = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                help_text="Completed payments received")
+    refunded = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                   help_text="Refunds processed")
+    count = models.IntegerField(default=0, help_text="Number of completed payments")
+    
+    def __str__(self):
+        return f"Earnings of {self.freelancer.username} on {self.date}"
+    
+    @property
+    def net(self):
+        return self.gross - self.refunded
+    
+    @classmethod
+    def add(cls, freelancer_id, date, gross=0, refunded=0, count=0):
+        """Increment one day's row, creating it on the first payment of the day"""
+        rows = cls.objects.filter(freelancer_id=freelancer_id, date=date)
+        changes = {
+            'gross': F('gross') + gross,
+            'refunded': F('refunded') + refunded,
+            'count': F('count') + count,
+        }
+        if rows.update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(freelancer_id=freelancer_id, date=date, gross=gross,
+                                   refunded=refunded, count=count)
+        except IntegrityError:
+            # Created concurrently
+            rows.update(**changes)
+    
+    @classmethod
+    def summary(cls, freelancer, start=None, end=None):
+        """Gross, refunded, net and payment count between two dates (inclusive)"""
+        rows = cls.objects.filter(freelancer=freelancer)
+        if start:
+            rows = rows.filter(date__gte=start)
+        if end:
+            rows = rows.filter(date__lte=end)
+        totals = rows.aggregate(gross=Sum('gross'), refunded=Sum('refunded'), count=Sum('count'))
+        totals = {name: value or 0 for name, value in totals.items()}
+        totals['net'] = totals['gross'] - totals['refunded']
+        return totals
+    
+    class Meta:
+        verbose_name_plural = 'Freelancer daily earnings'
+        ordering = ['-date']
+        unique_together = ['freelancer', 'date']
@@ -0,0 +1,79 @@
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import analytics, platform_stats
+from accounts.models import FreelancerProfile, User
+from bookings.models import Booking
+from freelancer_platform.testing import test_settings
+from services.models import Category, Service
+
+from .models import FreelancerEarningsDaily, Payment, Refund
+
+
+@test_settings
+class MarkCompletedTests(TestCase):
+    """A payment counts towards earnings, GMV and the counters exactly once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.customer = User.objects.create_user('customer', password='x', user_type='customer')
+        cls.admin = User.objects.create_user('admin', password='x', user_type='admin')
+        service = Service.objects.create(
+            freelancer=cls.freelancer, category=Category.objects.create(name='Plumbing'),
+            title='Leak repair', description='Pipes', price=Decimal('1450'), duration=60, is_approved=True,
+        )
+        booking = Booking.objects.create(
+            customer=cls.customer, freelancer=cls.freelancer, service=service,
+            booking_date=timezone.localdate() + timedelta(days=1), booking_time=time(10),
+            total_amount=service.price,
+        )
+        cls.payment = Payment.objects.create(booking=booking, customer=cls.customer, amount=service.price,
+                                             payment_method='razorpay', status='pending')
+
+    def earnings(self):
+        profile = FreelancerProfile.objects.get(user=self.freelancer)
+        day = FreelancerEarningsDaily.objects.filter(freelancer=self.freelancer, date=timezone.localdate()).first()
+        return profile.total_earnings, (day.gross, day.refunded, day.count) if day else None
+
+    def gmv(self):
+        today = timezone.localdate()
+        return dict(analytics.series('gmv', 'day', today, today)[None])[today]
+
+    def test_completion_is_counted_once(self):
+        stale = Payment.objects.get(pk=self.payment.pk)
+        self.assertTrue(self.payment.mark_completed('pay_123'))
+        # A second request still holding the pending payment
+        self.assertEqual(stale.status, 'pending')
+        self.assertFalse(stale.mark_completed('pay_456'))
+        self.assertFalse(self.payment.mark_completed())
+
+        payment = Payment.objects.get(pk=self.payment.pk)
+        self.assertEqual((payment.status, payment.transaction_id), ('completed', 'pay_123'))
+        self.assertIsNotNone(payment.payment_date)
+        self.assertEqual(self.earnings(), (Decimal('1450'), (Decimal('1450'), Decimal('0'), 1)))
+        self.assertEqual(self.gmv(), Decimal('1450'))
+        self.assertEqual(platform_stats.totals()['completed_payments'], 1)
+        self.assertEqual(platform_stats.reconcile(), {})
+
+    def test_refund_is_taken_off_earnings(self):
+        self.payment.mark_completed('pay_123')
+        refund = Refund.objects.create(payment=self.payment, booking=self.payment.booking, amount=Decimal('450'),
+                                       reason='Partial job', requested_by=self.customer)
+        refund.approve_refund(self.admin)
+        refund.process_refund()
+        self.assertEqual(self.earnings(), (Decimal('1000'), (Decimal('1450'), Decimal('450'), 1)))
+        self.assertEqual(platform_stats.reconcile(), {})
+
+    def test_confirming_twice_counts_once(self):
+        self.client.force_login(self.customer)
+        url = reverse('payments:confirm_payment', args=[self.payment.pk])
+        for _ in range(2):
+            self.client.post(url, {'transaction_id': 'pay_123'})
+        self.assertEqual(self.earnings()[0], Decimal('1450'))
+        self.assertEqual(platform_stats.reconcile(), {})
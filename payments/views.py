@@ -34,8 +34,10 @@ def confirm_payment(request, payment_id):
         transaction_id = request.POST.get('transaction_id', '')
         
         if transaction_id:
-            payment.mark_completed(transaction_id)
-            messages.success(request, 'Payment confirmed successfully!')
+            if payment.mark_completed(transaction_id):
+                messages.success(request, 'Payment confirmed successfully!')
+            else:
+                messages.info(request, 'Payment already completed.')
             return redirect('bookings:booking_detail', pk=payment.booking.id)
         else:
             messages.error(request, 'Please enter transaction ID.')
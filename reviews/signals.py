@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Review
+from services import scores
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_service_rating(sender, instance, **kwargs):
+    """Keep the per-service rating used by the top-rated sort current"""
+    scores.refresh_rating(instance.booking.service_id)
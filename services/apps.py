@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'services'
+    
+    def ready(self):
+        import services.signals
+        
+        from datetime import timedelta
+        from freelancer_platform import scheduler
+        from . import jobs
+        scheduler.register('services.refresh_price_histograms', jobs.refresh_price_histograms,
+                           every=timedelta(minutes=5))
@@ -0,0 +1,139 @@
+"""
+Maintenance of ServiceSearchDocument rows.
+
+Documents are written from the source models by the signal handlers in
+services/signals.py; rebuild_documents() recreates the whole table.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+
+from .facets import price_bucket
+from .models import Service, ServiceSearchDocument
+from .scores import compute_scores
+
+DOCUMENT_RELATED = ('category', 'subcategory', 'freelancer', 'freelancer__freelancer_profile')
+
+# Columns owned by services/scores.py rather than copied from the service
+SCORE_FIELDS = ('avg_rating', 'review_count', 'completed_bookings', 'popularity')
+
+# Columns the price histograms depend on
+PRICE_STATE = ('category_id', 'price', 'is_listed')
+
+
+def _rating(freelancer):
+    profile = getattr(freelancer, 'freelancer_profile', None)
+    return profile.rating if profile else 0
+
+
+def build_document(service):
+    """Unsaved ServiceSearchDocument for a service"""
+    freelancer = service.freelancer
+    return ServiceSearchDocument(
+        service_id=service.pk,
+        is_listed=service.is_active and service.is_approved and freelancer.is_verified,
+        title=service.title,
+        description=service.description,
+        price=service.price,
+        duration=service.duration,
+        image=service.image.name if service.image else None,
+        created_at=service.created_at,
+        category_id=service.category_id,
+        category_name=service.category.name,
+        subcategory_name=service.subcategory.name if service.subcategory_id else '',
+        freelancer_id=freelancer.pk,
+        freelancer_name=freelancer.get_full_name(),
+        city=freelancer.city,
+        area=freelancer.area,
+        pincode=freelancer.pincode,
+        latitude=freelancer.latitude,
+        longitude=freelancer.longitude,
+        rating=_rating(freelancer),
+    )
+
+
+def sync_service(service):
+    """
+    Create or refresh the document of one service, keeping its sort scores.
+    
+    Returns the document's PRICE_STATE values before and after (None when
+    there was no document), so callers can tell whether price facts changed.
+    """
+    document = build_document(service)
+    fields = {
+        field.attname: getattr(document, field.attname)
+        for field in ServiceSearchDocument._meta.concrete_fields
+        if not field.primary_key and field.name not in SCORE_FIELDS
+    }
+    before = ServiceSearchDocument.objects.filter(pk=service.pk).values_list(*PRICE_STATE).first()
+    if before is None:
+        document.save()
+    else:
+        ServiceSearchDocument.objects.filter(pk=service.pk).update(**fields)
+    return before, tuple(getattr(document, name) for name in PRICE_STATE)
+
+
+def sync_freelancer(user):
+    """
+    Copy freelancer fields onto all of their service documents.
+    
+    Returns the {(category_id, price bucket): count} change in listed
+    services, for price_histogram.apply().
+    """
+    ServiceSearchDocument.objects.filter(freelancer=user).update(
+        freelancer_name=user.get_full_name(),
+        city=user.city,
+        area=user.area,
+        pincode=user.pincode,
+        latitude=user.latitude,
+        longitude=user.longitude,
+    )
+    # Listing depends on service flags as well, so split on verification
+    documents = ServiceSearchDocument.objects.filter(freelancer=user)
+    if user.is_verified:
+        flipped, sign = documents.filter(is_listed=False, service__is_active=True, service__is_approved=True), 1
+    else:
+        flipped, sign = documents.filter(is_listed=True), -1
+    changes = Counter({
+        (row['category_id'], row['bucket']): sign * row['count']
+        for row in flipped.order_by().annotate(bucket=price_bucket()).values(
+            'category_id', 'bucket',
+        ).annotate(count=Count('pk'))
+    })
+    if changes:
+        flipped.update(is_listed=sign > 0)
+    return changes
+
+
+def sync_rating(profile):
+    """Copy a freelancer's rating onto their service documents"""
+    ServiceSearchDocument.objects.filter(freelancer_id=profile.user_id).update(rating=profile.rating)
+
+
+def sync_category(category):
+    """Copy a renamed category onto its service documents"""
+    ServiceSearchDocument.objects.filter(category=category).update(category_name=category.name)
+
+
+def rebuild_documents(batch_size=1000):
+    """Recreate every document from the source tables, returns rows written"""
+    total = 0
+    with transaction.atomic():
+        ServiceSearchDocument.objects.all().delete()
+        scores = compute_scores()
+        services = Service.objects.select_related(*DOCUMENT_RELATED).order_by('pk')
+        batch = []
+        for service in services.iterator(chunk_size=batch_size):
+            document = build_document(service)
+            for name, value in scores.get(service.pk, {}).items():
+                setattr(document, name, value)
+            batch.append(document)
+            if len(batch) >= batch_size:
+                ServiceSearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            ServiceSearchDocument.objects.bulk_create(batch)
+            total += len(batch)
+    return total
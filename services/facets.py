@@ -0,0 +1,102 @@
+"""
+Sidebar facet counts for the service search page.
+
+Category, price bucket and city counts for a filtered ServiceSearchDocument
+queryset are computed with a single GROUP BY over all three dimensions and
+rolled up in Python, then cached under the normalized ServiceSearchForm
+filter key and the search generation from services/result_cache.py. While a
+category is chosen, category counts come from a second GROUP BY without that
+filter, so the other categories still show what choosing them would give.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from . import result_cache
+
+CACHE_PREFIX = 'service_facets'
+
+# (label, lower bound inclusive, upper bound exclusive) in INR
+PRICE_BUCKETS = (
+    ('Under ₹500', None, Decimal('500')),
+    ('₹500 - ₹1,000', Decimal('500'), Decimal('1000')),
+    ('₹1,000 - ₹2,500', Decimal('1000'), Decimal('2500')),
+    ('₹2,500 - ₹5,000', Decimal('2500'), Decimal('5000')),
+    ('₹5,000 and above', Decimal('5000'), None),
+)
+
+
+def price_bucket():
+    """Expression mapping price to its PRICE_BUCKETS index"""
+    whens = []
+    for index, (label, low, high) in enumerate(PRICE_BUCKETS):
+        if high is None:
+            continue
+        whens.append(When(price__lt=high, then=Value(index)))
+    return Case(*whens, default=Value(len(PRICE_BUCKETS) - 1), output_field=IntegerField())
+
+
+def compute_facets(services):
+    """Category, price bucket and city counts for a ServiceSearchDocument queryset"""
+    rows = services.order_by().annotate(
+        bucket=price_bucket(),
+    ).values('category_id', 'city', 'bucket').annotate(count=Count('pk'))
+
+    categories = {}
+    cities = {}
+    buckets = [0] * len(PRICE_BUCKETS)
+    total = 0
+    for row in rows:
+        count = row['count']
+        total += count
+        categories[row['category_id']] = categories.get(row['category_id'], 0) + count
+        buckets[row['bucket']] += count
+        city = (row['city'] or '').strip().title()
+        if city:
+            cities[city] = cities.get(city, 0) + count
+
+    return {
+        'total': total,
+        'categories': categories,
+        'price_buckets': [
+            {
+                'label': label,
+                'min': str(low) if low is not None else None,
+                'max': str(high) if high is not None else None,
+                'count': buckets[index],
+            }
+            for index, (label, low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        'cities': sorted(cities.items(), key=lambda item: (-item[1], item[0])),
+    }
+
+
+def category_counts(services):
+    """{category_id: count} for a ServiceSearchDocument queryset"""
+    rows = services.order_by().values('category_id').annotate(count=Count('pk'))
+    return {row['category_id']: row['count'] for row in rows}
+
+
+def cache_key(filter_key):
+    return result_cache.make_key(CACHE_PREFIX, filter_key)
+
+
+def get_facets(build_queryset, filter_key, build_category_queryset=None):
+    """
+    Cached compute_facets keyed by the normalized search filters.
+    
+    build_queryset returns the filtered document queryset and is only called
+    on a cache miss. build_category_queryset, given while a category filter
+    is active, returns the same queryset without that filter; the category
+    counts are taken from it.
+    """
+    key = cache_key(filter_key)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(build_queryset())
+        if build_category_queryset is not None:
+            facets['categories'] = category_counts(build_category_queryset())
+        cache.set(key, facets, getattr(settings, 'SERVICE_FACET_CACHE_SECONDS', 300))
+    return facets
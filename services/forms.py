@@ -1,4 +1,6 @@
+from decimal import Decimal
 from django import forms
+from django.db import models
 from .models import Service, Category, SubCategory
 
 class ServiceForm(forms.ModelForm):
@@ -21,6 +23,24 @@ class ServiceForm(forms.ModelForm):
 
 
 class ServiceSearchForm(forms.Form):
+    SORT_CHOICES = (
+        ('', 'Recommended'),
+        ('price_asc', 'Price: Low to High'),
+        ('price_desc', 'Price: High to Low'),
+        ('rating', 'Rating: High to Low'),
+        ('popular', 'Most Popular'),
+        ('most_booked', 'Most Booked'),
+    )
+    
+    # Keyset ordering for each sort, the last field must be unique
+    SORT_ORDERING = {
+        'price_asc': ('price', 'service_id'),
+        'price_desc': ('-price', '-service_id'),
+        'rating': ('-avg_rating', '-service_id'),
+        'popular': ('-popularity', '-service_id'),
+        'most_booked': ('-completed_bookings', '-service_id'),
+    }
+    
     query = forms.CharField(required=False, widget=forms.TextInput(attrs={
         'class': 'form-control',
         'placeholder': 'Search services...'
@@ -43,6 +63,10 @@ class ServiceSearchForm(forms.Form):
         'class': 'form-control',
         'placeholder': 'Pincode'
     }))
+    radius = forms.IntegerField(required=False, min_value=1, max_value=500, widget=forms.NumberInput(attrs={
+        'class': 'form-control',
+        'placeholder': 'Within km of pincode'
+    }))
     min_price = forms.DecimalField(required=False, widget=forms.NumberInput(attrs={
         'class': 'form-control',
         'placeholder': 'Min Price'
@@ -51,3 +75,25 @@ class ServiceSearchForm(forms.Form):
         'class': 'form-control',
         'placeholder': 'Max Price'
     }))
+    sort = forms.ChoiceField(required=False, choices=SORT_CHOICES, widget=forms.Select(attrs={
+        'class': 'form-control'
+    }))
+    
+    def filter_key(self):
+        """Canonical string for the cleaned filters, used to build cache keys"""
+        if not self.is_valid():
+            return ''
+        
+        parts = []
+        for name in sorted(self.fields):
+            value = self.cleaned_data.get(name)
+            if value in (None, ''):
+                continue
+            if isinstance(value, models.Model):
+                value = value.pk
+            elif isinstance(value, Decimal):
+                value = f'{value.normalize():f}'
+            elif isinstance(value, str):
+                value = ' '.join(value.lower().split())
+            parts.append(f'{name}={value}')
+        return '&'.join(parts)
@@ -0,0 +1,7 @@
+"""Periodic jobs of the services app, registered in apps.py"""
+from . import price_histogram
+
+
+def refresh_price_histograms():
+    """Recompute price ranges and percentiles of histograms changed since the last run"""
+    price_histogram.refresh_stale()
@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.models import User
+from services import search
+from services.models import Category, Service
+
+WORDS = [
+    'home', 'electrical', 'repair', 'wiring', 'plumbing', 'leak', 'bathroom', 'kitchen',
+    'cleaning', 'deep', 'sofa', 'carpet', 'bridal', 'makeup', 'hair', 'spa', 'tuition',
+    'mathematics', 'science', 'yoga', 'fitness', 'painting', 'interior', 'carpentry',
+    'furniture', 'garden', 'landscaping', 'photography', 'wedding', 'video', 'laptop',
+    'mobile', 'website', 'design', 'logo', 'catering', 'cooking', 'ac', 'installation',
+    'service', 'professional', 'expert', 'traditional', 'kerala', 'modern', 'quick',
+]
+
+QUERIES = ['plumbing', 'bridal makeup', 'ac repair', 'kerala wedding photography', 'zzzz']
+
+# Ids fetched per query, as a deep results listing would
+RESULT_LIMIT = 1000
+
+
+class Command(BaseCommand):
+    help = 'Compare icontains search with the full-text index on synthetic data (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='Catalogue sizes to benchmark')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per query, the median is reported')
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.ERROR('Full-text search is not available on this database.'))
+            return
+
+        with transaction.atomic():
+            self._run(sorted(options['sizes']), options['repeat'])
+            transaction.set_rollback(True)
+
+    def _run(self, sizes, repeat):
+        rng = random.Random(42)
+        freelancer = User.objects.create(username='benchmark_freelancer', user_type='freelancer',
+                                         is_verified=True)
+        categories = [Category.objects.create(name=f'Benchmark {i}') for i in range(10)]
+
+        self.stdout.write(f"{'services':>10} {'query':<28} {'like ms':>10} {'fts ms':>10} {'speedup':>8}")
+        created = 0
+        for size in sizes:
+            batch = []
+            while created < size:
+                words = rng.sample(WORDS, 4)
+                batch.append(Service(
+                    freelancer=freelancer,
+                    category=rng.choice(categories),
+                    title=' '.join(words[:3]).title(),
+                    description=' '.join(rng.choice(WORDS) for _ in range(25)),
+                    price=Decimal(rng.randint(200, 5000)),
+                    duration=60,
+                    is_approved=True,
+                ))
+                created += 1
+                if len(batch) == 5000:
+                    Service.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                Service.objects.bulk_create(batch)
+            search.rebuild_index()
+
+            for query in QUERIES:
+                like_ms = self._time(repeat, lambda: list(Service.objects.filter(
+                    Q(title__icontains=query) |
+                    Q(description__icontains=query) |
+                    Q(category__name__icontains=query)
+                ).values_list('pk', flat=True)[:RESULT_LIMIT]))
+                fts_ms = self._time(repeat, lambda: list(search.filter_queryset(
+                    Service.objects.all(), query,
+                ).values_list('pk', flat=True)[:RESULT_LIMIT]))
+                speedup = like_ms / fts_ms if fts_ms else float('inf')
+                self.stdout.write(f'{size:>10} {query:<28} {like_ms:>10.2f} {fts_ms:>10.2f} {speedup:>7.1f}x')
+
+    def _time(self, repeat, func):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
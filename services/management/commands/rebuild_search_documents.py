@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from services import documents, price_histogram, result_cache
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized ServiceSearchDocument table and price histograms from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of documents written per batch')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = documents.rebuild_documents(batch_size=options['batch_size'])
+        price_histogram.rebuild()
+        result_cache.bump_generation()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} search documents in {elapsed:.2f}s'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from services import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the service full-text search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Number of services written per batch')
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING(
+                'Full-text search is not available on this database; searches use icontains.'
+            ))
+            return
+
+        started = time.perf_counter()
+        total = search.rebuild_index(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} services in {elapsed:.2f}s'))
@@ -0,0 +1,54 @@
+from django.db import migrations
+
+# Copy of the services.search index helpers as of this migration
+FTS_TABLE = 'services_service_fts'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(title, description, category, tokenize='unicode61 remove_diacritics 2')"
+        )
+        insert = f"INSERT INTO {FTS_TABLE} (rowid, title, description, category) VALUES (%s, %s, %s, %s)"
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {FTS_TABLE} ("
+            f"service_id bigint PRIMARY KEY REFERENCES services_service(id) ON DELETE CASCADE, "
+            f"document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {FTS_TABLE}_document_gin ON {FTS_TABLE} USING GIN (document)"
+        )
+        insert = (
+            f"INSERT INTO {FTS_TABLE} (service_id, document) VALUES (%s, "
+            f"setweight(to_tsvector('simple', %s), 'A') || "
+            f"setweight(to_tsvector('simple', %s), 'C') || "
+            f"setweight(to_tsvector('simple', %s), 'B')) "
+            f"ON CONFLICT (service_id) DO UPDATE SET document = EXCLUDED.document"
+        )
+    else:
+        return
+
+    Service = apps.get_model('services', 'Service')
+    rows = list(Service.objects.values_list('pk', 'title', 'description', 'category__name'))
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(insert, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_service_is_approved'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_documents(apps, schema_editor):
+    Service = apps.get_model('services', 'Service')
+    FreelancerProfile = apps.get_model('accounts', 'FreelancerProfile')
+    ServiceSearchDocument = apps.get_model('services', 'ServiceSearchDocument')
+    ratings = dict(FreelancerProfile.objects.values_list('user_id', 'rating'))
+    documents = []
+    for service in Service.objects.select_related('category', 'subcategory', 'freelancer').iterator():
+        freelancer = service.freelancer
+        documents.append(ServiceSearchDocument(
+            service_id=service.pk,
+            is_listed=service.is_active and service.is_approved and freelancer.is_verified,
+            title=service.title,
+            description=service.description,
+            price=service.price,
+            duration=service.duration,
+            image=service.image.name if service.image else None,
+            created_at=service.created_at,
+            category_id=service.category_id,
+            category_name=service.category.name,
+            subcategory_name=service.subcategory.name if service.subcategory_id else '',
+            freelancer_id=freelancer.pk,
+            freelancer_name=f'{freelancer.first_name} {freelancer.last_name}'.strip(),
+            city=freelancer.city,
+            area=freelancer.area,
+            pincode=freelancer.pincode,
+            latitude=freelancer.latitude,
+            longitude=freelancer.longitude,
+            rating=ratings.get(freelancer.pk, 0),
+        ))
+    ServiceSearchDocument.objects.bulk_create(documents, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0003_user_location'),
+        ('services', '0003_service_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceSearchDocument',
+            fields=[
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='services.service')),
+                ('is_listed', models.BooleanField(default=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('duration', models.IntegerField()),
+                ('image', models.ImageField(blank=True, null=True, upload_to='services/')),
+                ('created_at', models.DateTimeField()),
+                ('category_name', models.CharField(max_length=100)),
+                ('subcategory_name', models.CharField(blank=True, max_length=100)),
+                ('freelancer_name', models.CharField(max_length=300)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('area', models.CharField(blank=True, max_length=100)),
+                ('pincode', models.CharField(blank=True, max_length=10)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('rating', models.DecimalField(decimal_places=2, default=0, max_digits=3)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.category')),
+                ('freelancer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['is_listed', '-created_at', '-service'], name='services_doc_listed_idx'), models.Index(fields=['is_listed', 'category', '-created_at'], name='services_doc_category_idx'), models.Index(fields=['is_listed', 'price'], name='services_doc_price_idx'), models.Index(fields=['pincode'], name='services_doc_pincode_idx'), models.Index(fields=['latitude', 'longitude'], name='services_doc_location_idx')],
+            },
+        ),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:32
+
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+# Copy of services.scores.popularity_weight as of this migration
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def popularity_weight(when):
+    half_life_days = getattr(settings, 'SERVICE_POPULARITY_HALF_LIFE_DAYS', 30)
+    return 2 ** ((when - EPOCH).total_seconds() / (half_life_days * 86400))
+
+
+def backfill_scores(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    Review = apps.get_model('reviews', 'Review')
+    ServiceSearchDocument = apps.get_model('services', 'ServiceSearchDocument')
+
+    scores = {}
+    for service_id, created_at, status in Booking.objects.values_list('service_id', 'created_at', 'status').iterator():
+        score = scores.setdefault(service_id, {'popularity': 0.0, 'completed_bookings': 0})
+        score['popularity'] += popularity_weight(created_at)
+        if status == 'completed':
+            score['completed_bookings'] += 1
+    for service_id, score in scores.items():
+        ServiceSearchDocument.objects.filter(pk=service_id).update(**score)
+
+    ratings = Review.objects.filter(is_active=True).values('booking__service_id').annotate(
+        avg=Avg('rating'), count=Count('pk')
+    )
+    for row in ratings:
+        ServiceSearchDocument.objects.filter(pk=row['booking__service_id']).update(
+            avg_rating=round(row['avg'], 2), review_count=row['count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('reviews', '0001_initial'),
+        ('services', '0004_service_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicesearchdocument',
+            name='avg_rating',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Average review rating of this service', max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='servicesearchdocument',
+            name='completed_bookings',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='servicesearchdocument',
+            name='popularity',
+            field=models.FloatField(default=0, help_text='Forward-decayed booking count, see services/scores.py'),
+        ),
+        migrations.AddField(
+            model_name='servicesearchdocument',
+            name='review_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='servicesearchdocument',
+            index=models.Index(fields=['is_listed', '-avg_rating', '-service'], name='services_doc_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicesearchdocument',
+            index=models.Index(fields=['is_listed', '-completed_bookings', '-service'], name='services_doc_booked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicesearchdocument',
+            index=models.Index(fields=['is_listed', '-popularity', '-service'], name='services_doc_popular_idx'),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:37
+
+import math
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, Count, IntegerField, Max, Min, Value, When
+import django.db.models.deletion
+
+# Copy of services.price_histogram.compute_histogram and the
+# services.facets.PRICE_BUCKETS upper bounds as of this migration
+BUCKET_BOUNDS = (Decimal('500'), Decimal('1000'), Decimal('2500'), Decimal('5000'))
+PERCENTILES = (25, 50, 75, 90)
+
+
+def compute_histogram(documents):
+    bucket = Case(
+        *[When(price__lt=high, then=Value(index)) for index, high in enumerate(BUCKET_BOUNDS)],
+        default=Value(len(BUCKET_BOUNDS)), output_field=IntegerField(),
+    )
+    rows = documents.order_by().annotate(bucket=bucket).values('bucket').annotate(
+        count=Count('pk'), low=Min('price'), high=Max('price'),
+    )
+    buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+    lows, highs = [], []
+    for row in rows:
+        buckets[row['bucket']] = row['count']
+        lows.append(row['low'])
+        highs.append(row['high'])
+
+    total = sum(buckets)
+    values = {
+        'service_count': total,
+        'bucket_counts': buckets,
+        'min_price': min(lows) if lows else None,
+        'max_price': max(highs) if highs else None,
+    }
+    prices = documents.order_by('price').values_list('price', flat=True)
+    for percentile in PERCENTILES:
+        rank = math.ceil(percentile / 100 * total)
+        values[f'p{percentile}'] = prices[rank - 1] if total else None
+    return values
+
+
+def build_histograms(apps, schema_editor):
+    Category = apps.get_model('services', 'Category')
+    CategoryPriceHistogram = apps.get_model('services', 'CategoryPriceHistogram')
+    ServiceSearchDocument = apps.get_model('services', 'ServiceSearchDocument')
+
+    listed = ServiceSearchDocument.objects.filter(is_listed=True)
+    for category_id in Category.objects.values_list('pk', flat=True):
+        CategoryPriceHistogram.objects.create(
+            category_id=category_id, **compute_histogram(listed.filter(category_id=category_id))
+        )
+    CategoryPriceHistogram.objects.create(category=None, **compute_histogram(listed))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0005_service_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryPriceHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service_count', models.IntegerField(default=0)),
+                ('bucket_counts', models.JSONField(default=list)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('p25', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('p50', models.DecimalField(blank=True, decimal_places=2, help_text='Median price', max_digits=10, null=True)),
+                ('p75', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('p90', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='servicesearchdocument',
+            index=models.Index(fields=['is_listed', 'category', 'price'], name='services_doc_cat_price_idx'),
+        ),
+        migrations.AddField(
+            model_name='categorypricehistogram',
+            name='category',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_histogram', to='services.category'),
+        ),
+        migrations.RunPython(build_histograms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def split_bucket_counts(apps, schema_editor):
+    CategoryPriceBucket = apps.get_model('services', 'CategoryPriceBucket')
+    CategoryPriceHistogram = apps.get_model('services', 'CategoryPriceHistogram')
+
+    CategoryPriceBucket.objects.bulk_create([
+        CategoryPriceBucket(histogram_id=histogram_id, bucket=index, count=count)
+        for histogram_id, counts in CategoryPriceHistogram.objects.values_list('pk', 'bucket_counts')
+        for index, count in enumerate(counts)
+    ])
+
+
+def join_bucket_counts(apps, schema_editor):
+    CategoryPriceBucket = apps.get_model('services', 'CategoryPriceBucket')
+    CategoryPriceHistogram = apps.get_model('services', 'CategoryPriceHistogram')
+
+    counts = {}
+    for histogram_id, bucket, count in CategoryPriceBucket.objects.order_by('bucket').values_list('histogram_id', 'bucket', 'count'):
+        counts.setdefault(histogram_id, []).append(count)
+    for histogram in CategoryPriceHistogram.objects.all():
+        histogram.bucket_counts = counts.get(histogram.pk, [])
+        histogram.save(update_fields=['bucket_counts'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0006_category_price_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categorypricehistogram',
+            name='is_stale',
+            field=models.BooleanField(default=False, help_text='Price range and percentiles need recomputing'),
+        ),
+        migrations.CreateModel(
+            name='CategoryPriceBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.IntegerField(help_text='Index into services.facets.PRICE_BUCKETS')),
+                ('count', models.IntegerField(default=0)),
+                ('histogram', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='services.categorypricehistogram')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='categorypricebucket',
+            constraint=models.UniqueConstraint(fields=('histogram', 'bucket'), name='services_price_bucket_unique'),
+        ),
+        migrations.RunPython(split_bucket_counts, join_bucket_counts),
+        migrations.RemoveField(
+            model_name='categorypricehistogram',
+            name='bucket_counts',
+        ),
+    ]
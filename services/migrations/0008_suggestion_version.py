@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0007_category_price_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestionVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
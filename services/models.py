@@ -67,3 +67,117 @@ class ServiceImage(models.Model):
     
     def __str__(self):
         return f"Image for {self.service.title}"
+
+
+class ServiceSearchDocument(models.Model):
+    """
+    Flattened copy of a service with everything a listing card and its
+    filters need, so public listings read one table without joins.
+    Maintained by services/signals.py, rebuilt by rebuild_search_documents.
+    """
+    service = models.OneToOneField(Service, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='search_document')
+    # Active, approved and offered by a verified freelancer
+    is_listed = models.BooleanField(default=False)
+    
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    duration = models.IntegerField()
+    image = models.ImageField(upload_to='services/', blank=True, null=True)
+    created_at = models.DateTimeField()
+    
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    category_name = models.CharField(max_length=100)
+    subcategory_name = models.CharField(max_length=100, blank=True)
+    
+    freelancer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    freelancer_name = models.CharField(max_length=300)
+    city = models.CharField(max_length=100, blank=True)
+    area = models.CharField(max_length=100, blank=True)
+    pincode = models.CharField(max_length=10, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    
+    # Sort scores, updated incrementally by services/scores.py
+    avg_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0, help_text="Average review rating of this service")
+    review_count = models.IntegerField(default=0)
+    completed_bookings = models.IntegerField(default=0)
+    popularity = models.FloatField(default=0, help_text="Forward-decayed booking count, see services/scores.py")
+    
+    def __str__(self):
+        return f"Search document for {self.title}"
+    
+    @property
+    def id(self):
+        return self.service_id
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_listed', '-created_at', '-service'], name='services_doc_listed_idx'),
+            models.Index(fields=['is_listed', 'category', '-created_at'], name='services_doc_category_idx'),
+            models.Index(fields=['is_listed', 'price'], name='services_doc_price_idx'),
+            models.Index(fields=['is_listed', 'category', 'price'], name='services_doc_cat_price_idx'),
+            models.Index(fields=['pincode'], name='services_doc_pincode_idx'),
+            models.Index(fields=['latitude', 'longitude'], name='services_doc_location_idx'),
+            models.Index(fields=['is_listed', '-avg_rating', '-service'], name='services_doc_rating_idx'),
+            models.Index(fields=['is_listed', '-completed_bookings', '-service'], name='services_doc_booked_idx'),
+            models.Index(fields=['is_listed', '-popularity', '-service'], name='services_doc_popular_idx'),
+        ]
+
+
+class CategoryPriceHistogram(models.Model):
+    """
+    Price distribution of the listed services in a category (category is
+    empty for the row covering every category). Service and bucket counts
+    are kept exact by services/price_histogram.py; the price range and
+    percentiles are recomputed by its scheduled job while is_stale is set.
+    """
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, null=True, blank=True,
+                                    related_name='price_histogram')
+    service_count = models.IntegerField(default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    p25 = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    p50 = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Median price")
+    p75 = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    p90 = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    is_stale = models.BooleanField(default=False, help_text="Price range and percentiles need recomputing")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Price histogram for {self.category or 'all categories'}"
+    
+    @property
+    def bucket_counts(self):
+        """Service count of each services.facets.PRICE_BUCKETS bucket"""
+        return [bucket.count for bucket in sorted(self.buckets.all(), key=lambda bucket: bucket.bucket)]
+
+
+class CategoryPriceBucket(models.Model):
+    """Number of listed services in one services.facets.PRICE_BUCKETS bucket of a histogram"""
+    histogram = models.ForeignKey(CategoryPriceHistogram, on_delete=models.CASCADE, related_name='buckets')
+    bucket = models.IntegerField(help_text="Index into services.facets.PRICE_BUCKETS")
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['histogram', 'bucket'], name='services_price_bucket_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.histogram} bucket {self.bucket}: {self.count}"
+
+
+class SuggestionVersion(models.Model):
+    """
+    Single row counting changes to the typeahead index, see services/suggest.py.
+    Each change takes the next version with an F() increment, so concurrent
+    writers never share one.
+    """
+    version = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"Suggestion index version {self.version}"
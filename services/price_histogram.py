@@ -0,0 +1,185 @@
+"""
+Per-category price histograms for the listing price slider.
+
+CategoryPriceHistogram keeps, for each category and for all categories
+together, the number of listed services in each facets.PRICE_BUCKETS bucket
+(CategoryPriceBucket rows), the price range and the 25/50/75/90th
+percentiles. Listings read one histogram instead of aggregating over the
+documents on every request.
+
+Writes never scan the documents: services/signals.py hands apply() the
+listed prices that left and entered each category, which turns them into
+F() increments of the service and bucket counts of that category's row and
+the all-categories row and marks both stale. The price range and
+percentiles depend on the whole distribution, so refresh_stale(), run by
+the services.refresh_price_histograms job, recomputes them for stale rows
+only, off the write path. rebuild() recomputes everything.
+"""
+import math
+from collections import Counter
+
+from django.db.models import Count, F, Max, Min, Q
+
+from .facets import PRICE_BUCKETS, price_bucket
+
+PERCENTILES = (25, 50, 75, 90)
+
+
+def bucket_index(price):
+    """PRICE_BUCKETS index of a price, matching facets.price_bucket()"""
+    for index, (label, low, high) in enumerate(PRICE_BUCKETS):
+        if high is not None and price < high:
+            return index
+    return len(PRICE_BUCKETS) - 1
+
+
+def compute_histogram(documents):
+    """Histogram field values for a queryset of listed ServiceSearchDocument rows"""
+    rows = documents.order_by().annotate(bucket=price_bucket()).values('bucket').annotate(
+        count=Count('pk'), low=Min('price'), high=Max('price'),
+    )
+    buckets = [0] * len(PRICE_BUCKETS)
+    lows, highs = [], []
+    for row in rows:
+        buckets[row['bucket']] = row['count']
+        lows.append(row['low'])
+        highs.append(row['high'])
+
+    total = sum(buckets)
+    values = {
+        'service_count': total,
+        'bucket_counts': buckets,
+        'min_price': min(lows) if lows else None,
+        'max_price': max(highs) if highs else None,
+    }
+    values.update(compute_percentiles(documents, total))
+    return values
+
+
+def compute_percentiles(documents, total):
+    """Nearest-rank percentiles of total listed documents, one indexed OFFSET lookup each"""
+    prices = documents.order_by('price').values_list('price', flat=True)
+    return {
+        f'p{percentile}': prices[math.ceil(percentile / 100 * total) - 1] if total else None
+        for percentile in PERCENTILES
+    }
+
+
+def _write(category_id, values):
+    """Store computed histogram values as the row of category_id (None for all categories)"""
+    from .models import CategoryPriceBucket, CategoryPriceHistogram
+
+    values = dict(values, is_stale=False)
+    counts = values.pop('bucket_counts')
+    histogram, created = CategoryPriceHistogram.objects.update_or_create(category_id=category_id, defaults=values)
+    if not created:
+        histogram.buckets.all().delete()
+    CategoryPriceBucket.objects.bulk_create([
+        CategoryPriceBucket(histogram=histogram, bucket=index, count=count) for index, count in enumerate(counts)
+    ])
+
+
+def create(category_id):
+    """Empty histogram row for a new category"""
+    _write(category_id, {
+        'service_count': 0, 'bucket_counts': [0] * len(PRICE_BUCKETS),
+        'min_price': None, 'max_price': None, **{f'p{percentile}': None for percentile in PERCENTILES},
+    })
+
+
+def price_changes(before, after):
+    """
+    Counter of {(category_id, bucket): change in listed services} between two
+    documents.PRICE_STATE tuples (None when there was no document).
+    """
+    changes = Counter()
+    for state, sign in ((before, -1), (after, 1)):
+        if state and state[2]:
+            changes[(state[0], bucket_index(state[1]))] += sign
+    return changes
+
+
+def apply(changes):
+    """
+    Add {(category_id, bucket): count} changes to the histograms and mark
+    their rows stale (a zero count still moved a price). One UPDATE per
+    changed bucket plus one per category, each also covering the
+    all-categories row.
+    """
+    from .models import CategoryPriceBucket, CategoryPriceHistogram
+
+    totals = Counter()
+    for (category_id, bucket), count in changes.items():
+        totals[category_id] += count
+        if count:
+            CategoryPriceBucket.objects.filter(
+                Q(histogram__category_id=category_id) | Q(histogram__category=None), bucket=bucket,
+            ).update(count=F('count') + count)
+    for category_id, count in totals.items():
+        CategoryPriceHistogram.objects.filter(Q(category_id=category_id) | Q(category=None)).update(
+            service_count=F('service_count') + count, is_stale=True,
+        )
+
+
+def refresh_stale():
+    """
+    Recompute the price range and percentiles of stale rows and create the
+    rows of categories that have none yet. Returns the rows refreshed.
+    """
+    from .models import Category, CategoryPriceHistogram, ServiceSearchDocument
+
+    listed = ServiceSearchDocument.objects.filter(is_listed=True)
+    missing = Category.objects.filter(price_histogram__isnull=True).values_list('pk', flat=True)
+    if not CategoryPriceHistogram.objects.filter(category=None).exists():
+        missing = [None, *missing]
+    for category_id in missing:
+        _write(category_id, compute_histogram(listed.filter(category_id=category_id) if category_id else listed))
+
+    refreshed = len(missing)
+    for histogram_id, category_id in CategoryPriceHistogram.objects.filter(is_stale=True).values_list('pk', 'category_id'):
+        # Clear the flag first, a write landing during the recompute sets it again
+        if not CategoryPriceHistogram.objects.filter(pk=histogram_id, is_stale=True).update(is_stale=False):
+            continue
+        documents = listed.filter(category_id=category_id) if category_id else listed
+        values = documents.aggregate(service_count=Count('pk'), min_price=Min('price'), max_price=Max('price'))
+        values.update(compute_percentiles(documents, values.pop('service_count')))
+        CategoryPriceHistogram.objects.filter(pk=histogram_id).update(**values)
+        refreshed += 1
+    return refreshed
+
+
+def rebuild():
+    """Recompute every histogram row"""
+    from .models import Category, CategoryPriceHistogram, ServiceSearchDocument
+
+    listed = ServiceSearchDocument.objects.filter(is_listed=True)
+    CategoryPriceHistogram.objects.all().delete()
+    for category_id in Category.objects.values_list('pk', flat=True):
+        _write(category_id, compute_histogram(listed.filter(category_id=category_id)))
+    _write(None, compute_histogram(listed))
+
+
+def slider(category_id=None):
+    """
+    Histogram of a category (or all categories) for the listing template,
+    None until the first refresh.
+    """
+    from .models import CategoryPriceHistogram
+
+    histogram = CategoryPriceHistogram.objects.filter(category_id=category_id).prefetch_related('buckets').first()
+    if histogram is None or not histogram.service_count:
+        return None
+
+    counts = histogram.bucket_counts
+    tallest = max(counts) or 1
+    histogram.bars = [
+        {
+            'label': label,
+            'min': str(low) if low is not None else None,
+            'max': str(high) if high is not None else None,
+            'count': count,
+            'height': round(count * 100 / tallest),
+        }
+        for (label, low, high), count in zip(PRICE_BUCKETS, counts)
+    ]
+    return histogram
@@ -0,0 +1,117 @@
+"""
+Cache of service search result pages.
+
+Each page of a listing is stored as the list of service ids it displays plus
+the cursor of the following page, keyed by the normalized search filters,
+the ordering and the incoming cursor. Every key embeds a generation number
+that services/signals.py bumps whenever a Service, Category or relevant
+freelancer field changes, so stale pages are never read again and simply
+expire. Only the ids on the requested page are hydrated into objects.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from freelancer_platform.pagination import KeysetPaginator
+
+GENERATION_KEY = 'service_search:generation'
+HITS_KEY = 'service_search:hits'
+MISSES_KEY = 'service_search:misses'
+
+
+def _incr(key, attempts=3):
+    """
+    Increment a counter, creating it at 1 when it is missing.
+
+    incr() is atomic on Memcached, Redis and LocMemCache. The file and
+    database backends implement it as get and set, so concurrent increments
+    can be lost there: hit and miss counts then undercount, and two
+    concurrent bumps may produce one generation, which still invalidates
+    every page cached before either. Production should use an atomic shared
+    cache (see CACHES in settings).
+    """
+    for _ in range(attempts):
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Missing (never set, expired or culled): create it, unless
+            # another process just did, then increment theirs
+            if cache.add(key, 1, None):
+                return 1
+    return None
+
+
+def get_generation():
+    """
+    Current search generation. A missing generation (first use or evicted)
+    restarts from the clock, so it never reuses a number pages were already
+    cached under.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_generation():
+    """
+    Invalidate every cached search page and facet count once the current
+    transaction commits. Bumping earlier would let a request still reading
+    the old rows cache them under the new generation.
+    """
+    transaction.on_commit(lambda: _incr(GENERATION_KEY))
+
+
+def make_key(prefix, *parts):
+    """Versioned cache key for the given parts"""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'{prefix}:{get_generation()}:{digest}'
+
+
+def get_page_ids(build_queryset, filter_key, ordering, cursor, per_page):
+    """
+    Return (ids, next_cursor) for one page, from cache when possible.
+    
+    build_queryset returns the filtered queryset and is only called
+    on a cache miss.
+    """
+    key = make_key('service_search:page', filter_key, ','.join(ordering), cursor or '', per_page)
+    cached = cache.get(key)
+    if cached is not None:
+        _incr(HITS_KEY)
+        return cached
+
+    _incr(MISSES_KEY)
+    fields = [name.lstrip('-') for name in ordering]
+    rows = build_queryset().values('pk', *[field for field in fields if field != 'pk'])
+    page = KeysetPaginator(rows, ordering=ordering, per_page=per_page).page(cursor)
+    result = ([row['pk'] for row in page], page.next_cursor)
+    cache.set(key, result, getattr(settings, 'SERVICE_SEARCH_CACHE_SECONDS', 600))
+    return result
+
+
+def hydrate(queryset, ids):
+    """Load the objects for ids from queryset, keeping the order of ids"""
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def stats():
+    """Hit/miss counters used to size the cache"""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'generation': get_generation(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,86 @@
+"""
+Precomputed sort scores on ServiceSearchDocument.
+
+avg_rating/review_count are recomputed for one service when a review on it
+changes, completed_bookings is incremented when a booking completes, and
+popularity counts bookings with exponential time decay.
+
+Popularity uses forward decay: each booking adds 2 ** ((t - EPOCH) / half_life)
+instead of decaying every stored score as time passes. At any moment the true
+decayed score is the stored value times the same factor for every service,
+so ordering by the stored column gives the decayed ranking and updates stay
+a single F() increment.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Avg, Count, F
+from django.utils import timezone
+
+from .models import ServiceSearchDocument
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def popularity_weight(when=None):
+    """Forward-decay weight of one booking made at when"""
+    when = when or timezone.now()
+    half_life_days = getattr(settings, 'SERVICE_POPULARITY_HALF_LIFE_DAYS', 30)
+    return 2 ** ((when - EPOCH).total_seconds() / (half_life_days * 86400))
+
+
+def record_booking(service_id, when=None):
+    """A booking was made for the service"""
+    ServiceSearchDocument.objects.filter(pk=service_id).update(
+        popularity=F('popularity') + popularity_weight(when)
+    )
+
+
+def record_completion(service_id):
+    """A booking for the service was completed"""
+    ServiceSearchDocument.objects.filter(pk=service_id).update(
+        completed_bookings=F('completed_bookings') + 1
+    )
+
+
+def refresh_rating(service_id):
+    """Recompute the review average of one service"""
+    from reviews.models import Review
+
+    stats = Review.objects.filter(booking__service_id=service_id, is_active=True).aggregate(
+        avg=Avg('rating'), count=Count('pk')
+    )
+    ServiceSearchDocument.objects.filter(pk=service_id).update(
+        avg_rating=round(stats['avg'] or 0, 2),
+        review_count=stats['count'],
+    )
+
+
+def compute_scores():
+    """{service_id: score fields} rebuilt from booking and review history"""
+    from bookings.models import Booking
+    from reviews.models import Review
+
+    scores = {}
+
+    def entry(service_id):
+        return scores.setdefault(service_id, {
+            'avg_rating': 0, 'review_count': 0, 'completed_bookings': 0, 'popularity': 0.0,
+        })
+
+    rows = Booking.objects.order_by().values_list('service_id', 'created_at', 'status').iterator()
+    for service_id, created_at, status in rows:
+        score = entry(service_id)
+        score['popularity'] += popularity_weight(created_at)
+        if status == 'completed':
+            score['completed_bookings'] += 1
+
+    ratings = Review.objects.filter(is_active=True).order_by().values('booking__service_id').annotate(
+        avg=Avg('rating'), count=Count('pk')
+    )
+    for row in ratings:
+        score = entry(row['booking__service_id'])
+        score['avg_rating'] = round(row['avg'], 2)
+        score['review_count'] = row['count']
+
+    return scores
@@ -0,0 +1,174 @@
+"""
+Full-text search index for services.
+
+SQLite uses an FTS5 virtual table and PostgreSQL a table holding a weighted
+tsvector behind a GIN index. Both are created by migration 0003 and kept in
+sync by the signals in services/signals.py. Any other backend falls back to
+the original icontains filters.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'services_service_fts'
+
+# Column weights: title, description, category name
+SQLITE_WEIGHTS = (10.0, 1.0, 5.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported(using=None):
+    """Check whether the current database has a full-text index"""
+    conn = using or connection
+    return conn.vendor in ('sqlite', 'postgresql')
+
+
+def _tokens(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _document(service):
+    """Text columns stored in the index for a service"""
+    category_name = service.category.name if service.category_id else ''
+    return service.title or '', service.description or '', category_name
+
+
+def create_index(schema_editor):
+    """Create the vendor specific index table (called from migrations)"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(title, description, category, tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {FTS_TABLE} ("
+            f"service_id bigint PRIMARY KEY REFERENCES services_service(id) ON DELETE CASCADE, "
+            f"document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {FTS_TABLE}_document_gin ON {FTS_TABLE} USING GIN (document)"
+        )
+
+
+def drop_index(schema_editor):
+    """Drop the index table (reverse of create_index)"""
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def write_rows(cursor, rows):
+    """Insert or replace (service_id, title, description, category) rows"""
+    if connection.vendor == 'sqlite':
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, category) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+    else:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (service_id, document) VALUES (%s, "
+            f"setweight(to_tsvector('simple', %s), 'A') || "
+            f"setweight(to_tsvector('simple', %s), 'C') || "
+            f"setweight(to_tsvector('simple', %s), 'B')) "
+            f"ON CONFLICT (service_id) DO UPDATE SET document = EXCLUDED.document",
+            rows,
+        )
+
+
+def index_service(service):
+    """Add or refresh a single service in the index"""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        write_rows(cursor, [(service.pk, *_document(service))])
+
+
+def index_services(queryset):
+    """Refresh every service in a queryset, e.g. after a category rename"""
+    if not is_supported():
+        return
+    rows = list(queryset.order_by().values_list('pk', 'title', 'description', 'category__name'))
+    if rows:
+        with connection.cursor() as cursor:
+            write_rows(cursor, rows)
+
+
+def remove_service(service_id):
+    """Remove a service from the index"""
+    if not is_supported():
+        return
+    column = 'rowid' if connection.vendor == 'sqlite' else 'service_id'
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE {column} = %s", [service_id])
+
+
+def rebuild_index(batch_size=2000):
+    """Rebuild the whole index from the Service table, returns rows indexed"""
+    from .models import Service
+
+    if not is_supported():
+        return 0
+
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        batch = []
+        rows = Service.objects.order_by().values_list(
+            'pk', 'title', 'description', 'category__name'
+        ).iterator(chunk_size=batch_size)
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                write_rows(cursor, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            write_rows(cursor, batch)
+            total += len(batch)
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def filter_queryset(queryset, query, category_field='category__name'):
+    """
+    Restrict a Service (or ServiceSearchDocument) queryset to matches for query.
+
+    When the index is available it is joined to the queryset on the primary
+    key, so later filters and the ordering apply to every match, and rows are
+    annotated with search_rank (lower is a better match) and ordered by it.
+    category_field is only used by the icontains fallback.
+    """
+    if not is_supported():
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(**{f'{category_field}__icontains': query})
+        )
+
+    tokens = _tokens(query)
+    if not tokens:
+        # Nothing to match, but callers may still order by search_rank
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    qn = connection.ops.quote_name
+    index = qn(FTS_TABLE)
+    pk = f'{qn(queryset.model._meta.db_table)}.{qn(queryset.model._meta.pk.column)}'
+    if connection.vendor == 'sqlite':
+        match = ' AND '.join(f'"{token}"*' for token in tokens)
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        where = [f'{index} MATCH %s', f'{index}.rowid = {pk}']
+        rank = RawSQL(f'bm25({index}, {weights})', [], output_field=FloatField())
+    else:
+        match = ' & '.join(f'{token}:*' for token in tokens)
+        where = [f"{index}.document @@ to_tsquery('simple', %s)", f'{index}.service_id = {pk}']
+        rank = RawSQL(f"-ts_rank_cd({index}.document, to_tsquery('simple', %s))", [match],
+                      output_field=FloatField())
+    return queryset.extra(tables=[FTS_TABLE], where=where, params=[match]).annotate(
+        search_rank=rank,
+    ).order_by('search_rank')
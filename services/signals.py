@@ -0,0 +1,124 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from accounts.models import User, FreelancerProfile
+from .models import Service, Category, SubCategory, ServiceSearchDocument
+from . import documents, price_histogram, result_cache, search, suggest
+
+# User fields copied to search documents or used by the listing filters
+SEARCH_USER_FIELDS = {
+    'is_verified', 'is_active', 'city', 'area', 'pincode', 'latitude', 'longitude',
+    'first_name', 'last_name',
+}
+
+@receiver(post_save, sender=Service)
+def index_service(sender, instance, **kwargs):
+    """Keep the full-text index in sync with service edits"""
+    search.index_service(instance)
+
+
+@receiver(post_delete, sender=Service)
+def unindex_service(sender, instance, **kwargs):
+    """Drop deleted services from the full-text index"""
+    search.remove_service(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_services(sender, instance, created, **kwargs):
+    """Category names are indexed with each service, refresh them on rename"""
+    if not created:
+        search.index_services(instance.services.all())
+
+
+@receiver(post_save, sender=Service)
+def sync_service_document(sender, instance, **kwargs):
+    """Write the flattened listing row for a service"""
+    before, after = documents.sync_service(instance)
+    if before != after:
+        price_histogram.apply(price_histogram.price_changes(before, after))
+
+
+@receiver(pre_delete, sender=Service)
+def remember_deleted_price(sender, instance, **kwargs):
+    """The document is deleted with the service, keep its price facts"""
+    instance._price_state = ServiceSearchDocument.objects.filter(pk=instance.pk).values_list(
+        *documents.PRICE_STATE,
+    ).first()
+
+
+@receiver(post_delete, sender=Service)
+def refresh_deleted_price_histogram(sender, instance, **kwargs):
+    """Drop the deleted service's price from the histograms"""
+    changes = price_histogram.price_changes(getattr(instance, '_price_state', None), None)
+    if changes:
+        price_histogram.apply(changes)
+
+
+@receiver(post_save, sender=Category)
+def create_price_histogram(sender, instance, created, **kwargs):
+    """New categories start with an empty histogram that writes keep current"""
+    if created:
+        price_histogram.create(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def sync_category_documents(sender, instance, created, **kwargs):
+    """Copy category renames onto listing rows"""
+    if not created:
+        documents.sync_category(instance)
+
+
+@receiver(post_save, sender=FreelancerProfile)
+def sync_rating_documents(sender, instance, created, **kwargs):
+    """Keep the rating shown on service cards current"""
+    if not created:
+        documents.sync_rating(instance)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_search_cache(sender, **kwargs):
+    """Any catalogue change starts a new search cache generation"""
+    result_cache.bump_generation()
+
+
+@receiver(post_save, sender=User)
+def sync_freelancer_documents(sender, instance, created, update_fields=None, **kwargs):
+    """Freelancer name, verification and location feed the listing rows and filters"""
+    if created or instance.user_type != 'freelancer':
+        return
+    if update_fields and not SEARCH_USER_FIELDS.intersection(update_fields):
+        return
+    changes = documents.sync_freelancer(instance)
+    result_cache.bump_generation()
+    if changes:
+        price_histogram.apply(changes)
+    # Verification decides whether their service titles are suggested
+    for service in instance.services.all():
+        suggest.record('service', service.pk, suggest.service_terms(service))
+
+
+@receiver(post_save, sender=Service)
+def suggest_service(sender, instance, **kwargs):
+    suggest.record('service', instance.pk, suggest.service_terms(instance))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+def suggest_category(sender, instance, **kwargs):
+    kind = 'category' if sender is Category else 'subcategory'
+    suggest.record(kind, instance.pk, [instance.name] if instance.is_active else [])
+
+
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+def unsuggest_deleted(sender, instance, **kwargs):
+    kind = {Service: 'service', Category: 'category', SubCategory: 'subcategory'}[sender]
+    suggest.record(kind, instance.pk, [])
+
+
+@receiver(post_save, sender=FreelancerProfile)
+def suggest_skills(sender, instance, **kwargs):
+    suggest.record('skill', instance.user_id, suggest.skill_terms(instance))
@@ -0,0 +1,166 @@
+"""
+In-process prefix index for the search box typeahead.
+
+Every worker keeps a sorted list of (key, text, kind, ref) entries built from
+listed service titles, category and subcategory names and freelancer skills,
+and answers a prefix with a bisect plus a short forward scan. Multi-word
+texts are also indexed from each later word, so "rep" finds "AC Repair".
+
+Changes are applied incrementally. The signal handlers in services/signals.py
+call record(), which takes the next version from the SuggestionVersion row
+with an F() increment and stores the change in the shared cache under that
+version. The row lock makes versions unique and visible in commit order, so
+no change can overwrite another in the log. Before answering, a worker
+compares its local version with the row and replays the missing log
+entries; if any have expired it rebuilds from the database instead.
+"""
+import threading
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+LOG_KEY = 'service_suggest:log:{}'
+
+# Seconds a change stays in the log; workers further behind rebuild
+LOG_TIMEOUT = 24 * 60 * 60
+
+MAX_LIMIT = 10
+
+
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def _keys(text):
+    """Index keys for text: the whole text and the text from each later word"""
+    words = _normalize(text).split(' ')
+    return [' '.join(words[index:]) for index in range(len(words)) if words[index]]
+
+
+def service_terms(service):
+    """Suggestion texts contributed by a service (none unless it is listed)"""
+    if service.is_active and service.is_approved and service.freelancer.is_verified:
+        return [service.title]
+    return []
+
+
+def skill_terms(profile):
+    return [skill.strip() for skill in (profile.skills or '').split(',') if skill.strip()]
+
+
+class SuggestionIndex:
+    def __init__(self):
+        self.entries = []
+        self.by_ref = {}
+        self.version = None
+
+    def set_terms(self, kind, ref, texts):
+        """Replace the texts indexed for one (kind, ref)"""
+        for entry in self.by_ref.pop((kind, ref), []):
+            position = bisect_left(self.entries, entry)
+            if position < len(self.entries) and self.entries[position] == entry:
+                del self.entries[position]
+
+        added = []
+        for text in texts:
+            for key in _keys(text):
+                entry = (key, text, kind, ref)
+                insort(self.entries, entry)
+                added.append(entry)
+        if added:
+            self.by_ref[(kind, ref)] = added
+
+    def search(self, prefix, limit=MAX_LIMIT):
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        position = bisect_left(self.entries, (prefix,))
+        while position < len(self.entries) and len(results) < limit:
+            key, text, kind, ref = self.entries[position]
+            if not key.startswith(prefix):
+                break
+            if (kind, text.lower()) not in seen:
+                seen.add((kind, text.lower()))
+                results.append({'text': text, 'type': kind, 'ref': ref})
+            position += 1
+        return results
+
+
+_index = SuggestionIndex()
+_lock = threading.Lock()
+
+
+def _current_version():
+    from .models import SuggestionVersion
+
+    return SuggestionVersion.objects.values_list('version', flat=True).first() or 0
+
+
+def _next_version():
+    """Take the next version, holding the row lock until the caller's transaction ends"""
+    from .models import SuggestionVersion
+
+    if not SuggestionVersion.objects.update(version=F('version') + 1):
+        SuggestionVersion.objects.get_or_create(pk=1)
+        SuggestionVersion.objects.update(version=F('version') + 1)
+    return SuggestionVersion.objects.values_list('version', flat=True).get()
+
+
+def build_index():
+    """Fresh SuggestionIndex from the database"""
+    from accounts.models import FreelancerProfile
+    from .models import Category, ServiceSearchDocument, SubCategory
+
+    index = SuggestionIndex()
+    for pk, title in ServiceSearchDocument.objects.filter(is_listed=True).values_list('pk', 'title').iterator():
+        index.set_terms('service', pk, [title])
+    for pk, name in Category.objects.filter(is_active=True).values_list('pk', 'name'):
+        index.set_terms('category', pk, [name])
+    for pk, name in SubCategory.objects.filter(is_active=True).values_list('pk', 'name'):
+        index.set_terms('subcategory', pk, [name])
+    for profile in FreelancerProfile.objects.exclude(skills='').only('user_id', 'skills').iterator():
+        index.set_terms('skill', profile.user_id, skill_terms(profile))
+    return index
+
+
+def _refresh():
+    """Bring the worker's index up to the shared version"""
+    global _index
+
+    version = _current_version()
+    if _index.version == version:
+        return _index
+
+    with _lock:
+        if _index.version is not None and _index.version < version:
+            keys = [LOG_KEY.format(number) for number in range(_index.version + 1, version + 1)]
+            changes = cache.get_many(keys)
+            if len(changes) == len(keys):
+                for key in keys:
+                    kind, ref, texts = changes[key]
+                    _index.set_terms(kind, ref, texts)
+                _index.version = version
+                return _index
+
+        index = build_index()
+        index.version = version
+        _index = index
+        return _index
+
+
+def record(kind, ref, texts):
+    """Publish a change to every worker; texts=[] removes the entry"""
+    with transaction.atomic():
+        version = _next_version()
+        # A rolled back version is taken again by the next change and its entry replaced
+        cache.set(LOG_KEY.format(version), (kind, ref, list(texts)), LOG_TIMEOUT)
+
+
+def suggest(prefix, limit=MAX_LIMIT):
+    """Suggestions for a typed prefix"""
+    return _refresh().search(prefix, min(limit, MAX_LIMIT))
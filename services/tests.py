@@ -0,0 +1,216 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from freelancer_platform.testing import test_settings
+
+from . import result_cache
+from .models import Category, Service
+
+
+@test_settings
+class ServiceListTests(TestCase):
+    """Listing and search pages walk every match once, whatever the query"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.category = Category.objects.create(name='Plumbing')
+        cls.services = [
+            Service.objects.create(freelancer=cls.freelancer, category=cls.category, title=f'Pipe repair {index}',
+                                   description='Leaks fixed', price=Decimal(100 + index), duration=60,
+                                   is_approved=True)
+            for index in range(7)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url, params):
+        """Service ids of every JSON page, following next_cursor"""
+        ids, cursor = [], None
+        while True:
+            page = self.client.get(url, dict(params, format='json', **({'cursor': cursor} if cursor else {})))
+            self.assertEqual(page.status_code, 200)
+            ids += [result['id'] for result in page.json()['results']]
+            cursor = page.json()['next_cursor']
+            if cursor is None:
+                return ids
+
+    @override_settings(SERVICE_LIST_PAGE_SIZE=3)
+    def test_cursor_pages_cover_every_service_once(self):
+        expected = sorted(service.pk for service in self.services)
+        for url, params in ((reverse('services:service_list'), {}),
+                            (reverse('services:service_list'), {'query': 'pipe'}),
+                            (reverse('services:service_list'), {'sort': 'price_asc'}),
+                            (reverse('services:category_services', args=[self.category.pk]), {})):
+            with self.subTest(url=url, params=params):
+                ids = self.walk(url, params)
+                self.assertEqual(sorted(ids), expected)
+
+    @override_settings(SERVICE_LIST_PAGE_SIZE=3)
+    def test_price_sort_keeps_order_across_pages(self):
+        ids = self.walk(reverse('services:service_list'), {'sort': 'price_asc'})
+        self.assertEqual(ids, [service.pk for service in self.services])
+
+    def test_tampered_cursor_restarts_from_the_first_page(self):
+        response = self.client.get(reverse('services:service_list'), {'format': 'json', 'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), len(self.services))
+
+    def test_query_without_words_returns_no_results(self):
+        for query in ('"', '!!!', '*', '()'):
+            with self.subTest(query=query):
+                response = self.client.get(reverse('services:service_list'), {'query': query})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['services']), 0)
+                response = self.client.get(reverse('services:service_list'), {'query': query, 'format': 'json'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['results'], [])
+
+
+@test_settings
+class SearchTests(TestCase):
+    """Full-text search ranks title matches first and treats the query as plain words"""
+
+    @classmethod
+    def setUpTestData(cls):
+        freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer', is_verified=True)
+        cls.plumbing = Category.objects.create(name='Plumbing')
+        cls.cleaning = Category.objects.create(name='Cleaning')
+
+        def create(title, description, category=cls.plumbing):
+            return Service.objects.create(freelancer=freelancer, category=category, title=title,
+                                          description=description, price=Decimal('500'), duration=60,
+                                          is_approved=True)
+
+        cls.in_title = create('Geyser repair', 'Any brand')
+        cls.in_description = create('Bathroom visit', 'We also look at a geyser')
+        cls.other_category = create('Geyser descaling', 'Kitchen and bath', cls.cleaning)
+        cls.unrelated = create('Sofa cleaning', 'Fabric and leather', cls.cleaning)
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, **params):
+        response = self.client.get(reverse('services:service_list'), dict(params, format='json'))
+        self.assertEqual(response.status_code, 200)
+        return [result['id'] for result in response.json()['results']]
+
+    def test_title_matches_rank_before_description_matches(self):
+        ids = self.search(query='geyser')
+        self.assertCountEqual(ids, [self.in_title.pk, self.in_description.pk, self.other_category.pk])
+        self.assertLess(ids.index(self.in_title.pk), ids.index(self.in_description.pk))
+
+    def test_prefixes_and_every_word_must_match(self):
+        self.assertCountEqual(self.search(query='gey'), [self.in_title.pk, self.in_description.pk,
+                                                         self.other_category.pk])
+        self.assertEqual(self.search(query='geyser brand'), [self.in_title.pk])
+
+    def test_search_syntax_is_matched_as_words(self):
+        for query in ('geyser OR sofa', 'geyser NEAR sofa', 'title:geyser', '"geyser', 'geyser*', '-geyser',
+                      "geyser'); DROP TABLE services_service; --"):
+            with self.subTest(query=query):
+                self.search(query=query)
+        self.assertEqual(self.search(query='geyser OR sofa'), [])
+        self.assertEqual(Service.objects.count(), 4)
+
+    def test_other_filters_apply_to_every_match(self):
+        self.assertEqual(self.search(query='geyser', category=self.cleaning.pk), [self.other_category.pk])
+        self.assertEqual(self.search(query='repair', sort='price_asc'), [self.in_title.pk])
+
+
+@test_settings
+class ResultCacheTests(TestCase):
+    """Cached result pages are reused until a committed catalogue change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer',
+                                                  is_verified=True)
+        cls.category = Category.objects.create(name='Plumbing')
+        cls.service = cls.create('Pipe repair')
+
+    @classmethod
+    def create(cls, title):
+        return Service.objects.create(freelancer=cls.freelancer, category=cls.category, title=title,
+                                      description='Leaks fixed', price=Decimal('500'), duration=60, is_approved=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def listed_ids(self):
+        response = self.client.get(reverse('services:service_list'), {'format': 'json'})
+        return [result['id'] for result in response.json()['results']]
+
+    def test_second_request_is_served_from_cache(self):
+        self.assertEqual(self.listed_ids(), [self.service.pk])
+        # Sidebar categories, price histogram and its buckets, the page's
+        # documents; the page ids and facet counts come from the cache
+        with self.assertNumQueries(4):
+            self.assertEqual(self.listed_ids(), [self.service.pk])
+        self.assertEqual(result_cache.stats()['hits'], 1)
+        self.assertEqual(result_cache.stats()['misses'], 1)
+
+    def test_committed_change_invalidates_pages(self):
+        self.assertEqual(self.listed_ids(), [self.service.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            added = self.create('Tap fitting')
+        self.assertEqual(self.listed_ids(), [added.pk, self.service.pk])
+
+    def test_generation_is_bumped_only_on_commit(self):
+        generation = result_cache.get_generation()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create('Tap fitting')
+            self.assertEqual(result_cache.get_generation(), generation)
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(result_cache.get_generation(), generation)
+
+    def test_evicted_generation_is_not_reused(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result_cache.bump_generation()
+        generation = result_cache.get_generation()
+        cache.delete(result_cache.GENERATION_KEY)
+        self.assertGreater(result_cache.get_generation(), generation)
+
+
+@test_settings
+class FacetTests(TestCase):
+    """Sidebar counts follow the filters, except a category's own filter"""
+
+    @classmethod
+    def setUpTestData(cls):
+        freelancer = User.objects.create_user('freelancer', password='x', user_type='freelancer', is_verified=True)
+        cls.plumbing = Category.objects.create(name='Plumbing')
+        cls.cleaning = Category.objects.create(name='Cleaning')
+        for category, prices in ((cls.plumbing, (300, 800, 1200)), (cls.cleaning, (400, 600))):
+            for price in prices:
+                Service.objects.create(freelancer=freelancer, category=category, title=f'{category.name} {price}',
+                                       description='Home visit', price=Decimal(price), duration=60,
+                                       is_approved=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        response = self.client.get(reverse('services:service_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['facets']
+
+    def test_counts_follow_the_filters(self):
+        facets = self.facets(max_price='700')
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(facets['categories'], {self.plumbing.pk: 1, self.cleaning.pk: 2})
+        self.assertEqual([bucket['count'] for bucket in facets['price_buckets']], [2, 1, 0, 0, 0])
+
+    def test_category_counts_ignore_the_chosen_category(self):
+        facets = self.facets(category=self.cleaning.pk, max_price='1000')
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['categories'], {self.plumbing.pk: 2, self.cleaning.pk: 2})
+        self.assertEqual([bucket['count'] for bucket in facets['price_buckets']], [1, 1, 0, 0, 0])
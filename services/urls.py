@@ -12,4 +12,5 @@ urlpatterns = [
     path('<int:pk>/delete/', views.service_delete, name='service_delete'),
     path('categories/', views.category_list, name='category_list'),
     path('categories/<int:pk>/', views.category_services, name='category_services'),
+    path('suggest/', views.search_suggestions, name='search_suggestions'),
 ]
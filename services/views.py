@@ -1,19 +1,84 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from .models import Service, Category, SubCategory
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.http import urlencode
+from accounts import geo
+from freelancer_platform.pagination import KeysetPage
+from .models import Service, Category, SubCategory, ServiceSearchDocument
 from .forms import ServiceForm, ServiceSearchForm
+from . import facets, price_histogram, result_cache, search, suggest
 
-def service_list(request):
-    """List all services with search and filters"""
-    # Only show approved services from verified freelancers
-    services = Service.objects.filter(
-        is_active=True,
-        is_approved=True,
-        freelancer__is_verified=True
-    ).select_related('freelancer', 'category', 'subcategory')
-    form = ServiceSearchForm(request.GET)
+LISTING_ORDERING = ('-created_at', '-service_id')
+
+
+def _service_page(request, build_queryset, filter_key, ordering=LISTING_ORDERING):
+    """
+    Fetch one keyset page of services for the cursor in request.GET.
+    
+    The page's ids come from the search result cache; build_queryset is only
+    called on a miss. The page's ServiceSearchDocument rows are then loaded
+    in a single query, they carry everything a service card renders.
+    """
+    per_page = getattr(settings, 'SERVICE_LIST_PAGE_SIZE', 12)
+    ids, next_cursor = result_cache.get_page_ids(
+        build_queryset, filter_key, ordering, request.GET.get('cursor'), per_page
+    )
+    page = KeysetPage(result_cache.hydrate(ServiceSearchDocument.objects.all(), ids), next_cursor)
+    
+    next_page_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        params.pop('format', None)
+        next_page_url = f"{request.path}?{params.urlencode()}"
+    return page, next_page_url
+
+
+def _service_json(document):
+    """Service card data for infinite scroll"""
+    return {
+        'id': document.service_id,
+        'title': document.title,
+        'description': document.description,
+        'price': str(document.price),
+        'duration': document.duration,
+        'category': document.category_name,
+        'freelancer': document.freelancer_name,
+        'city': document.city,
+        'rating': str(document.rating),
+        'image': document.image.url if document.image else None,
+        'url': reverse('services:service_detail', args=[document.service_id]),
+    }
+
+
+def _paginated_response(request, template, context, build_queryset, filter_key, ordering=LISTING_ORDERING):
+    """Render a service listing page, or its JSON variant for ?format=json"""
+    page, next_page_url = _service_page(request, build_queryset, filter_key, ordering)
+    
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'results': [_service_json(service) for service in page],
+            'next_cursor': page.next_cursor,
+            'next': f"{next_page_url}&format=json" if next_page_url else None,
+        })
+    
+    context.update({
+        'services': page,
+        'next_page_url': next_page_url,
+    })
+    return render(request, template, context)
+
+
+def _search_services(form, filter_category=True):
+    """
+    Listed service documents matching the cleaned ServiceSearchForm filters,
+    leaving out the category filter when filter_category is False.
+    """
+    # Only active, approved services from verified freelancers are listed
+    services = ServiceSearchDocument.objects.filter(is_listed=True)
     
     if form.is_valid():
         query = form.cleaned_data.get('query')
@@ -21,27 +86,31 @@ def service_list(request):
         city = form.cleaned_data.get('city')
         area = form.cleaned_data.get('area')
         pincode = form.cleaned_data.get('pincode')
+        radius = form.cleaned_data.get('radius')
         min_price = form.cleaned_data.get('min_price')
         max_price = form.cleaned_data.get('max_price')
         
         if query:
-            services = services.filter(
-                Q(title__icontains=query) | 
-                Q(description__icontains=query) |
-                Q(category__name__icontains=query)
-            )
+            # Full-text index lookup, results come back ordered by relevance
+            services = search.filter_queryset(services, query, category_field='category_name')
         
-        if category:
+        if category and filter_category:
             services = services.filter(category=category)
         
         if city:
-            services = services.filter(freelancer__city__icontains=city)
+            services = services.filter(city__icontains=city)
         
         if area:
-            services = services.filter(freelancer__area__icontains=area)
+            services = services.filter(area__icontains=area)
         
         if pincode:
-            services = services.filter(freelancer__pincode=pincode)
+            nearby = None
+            if radius:
+                nearby = geo.near_pincode(services, pincode, radius)
+            if nearby is not None:
+                services = nearby
+            else:
+                services = services.filter(pincode=pincode)
         
         if min_price:
             services = services.filter(price__gte=min_price)
@@ -49,13 +118,56 @@ def service_list(request):
         if max_price:
             services = services.filter(price__lte=max_price)
     
+    return services
+
+
+def _search_ordering(form):
+    """
+    The chosen sort, else nearest first for radius searches, relevance for
+    full-text queries and newest otherwise.
+    """
+    if not form.is_valid():
+        return LISTING_ORDERING
+    data = form.cleaned_data
+    if data.get('sort'):
+        return ServiceSearchForm.SORT_ORDERING[data['sort']]
+    if data.get('pincode') and data.get('radius') and geo.lookup(data['pincode']):
+        return ('distance_km', 'service_id')
+    if data.get('query') and search.is_supported():
+        return ('search_rank', '-service_id')
+    return LISTING_ORDERING
+
+
+def service_list(request):
+    """List all services with search and filters"""
+    form = ServiceSearchForm(request.GET)
+    filter_key = form.filter_key()
+    selected_category = form.cleaned_data.get('category') if form.is_valid() else None
+    
+    def build_queryset():
+        return _search_services(form)
+    
+    def build_category_queryset():
+        return _search_services(form, filter_category=False)
+    
+    # Sidebar counts for the current filters, one grouped query (cached); the
+    # category counts ignore the chosen category so the others are not all 0
+    facet_counts = facets.get_facets(build_queryset, filter_key,
+                                     build_category_queryset if selected_category else None)
+    categories = list(Category.objects.filter(is_active=True))
+    for category in categories:
+        category.facet_count = facet_counts['categories'].get(category.id, 0)
+    
+    # Price slider over the chosen category, read from the precomputed histogram
     context = {
-        'services': services,
         'form': form,
-        'categories': Category.objects.filter(is_active=True),
+        'categories': categories,
+        'facets': facet_counts,
+        'price_histogram': price_histogram.slider(selected_category.pk if selected_category else None),
     }
     
-    return render(request, 'services/service_list.html', context)
+    return _paginated_response(request, 'services/service_list.html', context,
+                               build_queryset, filter_key, _search_ordering(form))
 
 
 def service_detail(request, pk):
@@ -171,17 +283,38 @@ def category_list(request):
 def category_services(request, pk):
     """Services in a specific category"""
     category = get_object_or_404(Category, pk=pk, is_active=True)
-    # Only show approved services from verified freelancers
-    services = Service.objects.filter(
-        category=category,
-        is_active=True,
-        is_approved=True,
-        freelancer__is_verified=True
-    ).select_related('freelancer')
+    
+    def build_queryset():
+        # Only active, approved services from verified freelancers are listed
+        return ServiceSearchDocument.objects.filter(category=category, is_listed=True)
+    
+    filter_key = f'category={category.pk}'
     
     context = {
         'category': category,
-        'services': services,
+        'service_count': facets.get_facets(build_queryset, filter_key)['total'],
     }
     
-    return render(request, 'services/category_services.html', context)
+    return _paginated_response(request, 'services/category_services.html', context,
+                               build_queryset, filter_key)
+
+
+def search_suggestions(request):
+    """Typeahead suggestions for the service search box (JSON)"""
+    prefix = request.GET.get('q', '')[:100]
+    try:
+        limit = int(request.GET.get('limit', suggest.MAX_LIMIT))
+    except ValueError:
+        limit = suggest.MAX_LIMIT
+    
+    suggestions = []
+    for item in suggest.suggest(prefix, max(limit, 1)):
+        if item['type'] == 'service':
+            url = reverse('services:service_detail', args=[item['ref']])
+        elif item['type'] == 'category':
+            url = reverse('services:category_services', args=[item['ref']])
+        else:
+            url = f"{reverse('services:service_list')}?{urlencode({'query': item['text']})}"
+        suggestions.append({'text': item['text'], 'type': item['type'], 'url': url})
+    
+    return JsonResponse({'query': prefix, 'suggestions': suggestions})